@@ -0,0 +1,135 @@
+# analysis_client.py - Client and load tester for analysis_server.py
+#
+# Usage:
+#   python analysis_client.py poem.txt                          # analyze one poem and print the JSON
+#   python analysis_client.py --endpoint rhyme poem.txt
+#   python analysis_client.py --load-test --requests 500 --concurrency 32 [poem.txt ...]
+#
+# The load test sends the given poems (or a built-in sample) from a pool of threads, each with its
+# own keep-alive connection. It reports throughput, latency percentiles and how many requests the
+# server turned away with 503.
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis_server import DEFAULT_HOST, DEFAULT_PORT
+
+SAMPLE_POEM = ("Shall I compare thee to a summer's day?\n"
+               "Thou art more lovely and more temperate:\n"
+               "Rough winds do shake the darling buds of May,\n"
+               "And summer's lease hath all too short a date;")
+
+
+class AnalysisClient:
+    """Minimal keep-alive JSON client; one instance per thread."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=60):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.connection = None
+
+    def request(self, endpoint, text):
+        """Returns (status, payload_dict)."""
+        body = json.dumps({"text": text})
+        for attempt in range(2):  # Reconnect once if the server dropped the kept-alive connection
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request("POST", "/" + endpoint.lstrip("/"), body=body,
+                                        headers={"Content-Type": "application/json"})
+                response = self.connection.getresponse()
+                return response.status, json.loads(response.read().decode("utf-8") or "{}")
+            except (http.client.HTTPException, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+        return None, {}
+
+    def analyze(self, text):
+        return self.request("analyze", text)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def load_test(texts, endpoint="analyze", requests=200, concurrency=16, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Fires `requests` requests from `concurrency` threads; returns a summary dict."""
+    local = threading.local()
+    latencies, statuses, lock = [], {}, threading.Lock()
+
+    def one(i):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = AnalysisClient(host, port)
+        started = time.perf_counter()
+        try:
+            status, _ = client.request(endpoint, texts[i % len(texts)])
+        except (OSError, http.client.HTTPException):
+            status = "error"
+        elapsed = time.perf_counter() - started
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "latency_ms": {name: round(_percentile(latencies, q) * 1000, 2)
+                       for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Client and load tester for the poem analysis service.")
+    parser.add_argument("files", nargs="*", help="Poem text files (default: a built-in sample poem)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--endpoint", default="analyze", help="analyze, rhyme, syllables, sentiment, figures or form")
+    parser.add_argument("--load-test", action="store_true")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    texts = []
+    for path in args.files:
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    texts = texts or [SAMPLE_POEM]
+
+    if args.load_test:
+        summary = load_test(texts, args.endpoint, args.requests, args.concurrency, args.host, args.port)
+        print(json.dumps(summary, indent=2))
+        return 0 if summary["statuses"].get("200") else 1
+    client = AnalysisClient(args.host, args.port)
+    try:
+        for text in texts:
+            status, payload = client.request(args.endpoint, text)
+            print(json.dumps({"status": status, **payload}, indent=2, ensure_ascii=False))
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
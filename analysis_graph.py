@@ -0,0 +1,253 @@
+# analysis_graph.py - Analyzers declared by the artifacts they read and produce, run as a small DAG
+#
+# An analyzer is registered with the names of its inputs and outputs ("lines" -> "rhyme_tails" ->
+# "rhyme_labels" -> "form"). run() works out which analyzers the requested artifacts need and
+# computes every artifact exactly once, starting each analyzer as soon as its inputs are ready
+# rather than in one fixed order. Analyzers registered with concurrent=True (ones that wait on a
+# network service or a subprocess, or release the interpreter lock) go to a small thread pool and
+# run alongside the rest of the graph. The built-in analyzers are pure Python and stay in the
+# calling thread: under the interpreter lock, spreading them over threads measured 5-25% slower
+# than running them back to back. LITLOOM_ANALYSIS_THREADS=0 runs everything in the calling thread.
+#
+# Third-party analyzers plug in without touching the apps: a module listed in LITLOOM_ANALYZERS
+# (comma-separated) or exposed under the "litloom.analyzers" entry-point group defines
+# register_analyzers(graph) and calls graph.register() there. An analyzer registered with a title
+# is a report: analyze_poem() returns its outputs and the app shows them in the named result tab.
+# A plugin or report analyzer that raises does not stop the run: its outputs (and those of the
+# analyzers depending on them) are set to an "Unavailable" message. Built-in failures propagate.
+import importlib
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from tracing import span
+
+PLUGIN_ENV = "LITLOOM_ANALYZERS"
+PLUGIN_GROUP = "litloom.analyzers"
+PLUGIN_HOOK = "register_analyzers"
+DEFAULT_THREADS = 4
+
+Analyzer = namedtuple("Analyzer", ["name", "inputs", "outputs", "func", "tab", "title", "concurrent", "plugin"])
+Analyzer.__doc__ = """func(*inputs) returns the one output, or a tuple with one value per output.
+
+plugin names the plugin that registered it (None for the apps' own analyzers)."""
+
+
+class AnalysisGraph:
+    """Registered analyzers, keyed by name, and the artifact each of them produces."""
+
+    def __init__(self):
+        self.analyzers = {}  # name -> Analyzer, in registration order
+        self._producers = {}  # artifact -> name of the analyzer producing it
+        self._registering_plugin = None  # Set by load_plugins() while a plugin's hook runs
+
+    def register(self, name, inputs, outputs, func=None, tab=None, title=None, concurrent=False, replace=False):
+        """Adds an analyzer; without func, returns a decorator that registers the decorated function.
+
+        Two analyzers cannot produce the same artifact; replace=True swaps out an analyzer of the
+        same name (e.g. a plugin providing a better rhyme matcher).
+        """
+        if func is None:
+            def decorator(f):
+                self.register(name, inputs, outputs, f, tab, title, concurrent, replace)
+                return f
+            return decorator
+        inputs, outputs = tuple(inputs), tuple(outputs)
+        if not outputs:
+            raise ValueError(f"Analyzer '{name}' declares no outputs")
+        if name in self.analyzers:
+            if not replace:
+                raise ValueError(f"An analyzer named '{name}' is already registered")
+            self.unregister(name)
+        for output in outputs:
+            if output in self._producers:
+                raise ValueError(f"Artifact '{output}' is already produced by '{self._producers[output]}'")
+        self.analyzers[name] = Analyzer(name, inputs, outputs, func, tab, title, concurrent,
+                                        self._registering_plugin)
+        for output in outputs:
+            self._producers[output] = name
+        return self.analyzers[name]
+
+    def unregister(self, name):
+        analyzer = self.analyzers.pop(name)
+        for output in analyzer.outputs:
+            del self._producers[output]
+
+    def reports(self):
+        """The analyzers registered with a title, in registration order."""
+        return [analyzer for analyzer in self.analyzers.values() if analyzer.title]
+
+    def plan(self, targets=None, provided=("text",)):
+        """The analyzers needed for `targets` (every artifact when None), each after its inputs.
+
+        Raises ValueError for an artifact nobody produces or for a dependency cycle.
+        """
+        if targets is None:
+            targets = list(self._producers)
+        provided, order, state = set(provided), [], {}  # state: name -> "visiting" | "done"
+
+        def visit(artifact, needed_by):
+            if artifact in provided:
+                return
+            name = self._producers.get(artifact)
+            if name is None:
+                raise ValueError(f"No analyzer produces '{artifact}' (needed by {needed_by})")
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Analyzer dependency cycle through '{name}'")
+            state[name] = "visiting"
+            for dependency in self.analyzers[name].inputs:
+                visit(dependency, f"'{name}'")
+            state[name] = "done"
+            order.append(self.analyzers[name])
+
+        for target in targets:
+            visit(target, "the caller")
+        return order
+
+    def run(self, provided, targets=None, threads=None):
+        """{artifact: value} for the provided artifacts plus everything the targets depend on."""
+        artifacts = dict(provided)
+        order = self.plan(targets, artifacts)
+        pool = _thread_pool(threads) if any(analyzer.concurrent for analyzer in order) else None
+        missing, consumers = {}, {}  # analyzer name -> inputs not computed yet; artifact -> analyzers reading it
+        for analyzer in order:
+            missing[analyzer.name] = {name for name in analyzer.inputs if name not in artifacts}
+            for name in missing[analyzer.name]:
+                consumers.setdefault(name, []).append(analyzer)
+        ready = [analyzer for analyzer in order if not missing[analyzer.name]]
+        running = {}  # future -> concurrent analyzer on the pool
+        failed = set()  # Artifacts holding an "Unavailable" message instead of a result
+
+        def release(analyzer):
+            for output in analyzer.outputs:
+                for waiting in consumers.get(output, ()):
+                    inputs_left = missing[waiting.name]
+                    inputs_left.discard(output)
+                    if not inputs_left:
+                        ready.append(waiting)
+
+        def give_up(analyzer, reason):
+            message = f"Unavailable ({reason})"
+            artifacts.update((output, message) for output in analyzer.outputs)
+            failed.update(analyzer.outputs)
+            release(analyzer)
+
+        def finish(analyzer, compute):
+            try:
+                _store(analyzer, compute(), artifacts)
+            except Exception as e:
+                if analyzer.plugin is None and not analyzer.title:
+                    raise
+                print(f"Warning: Analyzer '{analyzer.name}' failed: {e!r}")
+                give_up(analyzer, f"analyzer '{analyzer.name}' failed: {e}")
+                return
+            release(analyzer)
+
+        try:
+            while ready or running:
+                if ready:
+                    # Pool work is started first, so it overlaps with what runs here
+                    analyzer = next((a for a in ready if pool is not None and a.concurrent), ready[0])
+                    ready.remove(analyzer)
+                    broken_input = next((name for name in analyzer.inputs if name in failed), None)
+                    if broken_input is not None:
+                        give_up(analyzer, f"'{broken_input}' is unavailable")
+                    elif pool is not None and analyzer.concurrent:
+                        running[pool.submit(_call, analyzer, artifacts)] = analyzer
+                        continue
+                    else:
+                        finish(analyzer, lambda: _call(analyzer, artifacts))
+                else:
+                    wait(running, return_when=FIRST_COMPLETED)
+                for future in [future for future in running if future.done()]:
+                    finish(running.pop(future), future.result)
+        except Exception:
+            for future in running:
+                future.cancel()
+            raise
+        return artifacts
+
+
+def _call(analyzer, artifacts):
+    with span(analyzer.name):
+        return analyzer.func(*(artifacts[name] for name in analyzer.inputs))
+
+
+def _store(analyzer, value, artifacts):
+    if len(analyzer.outputs) == 1:
+        artifacts[analyzer.outputs[0]] = value
+        return
+    if not isinstance(value, tuple) or len(value) != len(analyzer.outputs):
+        raise ValueError(f"Analyzer '{analyzer.name}' must return a tuple of {len(analyzer.outputs)} values")
+    artifacts.update(zip(analyzer.outputs, value))
+
+
+# --- Thread Pool ---
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configured_threads():
+    try:
+        return int(os.environ.get("LITLOOM_ANALYSIS_THREADS", DEFAULT_THREADS))
+    except ValueError:
+        return DEFAULT_THREADS
+
+
+def _thread_pool(threads=None):
+    """The shared analyzer pool, or None when analyzers should run in the calling thread."""
+    global _pool
+    threads = configured_threads() if threads is None else threads
+    if threads <= 0:
+        return None  # A one-thread pool still overlaps concurrent analyzers with the calling thread
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="analyzer")
+    return _pool
+
+
+# --- Plugins ---
+def _plugin_hooks():
+    """(source, register_analyzers) for every configured plugin module and entry point."""
+    hooks = []
+    for module_name in filter(None, (name.strip() for name in os.environ.get(PLUGIN_ENV, "").split(","))):
+        try:
+            hooks.append((module_name, getattr(importlib.import_module(module_name), PLUGIN_HOOK)))
+        except (ImportError, AttributeError) as e:
+            print(f"Warning: Analyzer plugin '{module_name}' not loaded ({e}); it needs a {PLUGIN_HOOK}(graph) function.")
+    try:
+        from importlib.metadata import entry_points
+        try:
+            found = entry_points(group=PLUGIN_GROUP)
+        except TypeError:  # Python < 3.10
+            found = entry_points().get(PLUGIN_GROUP, [])
+    except ImportError:
+        found = []
+    for entry_point in found:
+        try:
+            hooks.append((entry_point.name, entry_point.load()))
+        except Exception as e:
+            print(f"Warning: Analyzer plugin '{entry_point.name}' could not be loaded: {e}")
+    return hooks
+
+
+def load_plugins(graph):
+    """Lets every installed plugin register its analyzers on graph; returns the names of those loaded."""
+    loaded = []
+    for source, hook in _plugin_hooks():
+        graph._registering_plugin = source
+        try:
+            hook(graph)
+            loaded.append(source)
+        except Exception as e:  # A broken plugin must not take the built-in analyses down with it
+            print(f"Warning: Analyzer plugin '{source}' failed to register: {e}")
+            for analyzer in list(graph.analyzers.values()):
+                if analyzer.plugin == source:
+                    graph.unregister(analyzer.name)
+        finally:
+            graph._registering_plugin = None
+    return loaded
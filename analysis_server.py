@@ -0,0 +1,336 @@
+# analysis_server.py - Local HTTP/JSON service exposing the poem analyzers
+#
+# Usage:
+#   python analysis_server.py                       # listens on 127.0.0.1:8765
+#   python analysis_server.py --port 9000 --workers 4 --batch-window-ms 5
+#
+# Endpoints (POST a JSON body {"text": "..."}; GET /health for a liveness check, GET /metrics for
+# Prometheus-format metrics, see metrics.py):
+#   /analyze  /rhyme  /syllables  /sentiment  /figures  /form
+#
+# The asyncio front end only parses HTTP. The NLTK work runs in a process pool (worker_pool.py; on
+# Linux the workers are forked from a parent that already loaded the lexicons): requests to the
+# same endpoint that arrive within --batch-window-ms are coalesced into one job, which tags all
+# of its poems with a single batched tagger call before running the per-poem analyzers. The number
+# of requests waiting or in flight is bounded; beyond --max-pending the server answers
+# 503 with a Retry-After header instead of queueing without limit.
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from http import HTTPStatus
+
+import metrics
+from worker_pool import create_pool
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_WINDOW_MS = 5
+DEFAULT_MAX_BATCH = 32
+DEFAULT_MAX_PENDING = 256
+MAX_BODY_BYTES = 2 * 1024 * 1024
+
+REQUESTS = metrics.REGISTRY.counter("litloom_requests_total", "HTTP requests answered.", ("endpoint", "status"))
+REQUEST_SECONDS = metrics.REGISTRY.histogram("litloom_request_seconds",
+                                             "Time from accepting a request to having its result.", ("endpoint",))
+BATCH_SIZE = metrics.REGISTRY.histogram("litloom_batch_size", "Requests coalesced into one pool job.", ("endpoint",),
+                                        buckets=(1, 2, 4, 8, 16, 32, 64))
+QUEUE_DEPTH = metrics.REGISTRY.gauge("litloom_queue_depth", "Requests waiting at each stage.", ("queue",))
+
+
+# --- Worker Side (runs in the process pool) ---
+_analysis = None  # main.py, imported once per worker process
+
+
+def _worker_init():
+    global _analysis
+    import main as analysis_module
+    _analysis = analysis_module
+    metrics.install()
+
+
+def _rhyme(text):
+    labels, rhyming_words, lines = _analysis.analyze_rhyme_labels(text)
+    return {"rhyme_scheme": "".join(labels), "labels": labels, "rhyming_words": rhyming_words}
+
+
+def _syllables(text):
+    counts = _analysis.count_syllables_per_line(_analysis.poem_lines(text))
+    return {"syllables_per_line": counts, "total": sum(counts)}
+
+
+def _sentiment(text):
+    overall_sentiment, detailed_tone, interpretive_summary = _analysis.analyze_sentiment(text)
+    return {"overall": overall_sentiment, "tone": detailed_tone, "summary": interpretive_summary}
+
+
+def _figures(text):
+    return {"figures_of_speech": [figure._asdict() for figure in _analysis.detect_figures(text)]}
+
+
+def _form(text):
+    return {"form": _analysis.identify_poem_type(text)}
+
+
+def _analyze(text):
+    return _analysis.analyze_poem(text)
+
+
+ENDPOINTS = {
+    "/analyze": _analyze,
+    "/rhyme": _rhyme,
+    "/syllables": _syllables,
+    "/sentiment": _sentiment,
+    "/figures": _figures,
+    "/form": _form,
+}
+TAGGING_ENDPOINTS = frozenset(["/analyze", "/figures"])
+KNOWN_PATHS = frozenset([*ENDPOINTS, "/health", "/metrics"])  # Other paths share one metrics label
+
+
+def run_batch(path, texts):
+    """Runs one endpoint over a batch of poems in a worker.
+
+    Returns ([(ok, result_or_error), ...], metrics.worker_snapshot()).
+    """
+    if _analysis is None:
+        _worker_init()
+    if path in TAGGING_ENDPOINTS:
+        # One tagger call for every sentence in the batch; the per-poem analyzers then hit the memo
+        from tagging import tag_poems
+        tag_poems(texts)
+        tag_poems(texts, lower=True)
+    handler = ENDPOINTS[path]
+    results = []
+    for text in texts:
+        try:
+            results.append((True, handler(text)))
+        except Exception as e:
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results, metrics.worker_snapshot()
+
+
+# --- Request Batching ---
+class Batcher:
+    """Coalesces requests for one endpoint that arrive within a short window into one pool job."""
+
+    def __init__(self, server, path):
+        self.server = server
+        self.path = path
+        self.pending = []  # (text, future)
+        self.flush_handle = None
+
+    def submit(self, text):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((text, future))
+        if len(self.pending) >= self.server.max_batch:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(self.server.batch_window, self._flush)
+        return future
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if batch:
+            asyncio.ensure_future(self.server.dispatch(self.path, batch))
+
+
+# --- Server ---
+class _RejectedRequest(Exception):
+    """A request answered with an error before its body is read."""
+
+    def __init__(self, path, status, message):
+        super().__init__(message)
+        self.path, self.status, self.message = path, status, message
+
+
+class AnalysisServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, batch_window_ms=DEFAULT_BATCH_WINDOW_MS,
+                 max_batch=DEFAULT_MAX_BATCH, max_pending=DEFAULT_MAX_PENDING, start_method=None):
+        self.host, self.port = host, port
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.start_method = start_method
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.pending = 0  # Requests accepted but not answered yet
+        self.in_flight = 0  # Requests in pool jobs that have been submitted
+        self.stats = {"requests": 0, "rejected": 0, "batches": 0, "batched_requests": 0}
+        self.executor = None
+        self.job_slots = None  # Limits pool jobs in flight so the executor's own queue stays short
+        self.batchers = {path: Batcher(self, path) for path in ENDPOINTS}
+        self.server = None
+        QUEUE_DEPTH.set_function(lambda: self.pending, "pending")
+        QUEUE_DEPTH.set_function(lambda: sum(len(b.pending) for b in self.batchers.values()), "batching")
+        QUEUE_DEPTH.set_function(lambda: self.in_flight, "in_flight")
+
+    async def start(self):
+        # Workers start (with their resources loaded) now rather than on the first requests. This
+        # runs on the loop thread on purpose: forking must happen before any helper thread exists.
+        self.executor = create_pool(self.workers, _worker_init, self.start_method)
+        self.job_slots = asyncio.Semaphore(self.workers * 2)
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def dispatch(self, path, batch):
+        self.stats["batches"] += 1
+        self.stats["batched_requests"] += len(batch)
+        BATCH_SIZE.observe(len(batch), path)
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.job_slots:
+                self.in_flight += len(batch)
+                try:
+                    results, snapshot = await loop.run_in_executor(self.executor, run_batch, path,
+                                                                   [text for text, _ in batch])
+                finally:
+                    self.in_flight -= len(batch)
+            metrics.merge_snapshot(snapshot)
+        except Exception as e:
+            results = [(False, f"{type(e).__name__}: {e}")] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    # --- HTTP ---
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _RejectedRequest as e:  # The body was not read, so the connection cannot be reused
+                    REQUESTS.inc(e.path if e.path in KNOWN_PATHS else "other", str(e.status.value))
+                    self._write_response(writer, e.status, {"error": e.message}, {}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload, extra_headers = await self.route(method, path, body)
+                REQUESTS.inc(path if path in KNOWN_PATHS else "other", str(status.value))
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, payload, extra_headers, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise _RejectedRequest("", HTTPStatus.BAD_REQUEST, "Malformed request line") from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        path = target.split("?", 1)[0]
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise _RejectedRequest(path, HTTPStatus.BAD_REQUEST, "Invalid Content-Length header")
+        if length > MAX_BODY_BYTES:
+            raise _RejectedRequest(path, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                   f"Request body exceeds {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path, headers, body
+
+    def _write_response(self, writer, status, payload, extra_headers, keep_alive):
+        if isinstance(payload, str):  # Plain-text payloads are the /metrics exposition
+            body, content_type = payload.encode("utf-8"), metrics.CONTENT_TYPE
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head += [f"{name}: {value}" for name, value in extra_headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+    async def route(self, method, path, body):
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok", "pending": self.pending, **self.stats}, {}
+        if path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, metrics.REGISTRY.render(), {}
+        if path not in ENDPOINTS:
+            return HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint {path}"}, {}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Use POST with a JSON body"}, {"Allow": "POST"}
+        try:
+            text = json.loads(body.decode("utf-8") or "{}").get("text")
+        except (ValueError, AttributeError):
+            text = None
+        if not isinstance(text, str):
+            return HTTPStatus.BAD_REQUEST, {"error": "Body must be a JSON object with a 'text' string"}, {}
+        self.stats["requests"] += 1
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Server busy, retry later"}, {"Retry-After": "1"}
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            ok, result = await self.batchers[path].submit(text)
+        finally:
+            self.pending -= 1
+        if not ok:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": result}, {}
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        REQUEST_SECONDS.observe(elapsed_ms / 1000.0, path)
+        return HTTPStatus.OK, {"result": result, "elapsed_ms": round(elapsed_ms, 2)}, {}
+
+
+async def serve(args):
+    server = await AnalysisServer(args.host, args.port, args.workers, args.batch_window_ms, args.max_batch,
+                                  args.max_pending, args.start_method).start()
+    print(f"Poem analysis service listening on http://{server.host}:{server.port} "
+          f"({server.workers} workers, {args.batch_window_ms} ms batch window)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON service for the poem analyzers.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count - 1)")
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW_MS,
+                        help="How long to wait for more requests to coalesce into one batch")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="Requests waiting or in flight before answering 503")
+    parser.add_argument("--start-method", choices=["fork", "spawn", "forkserver"], default=None,
+                        help="How workers are started (default: fork where available, else spawn)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+# benchmark.py - Performance benchmarks for the poem analyzers in main.py and Finish
+#
+# Usage:
+#   python benchmark.py                   # run and compare against benchmark_baselines.json
+#   python benchmark.py --save-baseline   # run and store the results as the new baseline
+#   python benchmark.py --only rhyme      # run only benchmarks whose name contains "rhyme"
+#
+# A run without a baseline file fails (exit status 2) unless --save-baseline or
+# --allow-missing-baseline is given, so a gate that has nothing to compare against never passes.
+#
+# The network-dependent pieces (googletrans, deep_translator, gTTS, playsound) are replaced
+# by local stubs so the numbers never include a network round-trip. The Windows-only speech
+# modules are stubbed as well when missing so Finish can be loaded on any platform.
+import argparse
+import gc
+import importlib.machinery
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(BASE_DIR, "benchmark_baselines.json")
+DEFAULT_THRESHOLD = 0.25  # Fail when a benchmark is more than 25% slower (or hungrier) than its baseline
+CORPUS_SEED = 1729
+
+# --- Local Stubs for Network and Platform Dependencies ---
+class _StubTranslation:
+    def __init__(self, text, dest):
+        self.text, self.dest, self.src = text, dest, "en"
+
+
+class _StubGoogletransTranslator:
+    """Stands in for googletrans.Translator; echoes the text back."""
+
+    def translate(self, text, dest="en", src="auto"):
+        return _StubTranslation(text, dest)
+
+
+class _StubDeepTranslator:
+    """Stands in for deep_translator.GoogleTranslator; echoes the text back."""
+
+    def __init__(self, source="auto", target="en"):
+        self.source, self.target = source, target
+
+    def translate(self, text):
+        return text
+
+    def get_supported_languages(self, as_dict=False):
+        langs = {"english": "en", "french": "fr", "german": "de", "spanish": "es"}
+        return langs if as_dict else list(langs.keys())
+
+
+class _StubGTTS:
+    """Stands in for gtts.gTTS; writes an empty file instead of calling Google."""
+
+    def __init__(self, text="", lang="en", **kwargs):
+        self.text, self.lang = text, lang
+
+    def save(self, filename):
+        with open(filename, "wb"):
+            pass
+
+
+def _make_module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def install_offline_stubs():
+    """Replaces network-dependent modules with local stubs (and Windows-only ones if missing)."""
+    sys.modules["googletrans"] = _make_module("googletrans", Translator=_StubGoogletransTranslator)
+    sys.modules["deep_translator"] = _make_module("deep_translator", GoogleTranslator=_StubDeepTranslator,
+                                                  exceptions=_make_module("deep_translator.exceptions"))
+    sys.modules["deep_translator.exceptions"] = sys.modules["deep_translator"].exceptions
+    sys.modules["gtts"] = _make_module("gtts", gTTS=_StubGTTS)
+    sys.modules["playsound"] = _make_module("playsound", playsound=lambda *args, **kwargs: None)
+
+    try:
+        import pyttsx3  # noqa: F401
+    except ImportError:
+        sys.modules["pyttsx3"] = _make_module("pyttsx3", init=lambda *args, **kwargs: None)
+    try:
+        import pythoncom  # noqa: F401
+    except ImportError:
+        sys.modules["pythoncom"] = _make_module("pythoncom", CoInitialize=lambda: None)
+    try:
+        import win32com.client  # noqa: F401
+    except ImportError:
+        win32com = _make_module("win32com")
+        win32com.client = _make_module("win32com.client", Dispatch=lambda *a, **k: None)
+        sys.modules["win32com"], sys.modules["win32com.client"] = win32com, win32com.client
+
+
+def load_main_module():
+    install_offline_stubs()
+    import main
+    return main
+
+
+def load_finish_module():
+    """Imports the extension-less Finish script as a module (its __main__ guard keeps the window closed)."""
+    install_offline_stubs()
+    if "Finish" in sys.modules:
+        return sys.modules["Finish"]
+    path = os.path.join(BASE_DIR, "Finish")
+    loader = importlib.machinery.SourceFileLoader("Finish", path)
+    spec = importlib.util.spec_from_loader("Finish", loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["Finish"] = module
+    try:
+        loader.exec_module(module)
+    except BaseException:
+        del sys.modules["Finish"]
+        raise
+    return module
+
+
+def make_headless_finish_app(finish_module):
+    """Builds a LitLoomApp without creating a Tk window, capturing widget updates instead."""
+    app = finish_module.LitLoomApp.__new__(finish_module.LitLoomApp)
+    app.tk = None  # Tk.__getattr__ delegates to self.tk; a None interpreter turns lookups into AttributeError
+    app.poem_text = ""
+    app.active_analysis_button = "overview"
+    app.analysis_text_widget = None
+    app.last_output = None
+
+    def capture_update(content, title=""):
+        app.last_output = (title, content)
+
+    app.update_analysis_widget = capture_update
+    app.show_temp_message = lambda message, duration_ms=2000: None
+    return app
+
+
+# --- Deterministic Synthetic Corpora ---
+RHYME_FAMILIES = [
+    ["night", "light", "bright", "sight", "flight", "white"],
+    ["day", "way", "gray", "stay", "play", "away"],
+    ["heart", "part", "art", "start", "apart", "chart"],
+    ["sea", "free", "tree", "be", "me", "key"],
+    ["rain", "pain", "lane", "again", "plain", "chain"],
+    ["moon", "soon", "tune", "noon", "spoon", "dune"],
+    ["fire", "desire", "higher", "choir", "wire", "spire"],
+    ["stone", "alone", "bone", "known", "grown", "throne"],
+]
+ADJECTIVES = ["silent", "golden", "bitter", "gentle", "hollow", "crimson", "lonely", "restless", "tender", "pale"]
+NOUNS = ["wind", "river", "moon", "stars", "trees", "ocean", "garden", "memory", "shadow", "flower", "time", "sun"]
+VERBS = ["whispered", "sang", "danced", "wept", "sighed", "called", "fell", "waited", "burned", "drifted"]
+CONNECTORS = ["like", "beneath", "across", "beyond", "within", "toward", "upon", "against"]
+
+
+def _verse_line(rng, end_word=None):
+    pattern = rng.randrange(4)
+    adj, noun, verb = rng.choice(ADJECTIVES), rng.choice(NOUNS), rng.choice(VERBS)
+    tail = end_word or rng.choice(NOUNS)
+    if pattern == 0:
+        return f"The {adj} {noun} {verb} {rng.choice(CONNECTORS)} the {tail}"
+    if pattern == 1:
+        return f"As {adj} as a {noun} that {verb} in {tail}"
+    if pattern == 2:
+        return f"{noun.capitalize()} {verb} softly, {adj} {tail}"
+    return f"And {rng.choice(['sweet', 'soft', 'sad'])} {rng.choice(['songs', 'sighs', 'seas'])} {verb} of {tail}"
+
+
+def _rhymed_poem(rng, scheme):
+    families = rng.sample(RHYME_FAMILIES, len(set(scheme)))
+    family_for_label = {label: families[i] for i, label in enumerate(sorted(set(scheme)))}
+    used = {label: 0 for label in family_for_label}
+    lines = []
+    for label in scheme:
+        family = family_for_label[label]
+        lines.append(_verse_line(rng, family[used[label] % len(family)]))
+        used[label] += 1
+    return lines
+
+
+def build_corpora(seed=CORPUS_SEED):
+    """Returns {corpus_name: [poem_text, ...]}; identical for identical seeds."""
+    rng = random.Random(seed)
+    corpora = {}
+    corpora["haiku"] = ["\n".join(["An old silent pond", "A frog jumps into the pond", "Splash! Silence again"])] + [
+        "\n".join(f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}" for _ in range(3)) for _ in range(49)]
+    corpora["sonnet"] = ["\n".join(_rhymed_poem(rng, "ABABCDCDEFEFGG")) for _ in range(20)]
+    corpora["limerick"] = ["\n".join(_rhymed_poem(rng, "AABBA")) for _ in range(40)]
+    corpora["free_verse_1k"] = ["\n".join(_verse_line(rng) for _ in range(1000))]
+    corpora["giant_line"] = [" ".join(_verse_line(rng) for _ in range(2000))]
+    blank_heavy = []
+    for i in range(5000):
+        blank_heavy.append(_verse_line(rng) if i % 500 == 0 else "")
+    corpora["blank_lines"] = ["\n".join(blank_heavy)]
+    return corpora
+
+
+# --- Benchmark Definitions ---
+def _words_of(corpus):
+    return [word for poem in corpus for word in poem.split()]
+
+
+def build_benchmarks(main_module, finish_module=None):
+    """Returns a list of (name, callable(corpus)) pairs; each callable runs one analyzer over a corpus."""
+    import figures
+    import scansion
+    import tagging
+    analyzers = [
+        ("count_syllables_in_word", lambda corpus: [main_module.count_syllables_in_word(w) for w in _words_of(corpus)]),
+        ("analyze_parts_of_speech_grouped", lambda corpus: [main_module.analyze_parts_of_speech_grouped(p) for p in corpus]),
+        ("identify_figures_of_speech", lambda corpus: [main_module.identify_figures_of_speech(p) for p in corpus]),
+        # Tagging plus the detector pass, without the per-text memo of detect_figures()
+        ("figures.detect_in_tagged", lambda corpus: [figures.detect_in_tagged(*tagging.tag_text(p, lower=True))
+                                                     for p in corpus]),
+        ("analyze_rhyme_scheme_and_words", lambda corpus: [main_module.analyze_rhyme_scheme_and_words(p) for p in corpus]),
+        ("identify_poem_type", lambda corpus: [main_module.identify_poem_type(p) for p in corpus]),
+        ("scansion.scan_poems", lambda corpus: scansion.scan_poems(corpus)),
+        ("analyze_sentiment", lambda corpus: [main_module.analyze_sentiment(p) for p in corpus]),
+    ]
+    if finish_module is not None:
+        app = make_headless_finish_app(finish_module)
+
+        def finish_method(method_name):
+            def run(corpus):
+                for poem in corpus:
+                    app.poem_text = poem
+                    getattr(app, method_name)()
+            return run
+
+        def finish_rhyme(corpus):
+            for poem in corpus:
+                app.analyze_rhyme_scheme(poem.strip().split('\n'))
+
+        def finish_pdf(corpus):
+            with tempfile.TemporaryDirectory() as output_dir:
+                for poem in corpus:
+                    app.poem_text = poem
+                    app._generate_pdf_content(output_dir)
+
+        analyzers += [
+            ("Finish._generate_overview_content", finish_method("_generate_overview_content")),
+            ("Finish._generate_parts_of_speech_content", finish_method("_generate_parts_of_speech_content")),
+            ("Finish._generate_figure_of_speech_content", finish_method("_generate_figure_of_speech_content")),
+            ("Finish._generate_tone_content", finish_method("_generate_tone_content")),
+            ("Finish.analyze_rhyme_scheme", finish_rhyme),
+            ("Finish._generate_pdf_content", finish_pdf),
+        ]
+    return analyzers
+
+
+def clear_analysis_caches():
+    """Empties the per-text memos, so every timed run analyses the corpus from scratch."""
+    import figures
+    import scansion
+    import tagging
+    figures._detect_cached.cache_clear()
+    scansion._cached_word_stresses.cache_clear()
+    tagging.get_tagging_service().clear_cache()
+
+
+def _time_once(func, corpus):
+    clear_analysis_caches()
+    gc.collect()
+    start = time.perf_counter()
+    func(corpus)
+    return time.perf_counter() - start
+
+
+def _peak_memory_kib(func, corpus):
+    clear_analysis_caches()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(corpus)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024.0
+
+
+def run_benchmarks(benchmarks, corpora, repeat=5, only=None):
+    """Times every (analyzer, corpus) pair; returns {"analyzer/corpus": result_dict}."""
+    results = {}
+    for name, func in benchmarks:
+        for corpus_name, corpus in corpora.items():
+            key = f"{name}/{corpus_name}"
+            if only and not any(fragment in key for fragment in only):
+                continue
+            func(corpus)  # Warm-up: loads lazy NLTK resources so they are not counted
+            best = min(_time_once(func, corpus) for _ in range(max(1, repeat)))
+            peak_kib = _peak_memory_kib(func, corpus)
+            num_lines = sum(len(poem.split('\n')) for poem in corpus)
+            num_chars = sum(len(poem) for poem in corpus)
+            results[key] = {
+                "seconds": best,
+                "poems_per_sec": len(corpus) / best if best > 0 else float("inf"),
+                "lines_per_sec": num_lines / best if best > 0 else float("inf"),
+                "chars_per_sec": num_chars / best if best > 0 else float("inf"),
+                "peak_kib": peak_kib,
+            }
+            print(f"  {key:<70} {best * 1000:10.2f} ms  {results[key]['lines_per_sec']:12.0f} lines/s"
+                  f"  {peak_kib:10.1f} KiB peak")
+    return results
+
+
+# --- Baselines and Regression Gates ---
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(path, results):
+    payload = {"version": 1, "python": sys.version.split()[0], "platform": sys.platform, "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    print(f"Baseline written to {path}")
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Returns a list of human-readable regression messages (empty when everything is within threshold)."""
+    regressions = []
+    for key, current in sorted(results.items()):
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        for metric, label in (("seconds", "time"), ("peak_kib", "peak memory")):
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append(f"{key}: {label} regressed by {change:.0%} ({old:.4g} -> {new:.4g})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the LitLoom poem analyzers.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (best is kept)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown relative to the baseline, e.g. 0.25 for 25%%")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="succeed when there is no baseline to compare against")
+    parser.add_argument("--only", nargs="*", help="run only benchmarks whose name contains one of these strings")
+    parser.add_argument("--skip-finish", action="store_true", help="do not load or time the Finish app methods")
+    parser.add_argument("--seed", type=int, default=CORPUS_SEED, help="seed for the synthetic corpora")
+    args = parser.parse_args(argv)
+    if not (args.save_baseline or args.allow_missing_baseline or os.path.exists(args.baseline)):
+        print(f"No baseline found at {args.baseline}; run with --save-baseline to create one.")
+        return 2
+
+    main_module = load_main_module()
+    finish_module = None
+    if not args.skip_finish:
+        try:
+            finish_module = load_finish_module()
+        except (Exception, SystemExit) as e:
+            print(f"Warning: Finish could not be loaded ({e!r}); its benchmarks are skipped.")
+
+    corpora = build_corpora(args.seed)
+    print(f"Running benchmarks (repeat={args.repeat}, seed={args.seed})...")
+    results = run_benchmarks(build_benchmarks(main_module, finish_module), corpora, args.repeat, args.only)
+
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline)
+        baseline.update(results)
+        save_baseline(args.baseline, baseline)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"No baseline found at {args.baseline}; run with --save-baseline to create one.")
+        return 0 if args.allow_missing_baseline else 2
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
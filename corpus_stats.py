@@ -0,0 +1,172 @@
+# corpus_stats.py - Corpus-level vocabulary, document frequencies and sparse TF-IDF
+#
+# Poems are consumed one at a time, so a collection can be streamed from disk; raw texts and token
+# lists are never held. The vocabulary and document frequencies are always kept. Each poem's
+# (term id, count) pairs are kept in compact typed arrays only when keep_postings=True, which is
+# what the TF-IDF matrix (CSR arrays, or scipy.sparse with SciPy) needs. With keep_postings=False
+# memory scales with the vocabulary alone, and distinctive words come from a second streamed pass.
+#
+# Usage: python corpus_stats.py poem1.txt poem2.txt ... [--top 10]
+import argparse
+import math
+import os
+import sys
+from array import array
+from collections import Counter
+
+import numpy as np
+from nltk.tokenize import word_tokenize
+
+from resources import get_stop_words
+
+try:
+    import scipy.sparse as sparse
+except ImportError:
+    sparse = None  # tfidf_matrix() needs SciPy; the CSR arrays work without it
+
+
+def tokenize_for_stats(text, stop_words=None):
+    """Lowercased alphabetic tokens minus stopwords, using the same tokenizer as the analyzers."""
+    if stop_words is None:
+        stop_words = get_stop_words()
+    return [w for w in word_tokenize(text.lower(), preserve_line=True) if w.isalpha() and w not in stop_words]
+
+
+class CorpusStats:
+    """Streaming vocabulary / document-frequency / TF-IDF statistics over a poem collection."""
+
+    def __init__(self, stop_words=None, keep_postings=True):
+        self.keep_postings = keep_postings
+        self.stop_words = get_stop_words() if stop_words is None else stop_words
+        self.vocabulary = {}  # term -> term id
+        self.terms = []  # term id -> term
+        self.document_frequency = array("l")  # term id -> number of poems containing it
+        self.doc_names = []
+        self._indptr = array("q", [0])
+        self._indices = array("l")
+        self._counts = array("l")
+        self._idf = None
+
+    def __len__(self):
+        return len(self.doc_names)
+
+    def add(self, text, name=None):
+        """Adds one poem; returns its document index."""
+        counts = Counter(tokenize_for_stats(text, self.stop_words))
+        vocabulary, document_frequency = self.vocabulary, self.document_frequency
+        for term, count in counts.items():
+            term_id = vocabulary.get(term)
+            if term_id is None:
+                term_id = vocabulary[term] = len(self.terms)
+                self.terms.append(term)
+                document_frequency.append(0)
+            document_frequency[term_id] += 1
+            if self.keep_postings:
+                self._indices.append(term_id)
+                self._counts.append(count)
+        if self.keep_postings:
+            self._indptr.append(len(self._indices))
+        self.doc_names.append(name if name is not None else f"poem {len(self.doc_names) + 1}")
+        self._idf = None
+        return len(self.doc_names) - 1
+
+    def add_many(self, texts, names=None):
+        for i, text in enumerate(texts):
+            self.add(text, names[i] if names is not None else None)
+        return self
+
+    # --- Weights ---
+    def idf(self):
+        """Smoothed inverse document frequency per term id: ln((1 + N) / (1 + df)) + 1."""
+        if self._idf is None or len(self._idf) != len(self.terms):
+            df = np.array(self.document_frequency, dtype=np.int64)
+            self._idf = np.log((1.0 + len(self.doc_names)) / (1.0 + df)) + 1.0
+        return self._idf
+
+    def _require_postings(self):
+        if not self.keep_postings:
+            raise ValueError("Per-poem term counts were not kept; create CorpusStats(keep_postings=True)")
+
+    def tfidf_csr(self):
+        """Returns (data, indices, indptr, shape) of the L2-normalized TF-IDF matrix in CSR layout."""
+        self._require_postings()
+        indptr = np.array(self._indptr, dtype=np.int64)
+        indices = np.array(self._indices, dtype=np.int64)
+        data = np.array(self._counts, dtype=np.float64) * self.idf()[indices]
+        if len(data):
+            row_lengths = np.diff(indptr)
+            row_ids = np.repeat(np.arange(len(row_lengths)), row_lengths)
+            norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=len(row_lengths)))
+            data /= np.where(norms > 0, norms, 1.0)[row_ids]
+        return data, indices, indptr, (len(self.doc_names), len(self.terms))
+
+    def tfidf_matrix(self):
+        """The TF-IDF matrix as scipy.sparse.csr_matrix (requires SciPy)."""
+        if sparse is None:
+            raise ImportError("SciPy is required for tfidf_matrix(); use tfidf_csr() or run: pip install scipy")
+        data, indices, indptr, shape = self.tfidf_csr()
+        return sparse.csr_matrix((data, indices, indptr), shape=shape)
+
+    # --- Reports ---
+    def distinctive_words(self, doc_index, top_n=10):
+        """[(term, weight), ...] with the highest TF-IDF weight in one poem."""
+        self._require_postings()
+        start, end = self._indptr[doc_index], self._indptr[doc_index + 1]
+        if start == end:
+            return []
+        indices = np.array(self._indices[start:end], dtype=np.int64)
+        weights = np.array(self._counts[start:end], dtype=np.float64) * self.idf()[indices]
+        weights /= np.linalg.norm(weights) or 1.0
+        order = np.lexsort((indices, -weights))[:top_n]
+        return [(self.terms[indices[i]], round(float(weights[i]), 4)) for i in order]
+
+    def distinctive_words_for_text(self, text, top_n=10):
+        """Like distinctive_words() for a poem that is not part of the corpus (it is not added)."""
+        counts = Counter(tokenize_for_stats(text, self.stop_words))
+        if not counts:
+            return []
+        unseen_idf = math.log(1.0 + len(self.doc_names)) + 1.0
+        idf = self.idf()
+        weighted = []
+        for term, count in counts.items():
+            term_id = self.vocabulary.get(term)
+            weighted.append((term, count * (idf[term_id] if term_id is not None else unseen_idf)))
+        norm = math.sqrt(sum(w * w for _, w in weighted)) or 1.0
+        weighted.sort(key=lambda item: (-item[1], item[0]))
+        return [(term, round(w / norm, 4)) for term, w in weighted[:top_n]]
+
+    def most_common_terms(self, top_n=20):
+        """[(term, document_frequency), ...] across the corpus."""
+        df = np.array(self.document_frequency, dtype=np.int64)
+        order = np.argsort(-df, kind="stable")[:top_n]
+        return [(self.terms[i], int(df[i])) for i in order]
+
+    def summary(self):
+        return {"documents": len(self.doc_names), "vocabulary": len(self.terms), "nonzeros": len(self._indices)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vocabulary and TF-IDF statistics over a collection of poems.")
+    parser.add_argument("files", nargs="+", help="One poem per file")
+    parser.add_argument("--top", type=int, default=10, help="Distinctive words to show per poem")
+    args = parser.parse_args(argv)
+
+    def read(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    # Pass 1 collects vocabulary and document frequencies; pass 2 re-reads each poem to rank its words
+    stats = CorpusStats(keep_postings=False)
+    for path in args.files:
+        stats.add(read(path), os.path.basename(path))
+    info = stats.summary()
+    print(f"{info['documents']} poems, {info['vocabulary']} distinct words")
+    print("Most widespread words: " + ", ".join(f"{t} ({df})" for t, df in stats.most_common_terms(args.top)))
+    for path, name in zip(args.files, stats.doc_names):
+        words = stats.distinctive_words_for_text(read(path), args.top)
+        print(f"{name}: " + (", ".join(f"{t} ({w:.2f})" for t, w in words) if words else "(no content words)"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+# dedup_index.py - Near-duplicate poem detection with MinHash signatures and an on-disk LSH index
+#
+# Poems are normalized the way the rhyme/line analysis sees them (non-blank lines, stripped, lower-
+# cased, punctuation removed), shingled into overlapping word trigrams and summarized by a MinHash
+# signature. Signatures are split into bands whose hashes go into an SQLite table. A lookup only
+# compares against poems sharing at least one band bucket, instead of scanning the whole collection.
+# Each indexed poem can carry its stored analysis result, so batch runs can reuse it for reposts.
+#
+# Usage:
+#   python dedup_index.py poems.db poem1.txt poem2.txt ...             # analyze, reusing near-duplicates
+#   python dedup_index.py poems.db --query poem.txt --threshold 0.7    # list similar indexed poems
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import string
+import sys
+
+import numpy as np
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16  # 16 bands x 8 rows: candidates above roughly 0.7 Jaccard similarity
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_PUNCTUATION_RE = re.compile(f"[{re.escape(string.punctuation)}]")
+
+
+def normalize_poem(text):
+    """Non-blank lines, stripped, lowercased and without punctuation (as the line splitting sees them)."""
+    lines = [line for line in text.split('\n') if line.strip()]
+    return "\n".join(" ".join(_PUNCTUATION_RE.sub("", line.lower()).split()) for line in lines)
+
+
+def shingles(normalized_text, size=SHINGLE_SIZE):
+    words = normalized_text.split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash32(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHasher:
+    """Computes MinHash signatures with `num_perm` universal hash functions (vectorized over shingles)."""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        # a < 2^29 and x < 2^32 keep a * x + b below 2^63, so uint64 arithmetic cannot overflow
+        self.a = rng.randint(1, 1 << 29, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 29, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter((_hash32(s) for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+        permuted = (hashes[:, None] * self.a[None, :] + self.b[None, :]) % np.uint64(_MERSENNE_PRIME)
+        return (permuted & np.uint64(_MAX_HASH)).min(axis=0).astype(np.uint32)
+
+
+def estimated_similarity(signature_a, signature_b):
+    return float(np.count_nonzero(signature_a == signature_b)) / len(signature_a)
+
+
+class DedupIndex:
+    """SQLite-backed MinHash/LSH index of poems and (optionally) their stored analysis results."""
+
+    def __init__(self, path=":memory:", num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS poems (id INTEGER PRIMARY KEY, digest TEXT UNIQUE, name TEXT,
+                                              signature BLOB, result TEXT);
+            CREATE TABLE IF NOT EXISTS buckets (band INTEGER, bucket INTEGER, poem_id INTEGER);
+            CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (band, bucket);
+        """)
+        stored = dict(self.connection.execute("SELECT key, value FROM meta"))
+        if stored:  # An existing index keeps the parameters it was built with
+            num_perm, bands = int(stored["num_perm"]), int(stored["bands"])
+        else:
+            self.connection.executemany("INSERT INTO meta VALUES (?, ?)",
+                                        [("num_perm", str(num_perm)), ("bands", str(bands))])
+            self.connection.commit()
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM poems").fetchone()[0]
+
+    def _bucket_keys(self, signature):
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            keys.append((band, int.from_bytes(hashlib.blake2b(chunk, digest_size=7).digest(), "little")))
+        return keys
+
+    def _prepare(self, text):
+        normalized = normalize_poem(text)
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        return digest, self.hasher.signature(shingles(normalized))
+
+    def add(self, text, name=None, result=None):
+        """Indexes a poem (exact normalized duplicates share one entry); returns its id."""
+        digest, signature = self._prepare(text)
+        row = self.connection.execute("SELECT id FROM poems WHERE digest = ?", (digest,)).fetchone()
+        if row:
+            if result is not None:
+                self.store_result(row[0], result)
+            return row[0]
+        cursor = self.connection.execute(
+            "INSERT INTO poems (digest, name, signature, result) VALUES (?, ?, ?, ?)",
+            (digest, name, signature.tobytes(), json.dumps(result) if result is not None else None))
+        poem_id = cursor.lastrowid
+        self.connection.executemany("INSERT INTO buckets VALUES (?, ?, ?)",
+                                    [(band, bucket, poem_id) for band, bucket in self._bucket_keys(signature)])
+        self.connection.commit()
+        return poem_id
+
+    def store_result(self, poem_id, result):
+        self.connection.execute("UPDATE poems SET result = ? WHERE id = ?", (json.dumps(result), poem_id))
+        self.connection.commit()
+
+    def query(self, text, threshold=DEFAULT_THRESHOLD):
+        """[(poem_id, name, similarity), ...] of indexed poems at or above threshold, most similar first."""
+        digest, signature = self._prepare(text)
+        exact = self.connection.execute("SELECT id, name FROM poems WHERE digest = ?", (digest,)).fetchone()
+        if exact:
+            return [(exact[0], exact[1], 1.0)]
+        candidate_ids = set()
+        for band, bucket in self._bucket_keys(signature):
+            candidate_ids.update(row[0] for row in self.connection.execute(
+                "SELECT poem_id FROM buckets WHERE band = ? AND bucket = ?", (band, bucket)))
+        matches = []
+        for poem_id in candidate_ids:
+            name, blob = self.connection.execute("SELECT name, signature FROM poems WHERE id = ?",
+                                                 (poem_id,)).fetchone()
+            similarity = estimated_similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if similarity >= threshold:
+                matches.append((poem_id, name, similarity))
+        return sorted(matches, key=lambda match: (-match[2], match[0]))
+
+    def find_reusable_result(self, text, threshold=DEFAULT_THRESHOLD):
+        """(result, poem_id, similarity) of the most similar indexed poem with a stored result, or None."""
+        for poem_id, _, similarity in self.query(text, threshold):
+            row = self.connection.execute("SELECT result FROM poems WHERE id = ?", (poem_id,)).fetchone()
+            if row and row[0] is not None:
+                return json.loads(row[0]), poem_id, similarity
+        return None
+
+    def analyze_with_reuse(self, text, analyzer, name=None, threshold=DEFAULT_THRESHOLD):
+        """Returns (result, reused_from_id): a stored result for a near-duplicate, else analyzer(text) (indexed)."""
+        reusable = self.find_reusable_result(text, threshold)
+        if reusable is not None:
+            return reusable[0], reusable[1]
+        result = analyzer(text)
+        self.add(text, name, result)
+        return result, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Near-duplicate poem index with analysis result reuse.")
+    parser.add_argument("database", help="SQLite file holding the index")
+    parser.add_argument("files", nargs="*", help="Poems to analyze (one per file)")
+    parser.add_argument("--query", help="List indexed poems similar to this file instead of analyzing")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    index = DedupIndex(args.database)
+    try:
+        if args.query:
+            with open(args.query, encoding="utf-8") as f:
+                for poem_id, name, similarity in index.query(f.read(), args.threshold):
+                    print(f"{similarity:.2f}  #{poem_id}  {name}")
+            return 0
+        from main import analyze_poem  # Imported only when something actually has to be analyzed
+        reused = 0
+        for path in args.files:
+            with open(path, encoding="utf-8") as f:
+                _, source_id = index.analyze_with_reuse(f.read(), analyze_poem, os.path.basename(path),
+                                                        args.threshold)
+            reused += source_id is not None
+            print(f"{path}: " + (f"reused result of #{source_id}" if source_id is not None else "analyzed"))
+        print(f"{len(args.files)} poems, {reused} reused, {len(index)} indexed")
+        return 0
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# feature_export.py - Typed columnar export of analysis features for data pipelines
+#
+# Rows are built straight from the analyze_poem() result dicts, so nothing is re-parsed out of the
+# formatted text the GUIs show. Two tables are written:
+#   poems  one row per poem: line and syllable counts, form, rhyme scheme, sentiment label, tone and
+#          VADER scores, meter, token counts per part-of-speech category and counts per figure kind
+#   lines  one row per non-blank line: its text, syllable count and rhyme label
+# With pyarrow installed each table is a Parquet file, written one row group per batch. Without it
+# each table is a CSV file plus a .npy matrix of its numeric columns (float64, NaN when missing),
+# and schema.json records every column's type so downstream readers do not have to guess.
+#
+# Usage:
+#   python feature_export.py collected_works.txt -o features/
+#   python feature_export.py collected_works.txt -o features/ --format csv --batch-size 500
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from figures import FIGURE_KINDS
+
+DEFAULT_BATCH_SIZE = 1000  # Poems per written batch (Parquet row group)
+SCHEMA_FILE = "schema.json"
+NUMERIC_TYPES = ("int32", "float64")
+
+LINE_COLUMNS = [("poem_id", "string"), ("line_number", "int32"), ("text", "string"), ("syllables", "int32"),
+                ("rhyme_label", "string")]
+
+
+def column_slug(name):
+    """'Verb (Past Tense)' -> 'verb_past_tense'."""
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def pos_categories():
+    """The part-of-speech categories in a stable order (POS_CATEGORY_MAP order, then 'Other')."""
+    from main import POS_CATEGORY_MAP
+    return list(dict.fromkeys(POS_CATEGORY_MAP.values())) + ["Other"]
+
+
+def poem_columns(categories=None):
+    """[(name, type), ...] of the poems table."""
+    categories = pos_categories() if categories is None else categories
+    return ([("poem_id", "string"), ("lines", "int32"), ("syllables_total", "int32"), ("syllables_mean", "float64"),
+             ("form", "string"), ("rhyme_scheme", "string"), ("sentiment", "string"), ("tone", "string"),
+             ("vader_neg", "float64"), ("vader_neu", "float64"), ("vader_pos", "float64"),
+             ("vader_compound", "float64"), ("meter", "string"), ("meter_confidence", "float64")]
+            + [("pos_" + column_slug(category), "int32") for category in categories]
+            + [("fig_" + kind, "int32") for kind in FIGURE_KINDS])
+
+
+def poem_row(poem_id, result, categories):
+    """The poems-table values (in poem_columns() order) for one analyze_poem() result."""
+    syllables = result.get("syllables_per_line", [])
+    sentiment = result.get("sentiment", {})
+    scores = sentiment.get("scores", {})
+    meter = result.get("meter") or {}
+    known = set(categories)
+    pos_counts = dict.fromkeys(categories, 0)
+    for category, count in result.get("pos_counts", {}).items():
+        pos_counts[category if category in known else "Other"] += count
+    figure_counts = dict.fromkeys(FIGURE_KINDS, 0)
+    for figure in result.get("figures_of_speech", []):
+        if figure["kind"] in figure_counts:
+            figure_counts[figure["kind"]] += 1
+    return ([poem_id, result.get("lines", len(syllables)), sum(syllables),
+             sum(syllables) / len(syllables) if syllables else None, result.get("form"), result.get("rhyme_scheme"),
+             sentiment.get("overall"), sentiment.get("tone"), scores.get("neg"), scores.get("neu"), scores.get("pos"),
+             scores.get("compound"), meter.get("meter"), meter.get("confidence")]
+            + [pos_counts[category] for category in categories]
+            + [figure_counts[kind] for kind in FIGURE_KINDS])
+
+
+def line_rows(poem_id, text, result):
+    """Lines-table values per non-blank line (the lines analyze_poem() counted)."""
+    lines = [line for line in text.split('\n') if line.strip()]
+    syllables = result.get("syllables_per_line", [])
+    labels = result.get("rhyme_labels", [])
+    for number, line in enumerate(lines, 1):
+        yield [poem_id, number, line.strip(),
+               syllables[number - 1] if number <= len(syllables) else None,
+               labels[number - 1] if number <= len(labels) else None]
+
+
+# --- Table Writers ---
+class _ParquetTable:
+    _TYPES = {"string": "string", "int32": "int32", "float64": "float64"}
+
+    def __init__(self, path, columns):
+        self.columns = columns
+        self.schema = pa.schema([(name, getattr(pa, self._TYPES[kind])()) for name, kind in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        arrays = [pa.array([row[i] for row in rows], type=field.type) for i, field in enumerate(self.schema)]
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class _CsvTable:
+    """CSV rows plus the numeric columns as a float64 .npy matrix.
+
+    Numeric rows are appended to a raw scratch file while batches arrive and given their .npy
+    header on close, when the row count is known, so no batch is kept in memory.
+    """
+
+    def __init__(self, path, columns):
+        self.columns = columns
+        self.numeric = [i for i, (_, kind) in enumerate(columns) if kind in NUMERIC_TYPES]
+        self.npy_path = os.path.splitext(path)[0] + ".npy"
+        self.rows = 0
+        self.csv_file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.csv_file)
+        self.writer.writerow([name for name, _ in columns])
+        self.raw_file = open(self.npy_path + ".part", "wb")
+
+    def write(self, rows):
+        self.writer.writerows(["" if value is None else value for value in row] for row in rows)
+        numeric = np.array([[np.nan if row[i] is None else row[i] for i in self.numeric] for row in rows],
+                           dtype=np.float64).reshape(len(rows), len(self.numeric))
+        self.raw_file.write(numeric.tobytes())
+        self.rows += len(rows)
+
+    def close(self):
+        self.csv_file.close()
+        self.raw_file.close()
+        header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float64)), "fortran_order": False,
+                  "shape": (self.rows, len(self.numeric))}
+        with open(self.npy_path, "wb") as out, open(self.npy_path + ".part", "rb") as raw:
+            np.lib.format.write_array_header_1_0(out, header)
+            while True:
+                chunk = raw.read(1 << 20)
+                if not chunk:
+                    break
+                out.write(chunk)
+        os.remove(self.npy_path + ".part")
+
+
+class FeatureExporter:
+    """Collects analyze_poem() results and writes them to `directory` in batches of batch_size poems."""
+
+    def __init__(self, directory, file_format="auto", batch_size=DEFAULT_BATCH_SIZE):
+        if file_format == "auto":
+            file_format = "parquet" if pa is not None else "csv"
+        if file_format == "parquet" and pa is None:
+            raise ImportError("Parquet export needs the 'pyarrow' library. Please run: pip install pyarrow")
+        self.directory, self.file_format, self.batch_size = directory, file_format, batch_size
+        self.categories = pos_categories()
+        self.poems_written = self.skipped = 0
+        self._poem_rows, self._line_rows = [], []
+        os.makedirs(directory, exist_ok=True)
+        table_class, extension = (_ParquetTable, ".parquet") if file_format == "parquet" else (_CsvTable, ".csv")
+        self.tables = {"poems": table_class(os.path.join(directory, "poems" + extension),
+                                            poem_columns(self.categories)),
+                       "lines": table_class(os.path.join(directory, "lines" + extension), LINE_COLUMNS)}
+        self._write_schema()
+
+    def _write_schema(self):
+        schema = {"format": self.file_format, "tables": {}}
+        for name, table in self.tables.items():
+            info = {"columns": [{"name": column, "type": kind} for column, kind in table.columns]}
+            if self.file_format == "csv":
+                info["npy_columns"] = [table.columns[i][0] for i in table.numeric]
+            schema["tables"][name] = info
+        with open(os.path.join(self.directory, SCHEMA_FILE), "w", encoding="utf-8") as f:
+            json.dump(schema, f, indent=2)
+
+    def add(self, poem_id, text, result):
+        """Queues one poem; results holding an "error" (see streaming.analyze_stream) are skipped."""
+        if "error" in result:
+            self.skipped += 1
+            return
+        poem_id = str(poem_id)
+        self._poem_rows.append(poem_row(poem_id, result, self.categories))
+        self._line_rows.extend(line_rows(poem_id, text, result))
+        if len(self._poem_rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._poem_rows:
+            self.tables["poems"].write(self._poem_rows)
+            self.poems_written += len(self._poem_rows)
+        if self._line_rows:
+            self.tables["lines"].write(self._line_rows)
+        self._poem_rows, self._line_rows = [], []
+
+    def close(self):
+        self.flush()
+        for table in self.tables.values():
+            table.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_stream(source, directory, file_format="auto", batch_size=DEFAULT_BATCH_SIZE, **unit_options):
+    """Analyzes every poem (or stanza) of a collection and exports the features; returns the exporter."""
+    from streaming import analyze_stream
+    with FeatureExporter(directory, file_format, batch_size) as exporter:
+        for unit, result in analyze_stream(source, **unit_options):
+            poem_id = unit.poem_index if unit.stanza_index is None else f"{unit.poem_index}.{unit.stanza_index}"
+            exporter.add(poem_id, unit.text, result)
+    return exporter
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export per-poem and per-line analysis features as columnar data.")
+    parser.add_argument("source", help="Text file (optionally .gz) holding one or many poems")
+    parser.add_argument("-o", "--output", required=True, help="Output directory")
+    parser.add_argument("--format", choices=["auto", "parquet", "csv"], default="auto")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--stanzas", action="store_true", help="Export each stanza as its own row")
+    args = parser.parse_args(argv)
+    exporter = export_stream(args.source, args.output, args.format, args.batch_size, stanzas=args.stanzas)
+    print(f"Exported {exporter.poems_written} poems as {exporter.file_format} to {args.output}"
+          + (f" ({exporter.skipped} skipped after errors)" if exporter.skipped else ""), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# features.py - Dense NumPy feature matrices for training form and tone classifiers
+#
+# extract_features() turns a batch of poems into one float64 matrix with a fixed column layout
+# (feature_columns(), looked up by name through column_index()):
+#   pos_*        share of the poem's tokens in each POS_CATEGORY_MAP category (same names as the
+#                poems table of feature_export.py)
+#   lines, syl_* line count and syllables per line: total, mean, std, min, max
+#   rhyme_density share of lines whose end rhyme recurs on another line
+#   vader_*      VADER neg / neu / pos / compound
+#   fig_*        number of figures of speech of each kind
+# The whole batch is tagged with one tagger call (tagging.tag_poems), which also fills the memo
+# the other analyzers read from. Per-token and per-line values are gathered into flat arrays and
+# reduced into the matrix with numpy (add.at / bincount) rather than poem by poem.
+#
+# Usage:
+#   python features.py collected_works.txt -o features.npy     # also writes features.columns.json
+import argparse
+import functools
+import json
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from feature_export import column_slug, pos_categories
+from figures import FIGURE_KINDS, detect_figures, figure_counts
+from tagging import flatten, tag_poems
+from tracing import span, traced
+
+DEFAULT_BATCH_SIZE = 256
+SYLLABLE_COLUMNS = ("syl_total", "syl_mean", "syl_std", "syl_min", "syl_max")
+VADER_COLUMNS = ("vader_neg", "vader_neu", "vader_pos", "vader_compound")
+
+FeatureBatch = namedtuple("FeatureBatch", ["matrix", "columns"])
+FeatureBatch.__doc__ = """matrix is (poems, len(columns)) float64; columns is feature_columns()."""
+
+
+@functools.lru_cache(maxsize=1)
+def feature_columns():
+    """The column names, in matrix order; the order only changes when POS_CATEGORY_MAP or FIGURE_KINDS do."""
+    return tuple(["pos_" + column_slug(category) for category in pos_categories()]
+                 + ["lines", *SYLLABLE_COLUMNS, "rhyme_density", *VADER_COLUMNS]
+                 + ["fig_" + kind for kind in FIGURE_KINDS])
+
+
+@functools.lru_cache(maxsize=1)
+def column_index():
+    """{column name: matrix column}."""
+    return {name: i for i, name in enumerate(feature_columns())}
+
+
+def _fill_pos(matrix, columns, tagged_poems, pos_map):
+    categories = pos_categories()
+    category_ids = {category: i for i, category in enumerate(categories)}
+    other = category_ids["Other"]
+    rows, cols = [], []
+    for row, (_, tagged_sentences) in enumerate(tagged_poems):
+        for word, tag in flatten(tagged_sentences):
+            if word.isalnum():
+                rows.append(row)
+                cols.append(category_ids.get(pos_map.get(tag, tag), other))
+    counts = np.zeros((len(tagged_poems), len(categories)))
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1)
+    totals = counts.sum(axis=1, keepdims=True)
+    first = columns["pos_" + column_slug(categories[0])]
+    matrix[:, first:first + len(categories)] = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+
+
+def _fill_lines(matrix, columns, line_poems, line_syllables, line_labels, poem_count):
+    line_poems = np.array(line_poems, dtype=np.intp)
+    syllables = np.array(line_syllables, dtype=np.float64)
+    lines = np.bincount(line_poems, minlength=poem_count).astype(np.float64)
+    total = np.bincount(line_poems, weights=syllables, minlength=poem_count)
+    squares = np.bincount(line_poems, weights=syllables ** 2, minlength=poem_count)
+    safe_lines = np.maximum(lines, 1)
+    mean = total / safe_lines
+    lowest, highest = np.full(poem_count, np.inf), np.full(poem_count, -np.inf)
+    np.minimum.at(lowest, line_poems, syllables)
+    np.maximum.at(highest, line_poems, syllables)
+    has_lines = lines > 0
+    matrix[:, columns["lines"]] = lines
+    matrix[:, columns["syl_total"]] = total
+    matrix[:, columns["syl_mean"]] = mean
+    matrix[:, columns["syl_std"]] = np.sqrt(np.maximum(squares / safe_lines - mean ** 2, 0))
+    matrix[:, columns["syl_min"]] = np.where(has_lines, lowest, 0)
+    matrix[:, columns["syl_max"]] = np.where(has_lines, highest, 0)
+    # A line rhymes when another line of the same poem carries its label ('X<n>' and '-' never match)
+    rhymable = np.array([not (label == "-" or label.startswith("X")) for label in line_labels], dtype=bool)
+    label_ids = {label: i for i, label in enumerate(dict.fromkeys(line_labels))}
+    keys = line_poems * max(len(label_ids), 1) + np.array([label_ids[label] for label in line_labels], dtype=np.intp)
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    rhymed = rhymable & (counts[inverse] > 1)
+    matrix[:, columns["rhyme_density"]] = np.bincount(line_poems, weights=rhymed, minlength=poem_count) / safe_lines
+
+
+@traced()
+def extract_features(texts):
+    """FeatureBatch for a list of poems (row i describes texts[i])."""
+    import main as analysis
+    texts = list(texts)
+    columns = column_index()
+    matrix = np.zeros((len(texts), len(columns)))
+    if not texts:
+        return FeatureBatch(matrix, feature_columns())
+    with span("tag_batch", poems=len(texts)):
+        tagged_poems = tag_poems(texts)
+        tag_poems(texts, lower=True)  # Warms the memo detect_figures() reads
+    _fill_pos(matrix, columns, tagged_poems, analysis.POS_CATEGORY_MAP)
+
+    line_poems, line_syllables, line_labels = [], [], []
+    for row, text in enumerate(texts):
+        lines = [line for line in text.split('\n') if line.strip()]
+        if not lines:
+            continue
+        labels, _ = analysis.rhyme_labels_for_lines(lines)
+        line_poems.extend([row] * len(lines))
+        line_syllables.extend(analysis.count_syllables_in_line(line) for line in lines)
+        line_labels.extend(labels)
+    _fill_lines(matrix, columns, line_poems, line_syllables, line_labels, len(texts))
+
+    vader_first = columns[VADER_COLUMNS[0]]
+    figures_first = columns["fig_" + FIGURE_KINDS[0]]
+    for row, text in enumerate(texts):
+        scores = analysis.sentiment_scores(text)
+        matrix[row, vader_first:vader_first + len(VADER_COLUMNS)] = [scores[name[6:]] for name in VADER_COLUMNS]
+        counts = figure_counts(detect_figures(text))
+        matrix[row, figures_first:figures_first + len(FIGURE_KINDS)] = [counts[kind] for kind in FIGURE_KINDS]
+    return FeatureBatch(matrix, feature_columns())
+
+
+def iter_feature_batches(texts, batch_size=DEFAULT_BATCH_SIZE):
+    """Yields a FeatureBatch per batch_size poems of an iterable (which is consumed lazily)."""
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) >= batch_size:
+            yield extract_features(batch)
+            batch = []
+    if batch:
+        yield extract_features(batch)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract a NumPy feature matrix (one row per poem) from a collection.")
+    parser.add_argument("source", help="Text file (optionally .gz) holding one or many poems")
+    parser.add_argument("-o", "--output", required=True, help="Output .npy file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--stanzas", action="store_true", help="One row per stanza instead of per poem")
+    args = parser.parse_args(argv)
+
+    from streaming import iter_units
+    texts = (unit.text for unit in iter_units(args.source, stanzas=args.stanzas))
+    matrices = [batch.matrix for batch in iter_feature_batches(texts, args.batch_size)]
+    matrix = np.vstack(matrices) if matrices else np.zeros((0, len(feature_columns())))
+    np.save(args.output, matrix)
+    with open(os.path.splitext(args.output)[0] + ".columns.json", "w", encoding="utf-8") as f:
+        json.dump(list(feature_columns()), f, indent=2)
+    print(f"Wrote {matrix.shape[0]} x {matrix.shape[1]} feature matrix to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
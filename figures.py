@@ -0,0 +1,178 @@
+# figures.py - Single-pass figure-of-speech detection shared by main.py, Finish and the batch tools
+#
+# Every rule is a small streaming matcher fed one tagged token at a time. The engine walks the
+# tagged token stream of a poem exactly once, runs all matchers side by side and returns
+# structured FigureSpan records instead of pre-formatted strings, so the GUI tabs, the PDF export
+# and the batch outputs can all render (or count) the same result.
+import functools
+from collections import Counter, namedtuple
+
+from tagging import tag_text
+from tracing import traced
+
+FigureSpan = namedtuple("FigureSpan", ["kind", "variant", "sentence_index", "start", "end", "words", "sentence"])
+FigureSpan.__doc__ = """One detected figure: token offsets [start, end) within sentence `sentence_index`."""
+
+FIGURE_KINDS = ("personification", "simile", "metaphor", "alliteration")
+
+# --- Precompiled Keyword Sets ---
+INANIMATE_NOUNS = frozenset(["wind", "moon", "stars", "trees", "sun", "time", "river", "ocean", "mountain", "earth"])
+HUMAN_VERBS = frozenset(["whispered", "sang", "danced", "cried", "laughed", "spoke", "wept", "sighed", "called"])
+LINKING_VERBS = frozenset(["is", "are"])
+METAPHOR_EXCLUDED_NOUNS = frozenset(["man", "woman", "person", "thing", "animal", "human", "boy", "girl"])
+FUNCTION_WORDS = frozenset(["the", "to", "that", "this", "these", "those", "then", "than", "there", "their", "they",
+                            "them", "with", "was", "were", "will", "would", "which", "who", "when", "what", "where",
+                            "by", "but", "be", "been", "for", "from", "had", "has", "have", "his", "her", "him",
+                            "my", "me", "not", "no", "so", "such", "did", "do", "does"])
+VOWELS = frozenset("aeiou")
+PERSONIFICATION_WINDOW = 3  # A human verb must follow the inanimate noun within this many tokens
+
+
+class _PersonificationMatcher:
+    """Inanimate noun followed within a few tokens by a verb normally used for people."""
+
+    def reset(self):
+        self.subjects = []  # Positions of inanimate nouns still waiting for a verb
+
+    def feed(self, i, word, tag, tokens, emit):
+        if tag.startswith("VB") and word in HUMAN_VERBS and self.subjects:
+            for subject in self.subjects:
+                if i - subject <= PERSONIFICATION_WINDOW:
+                    emit("personification", "", subject, i + 1, (tokens[subject][0], word))
+            self.subjects = []
+        if word in INANIMATE_NOUNS and tag.startswith("NN"):
+            self.subjects.append(i)
+        if self.subjects and i - self.subjects[0] >= PERSONIFICATION_WINDOW:
+            self.subjects = [s for s in self.subjects if i - s < PERSONIFICATION_WINDOW]
+
+    def end(self, tokens, emit):
+        pass
+
+
+class _SimileMatcher:
+    """'like' comparisons, 'as X as' comparisons and 'X as a ...' after an adjective or adverb."""
+
+    def reset(self):
+        self.seen_like = False
+
+    def feed(self, i, word, tag, tokens, emit):
+        if word == "like" and not self.seen_like:
+            self.seen_like = True
+            emit("simile", "like", i, i + 1, ("like",))
+        elif word == "as":
+            if i >= 2 and tokens[i - 2][0] == "as" and tokens[i - 1][0].isalpha():
+                emit("simile", "as...as", i - 2, i + 1, ("as", tokens[i - 1][0], "as"))
+            elif i >= 1 and tokens[i - 1][1][:2] in ("JJ", "RB") and tokens[i - 1][0] != "as" and \
+                    (i < 2 or tokens[i - 2][0] != "as"):
+                emit("simile", "as", i - 1, i + 1, (tokens[i - 1][0], "as"))
+
+    def end(self, tokens, emit):
+        pass
+
+
+class _MetaphorMatcher:
+    """Basic 'X is Y' metaphors between two different nouns (at most one per sentence)."""
+
+    def reset(self):
+        self.found = False
+
+    def feed(self, i, word, tag, tokens, emit):
+        if self.found or i < 2 or not tag.startswith("NN"):
+            return
+        subject, linking = tokens[i - 2], tokens[i - 1]
+        if subject[1].startswith("NN") and linking[0] in LINKING_VERBS and subject[0] != word and \
+                word not in METAPHOR_EXCLUDED_NOUNS:
+            self.found = True
+            emit("metaphor", "is-a", i - 2, i + 1, (subject[0], linking[0], word))
+
+    def end(self, tokens, emit):
+        pass
+
+
+class _AlliterationMatcher:
+    """Repeated initial consonants: an adjacent run is preferred, else three words anywhere in the sentence."""
+
+    def reset(self):
+        self.run = []  # (position, word) of the current adjacent run of same-initial words
+        self.best_run = None
+        self.by_initial = {}  # initial consonant -> [(position, word), ...]
+        self.word_count = 0
+
+    def _close_run(self):
+        content_words = sum(1 for _, w in self.run if w not in FUNCTION_WORDS)
+        if len(self.run) >= 3 or (len(self.run) == 2 and content_words == 2):
+            if self.best_run is None:
+                self.best_run = list(self.run)
+
+    def feed(self, i, word, tag, tokens, emit):
+        if not word.isalpha() or len(word) < 2:
+            return
+        self.word_count += 1
+        initial = word[0]
+        if self.run and self.run[-1][1][0] == initial and initial not in VOWELS:
+            self.run.append((i, word))
+        else:
+            self._close_run()
+            self.run = [(i, word)]
+        if initial not in VOWELS:
+            self.by_initial.setdefault(initial, []).append((i, word))
+
+    def end(self, tokens, emit):
+        self._close_run()
+        if self.word_count < 3:
+            return
+        if self.best_run:
+            emit("alliteration", "adjacent", self.best_run[0][0], self.best_run[-1][0] + 1,
+                 tuple(w for _, w in self.best_run))
+            return
+        for occurrences in self.by_initial.values():
+            if len(occurrences) >= 3:
+                emit("alliteration", "repeated", occurrences[0][0], occurrences[-1][0] + 1,
+                     tuple(dict.fromkeys(w for _, w in occurrences)))
+                return
+
+
+def _new_matchers():
+    return [_PersonificationMatcher(), _SimileMatcher(), _MetaphorMatcher(), _AlliterationMatcher()]
+
+
+def detect_in_tagged(sentences, tagged_sentences):
+    """Runs every rule over already-tagged (lowercased) sentences in one pass; returns a tuple of FigureSpan."""
+    figures = []
+    matchers = _new_matchers()
+    for sentence_index, (sentence, tokens) in enumerate(zip(sentences, tagged_sentences)):
+        sentence = sentence.strip()
+
+        def emit(kind, variant, start, end, words):
+            figures.append(FigureSpan(kind, variant, sentence_index, start, end, words, sentence))
+
+        for matcher in matchers:
+            matcher.reset()
+        for i, (word, tag) in enumerate(tokens):
+            for matcher in matchers:
+                matcher.feed(i, word, tag, tokens, emit)
+        for matcher in matchers:
+            matcher.end(tokens, emit)
+    return tuple(figures)
+
+
+@functools.lru_cache(maxsize=64)
+def _detect_cached(text):
+    sentences, tagged_sentences = tag_text(text, lower=True)
+    return detect_in_tagged(sentences, tagged_sentences)
+
+
+@traced()
+def detect_figures(text):
+    """Returns the FigureSpan tuple for a poem; repeated calls for the same text reuse the result."""
+    return _detect_cached(text)
+
+
+def figure_counts(figures):
+    """{kind: count} for every kind in FIGURE_KINDS (zero when absent)."""
+    counts = Counter(figure.kind for figure in figures)
+    return {kind: counts.get(kind, 0) for kind in FIGURE_KINDS}
+
+
+def figures_of_kind(figures, kind):
+    return [figure for figure in figures if figure.kind == kind]
@@ -0,0 +1,410 @@
+# gui_harness.py - GUI responsiveness harness: replays scripted sessions and measures event-loop latency
+#
+# Usage:
+#   python gui_harness.py                     # both apps under a private Xvfb, compared against gui_baselines.json
+#   python gui_harness.py --save-baseline     # run and store the results as the new baseline
+#   python gui_harness.py --app finish --only resize typing
+#   python gui_harness.py --use-display       # run on the current $DISPLAY instead of starting Xvfb
+#
+# As in benchmark.py, a run without a baseline file fails unless --save-baseline or
+# --allow-missing-baseline is given.
+#
+# Each scenario (drag-resize, typing burst, font size changes, analysing a new poem and switching
+# through its result tabs, spell check of a long poem) is a list of steps: an action on the app
+# followed either by a fixed pause, as a dragging or typing user would leave, or by a wait until
+# the event loop has been idle for QUIET_MS. While waiting, the harness runs the Tcl event loop
+# itself, one event at a time (tk.dooneevent), and times every event it handles. Two
+# distributions are reported per scenario:
+#   response  time from a step's action until the loop goes quiet again: what the user waits for,
+#             including the apps' own debounce delays
+#   blocking  time spent inside a single event handler (or a directly called action): while one
+#             runs, the window is frozen
+# Like benchmark.py, the network and platform modules are stubbed and the poems come from
+# benchmark.build_corpora(), so runs on different commits replay identical input.
+import argparse
+import itertools
+import os
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import benchmark
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(BASE_DIR, "gui_baselines.json")
+DEFAULT_THRESHOLD = 0.25  # Fail when a percentile is more than 25% slower than its baseline
+QUIET_MS = 250  # Idle time that ends a step; longer than the apps' debounce delays (50-120 ms)
+STEP_TIMEOUT_S = 60.0
+XVFB_SCREEN = "1600x1200x24"
+PERCENTILES = (50, 90, 99)
+GATED = (("response", 90), ("blocking", 99))  # The percentiles compared against the baseline
+
+Step = namedtuple("Step", ["action", "pause_ms"])
+Step.__doc__ = """action() is called, then the loop runs for pause_ms (None: until it is quiet)."""
+
+KEYSYMS = {" ": "space", "\n": "Return", ",": "comma", ".": "period", "'": "apostrophe", ";": "semicolon",
+           ":": "colon", "!": "exclam", "?": "question", "-": "minus"}
+
+
+# --- Virtual Display ---
+def start_xvfb(screen=XVFB_SCREEN):
+    """Starts Xvfb on a free display number, points $DISPLAY at it and returns the process."""
+    if shutil.which("Xvfb") is None:
+        raise RuntimeError("Xvfb was not found. Please install it (e.g. apt install xvfb) or pass --use-display.")
+    number = next(n for n in range(99, 200) if not os.path.exists(f"/tmp/.X{n}-lock"))
+    process = subprocess.Popen(["Xvfb", f":{number}", "-screen", "0", screen, "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while not os.path.exists(f"/tmp/.X11-unix/X{number}"):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError(f"Xvfb did not start on display :{number}")
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = f":{number}"
+    return process
+
+
+# --- Event Loop Recording ---
+class LoopRecorder:
+    """Runs a Tk interpreter's event loop by hand and times every event it handles."""
+
+    def __init__(self, root):
+        import _tkinter
+        self.root = root
+        self.flags = _tkinter.ALL_EVENTS | _tkinter.DONT_WAIT
+        self.blocking = []
+        self.responses = []
+        self.timeouts = 0
+
+    def _handle_one(self):
+        start = time.perf_counter()
+        if not self.root.tk.dooneevent(self.flags):
+            return None
+        end = time.perf_counter()
+        self.blocking.append(end - start)
+        return end
+
+    def pump(self, seconds):
+        """Handles events for a fixed time."""
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            if self._handle_one() is None:
+                time.sleep(0.0005)
+
+    def settle(self, quiet_s=QUIET_MS / 1000.0, timeout_s=STEP_TIMEOUT_S):
+        """Handles events until none arrived for quiet_s; returns when the last one finished."""
+        last_busy = started = time.perf_counter()
+        while True:
+            finished = self._handle_one()
+            now = time.perf_counter()
+            if finished is not None:
+                last_busy = finished
+            elif now - last_busy >= quiet_s:
+                return last_busy
+            elif now - started > timeout_s:
+                self.timeouts += 1
+                return last_busy
+            else:
+                time.sleep(0.0005)
+
+    def run_step(self, step):
+        start = time.perf_counter()
+        step.action()
+        self.blocking.append(time.perf_counter() - start)  # A direct call stands in for the event handler
+        if step.pause_ms is None:
+            self.responses.append(self.settle() - start)
+        else:
+            self.pump(step.pause_ms / 1000.0)
+
+
+def wait_for_background_threads(recorder, existing, timeout_s=STEP_TIMEOUT_S):
+    """Keeps the loop running until the threads the app started (prefetch, index loading) are done."""
+    recorder.settle()  # The apps start their prefetch after the first paint
+    deadline = time.perf_counter() + timeout_s
+    for thread in threading.enumerate():
+        while thread not in existing and thread.is_alive() and time.perf_counter() < deadline:
+            recorder.pump(0.05)
+    recorder.settle()
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers (0.0 when it is empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, -(-len(ordered) * p // 100) - 1))]
+
+
+def summarize(recorder):
+    result = {"samples": len(recorder.responses), "events": len(recorder.blocking), "timeouts": recorder.timeouts}
+    for kind, values in (("response", recorder.responses), ("blocking", recorder.blocking)):
+        for p in PERCENTILES:
+            result[f"{kind}_p{p}_ms"] = percentile(values, p) * 1000.0
+        result[f"{kind}_max_ms"] = max(values, default=0.0) * 1000.0
+    return result
+
+
+# --- Scripted Input ---
+def misspelled(text, seed, every=7):
+    """text with the middle letters of about one word in `every` swapped (the same words for a seed)."""
+    rng = random.Random(seed)
+    lines = []
+    for line in text.split("\n"):
+        words = line.split(" ")
+        for i, word in enumerate(words):
+            if len(word) > 3 and rng.randrange(every) == 0:
+                middle = len(word) // 2
+                words[i] = word[:middle - 1] + word[middle] + word[middle - 1] + word[middle + 1:]
+        lines.append(" ".join(words))
+    return "\n".join(lines)
+
+
+def drag_resize_steps(root, start=(800, 600), end=(1250, 900), moves=30, pause_ms=16):
+    """Out to `end` and back in `moves` steps each way, like a window edge dragged at 60 Hz."""
+    sizes = [(start[0] + (end[0] - start[0]) * i // moves, start[1] + (end[1] - start[1]) * i // moves)
+             for i in range(1, moves + 1)]
+    sizes += sizes[-2::-1] + [start]
+    steps = [Step(lambda w=w, h=h: root.geometry(f"{w}x{h}"), pause_ms) for w, h in sizes[:-1]]
+    return steps + [Step(lambda: root.geometry(f"{start[0]}x{start[1]}"), None)]
+
+
+def typing_steps(get_widget, text, pause_ms=35):
+    """Key presses and releases for each character of text (about 1700 a minute) into get_widget().
+
+    The widget is looked up per key because Finish recreates its editor on every redraw.
+    """
+
+    def press(keysym):
+        widget = get_widget()
+        widget.event_generate("<KeyPress>", keysym=keysym, when="tail")
+        widget.event_generate("<KeyRelease>", keysym=keysym, when="tail")
+
+    steps = [Step(lambda: get_widget().focus_force(), None)]
+    steps += [Step(lambda k=KEYSYMS.get(ch, ch): press(k), pause_ms) for ch in text if ch in KEYSYMS or ch.isalnum()]
+    return steps + [Step(lambda: None, None)]
+
+
+def fresh_poems(poems):
+    """Endless supply of poems no earlier step has analysed, so the apps' per-text caches (the
+    workspace tab cache, the tagging and figure memos) never answer in place of the analyzers."""
+    for round_number in itertools.count():
+        for poem in poems:
+            yield poem if round_number == 0 else f"{poem}\nRefrain {round_number}"
+
+
+def close_popups(root):
+    """Destroys the Toplevel windows an action opened (spell check results) so the next step starts clean."""
+    import tkinter as tk
+    for child in root.winfo_children():
+        if isinstance(child, tk.Toplevel):
+            child.destroy()
+
+
+# --- Apps ---
+class FinishDriver:
+    """LitLoomApp from Finish: canvas pages redrawn on resize, font change and page switch."""
+    name = "finish"
+
+    def __init__(self, corpora):
+        self.corpora = corpora
+        self.app = benchmark.load_finish_module().LitLoomApp()
+        self.root = self.app
+
+    def prepare(self, recorder):
+        self.app.geometry("800x600")
+        self.app.go_to_editor_page()
+        recorder.settle()
+
+    def set_text(self, text):
+        widget = self.app.editor_text_widget
+        widget.delete("1.0", "end")
+        widget.insert("1.0", text)
+
+    def scenarios(self):
+        app, sonnets = self.app, fresh_poems(self.corpora["sonnet"])
+        page_switch = []
+        for _ in range(3):
+            page_switch.append(Step(lambda: self.set_text(next(sonnets)), None))
+            page_switch.append(Step(app.run_analyze, None))
+            page_switch += [Step(lambda t=tag: app.switch_active_analysis(t), None)
+                            for tag in ("parts_of_speech", "figure_of_speech", "tone", "overview")]
+            page_switch.append(Step(app.go_back_to_editor, None))
+        return {
+            "drag_resize": drag_resize_steps(self.root),
+            "typing_burst": [Step(lambda: self.set_text(""), None)]
+            + typing_steps(lambda: app.editor_text_widget, self.corpora["limerick"][0]),
+            "font_size": [Step(app.increase_font, None)] * 4 + [Step(app.decrease_font, None)] * 4,
+            "page_switch": page_switch,
+            "spell_check_long_poem": [
+                Step(lambda: self.set_text(misspelled(self.corpora["free_verse_1k"][0], benchmark.CORPUS_SEED)), None),
+                Step(app.run_spell_correct, None),
+                Step(lambda: close_popups(self.root), None)],
+        }
+
+    def close(self):
+        self.app.destroy()
+
+
+class MainDriver:
+    """PoemAnalyzerApp from main.py: ttk pages and a notebook of result tabs."""
+    name = "main"
+
+    def __init__(self, corpora):
+        import tkinter as tk
+        from tkinter import messagebox
+        # A message box would wait for a click; the harness only needs the work before it
+        for function in ("showinfo", "showwarning", "showerror"):
+            setattr(messagebox, function, lambda *args, **kwargs: None)
+        self.corpora = corpora
+        self.root = tk.Tk()
+        self.app = benchmark.load_main_module().PoemAnalyzerApp(self.root)
+
+    def prepare(self, recorder):
+        self.root.geometry("800x600")
+        recorder.settle()
+
+    def set_text(self, text):
+        self.app.input_text.delete("1.0", "end")
+        self.app.input_text.insert("1.0", text)
+
+    def scenarios(self):
+        app, sonnets = self.app, fresh_poems(self.corpora["sonnet"])
+        page_switch = []
+        for _ in range(3):
+            page_switch.append(Step(lambda: self.set_text(next(sonnets)), None))
+            page_switch.append(Step(app.run_analysis, None))
+            page_switch += [Step(lambda i=i: app.analysis_notebook.select(i), None)
+                            for i in range(len(app.analysis_notebook.tabs()))]
+            page_switch.append(Step(lambda: app.show_page("input"), None))
+        return {
+            "drag_resize": drag_resize_steps(self.root),
+            "typing_burst": [Step(lambda: self.set_text(""), None)]
+            + typing_steps(lambda: app.input_text, self.corpora["limerick"][0]),
+            "font_size": [Step(lambda: app.change_font_size(2), None)] * 4
+            + [Step(lambda: app.change_font_size(-2), None)] * 4,
+            "page_switch": page_switch,
+            "spell_check_long_poem": [
+                Step(lambda: self.set_text(misspelled(self.corpora["free_verse_1k"][0], benchmark.CORPUS_SEED)), None),
+                Step(app.check_spelling, None),
+                Step(lambda: close_popups(self.root), None)],
+        }
+
+    def close(self):
+        self.root.destroy()
+
+
+DRIVERS = {"finish": FinishDriver, "main": MainDriver}
+
+
+def run_app(driver_class, corpora, repeat=3, only=None):
+    """Replays every scenario of one app (after a discarded warm-up run); returns {"app/scenario": summary}."""
+    existing = set(threading.enumerate())
+    driver = driver_class(corpora)
+    results = {}
+    try:
+        setup = LoopRecorder(driver.root)
+        wait_for_background_threads(setup, existing)
+        driver.prepare(setup)
+        for scenario, steps in driver.scenarios().items():
+            key = f"{driver.name}/{scenario}"
+            if only and not any(fragment in key for fragment in only):
+                continue
+            for step in steps:  # Warm-up: first renders, image scaling caches and lazy resources
+                setup.run_step(step)
+            recorder = LoopRecorder(driver.root)
+            for _ in range(max(1, repeat)):
+                for step in steps:
+                    recorder.run_step(step)
+            results[key] = r = summarize(recorder)
+            print(f"  {key:<36} response p50 {r['response_p50_ms']:8.1f}  p90 {r['response_p90_ms']:8.1f}  "
+                  f"max {r['response_max_ms']:8.1f} ms | blocking p99 {r['blocking_p99_ms']:7.1f}  "
+                  f"max {r['blocking_max_ms']:7.1f} ms")
+    finally:
+        driver.close()
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Returns a list of human-readable regression messages for the GATED percentiles."""
+    regressions = []
+    for key, current in sorted(results.items()):
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        for kind, p in GATED:
+            metric = f"{kind}_p{p}_ms"
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append(f"{key}: {kind} p{p} regressed by {change:.0%} ({old:.1f} -> {new:.1f} ms)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay scripted GUI sessions and measure event-loop latency.")
+    parser.add_argument("--app", choices=sorted(DRIVERS), nargs="*", help="apps to run (default: all)")
+    parser.add_argument("--only", nargs="*", help="run only scenarios whose name contains one of these strings")
+    parser.add_argument("--repeat", type=int, default=3, help="timed replays of each scenario")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown relative to the baseline, e.g. 0.25 for 25%%")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="succeed when there is no baseline to compare against")
+    parser.add_argument("--use-display", action="store_true", help="use the current $DISPLAY instead of Xvfb")
+    parser.add_argument("--seed", type=int, default=benchmark.CORPUS_SEED, help="seed for the synthetic corpora")
+    args = parser.parse_args(argv)
+    if not (args.save_baseline or args.allow_missing_baseline or os.path.exists(args.baseline)):
+        print(f"No baseline found at {args.baseline}; run with --save-baseline to create one.")
+        return 2
+
+    xvfb = None
+    if args.use_display and not os.environ.get("DISPLAY"):
+        print("Error: --use-display needs $DISPLAY to be set.")
+        return 2
+    if not args.use_display:
+        try:
+            xvfb = start_xvfb()
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            return 2
+    try:
+        benchmark.install_offline_stubs()
+        corpora = benchmark.build_corpora(args.seed)
+        print(f"Replaying GUI scenarios (repeat={args.repeat}, quiet={QUIET_MS} ms, "
+              f"display {os.environ.get('DISPLAY')})...")
+        results = {}
+        for name in args.app or sorted(DRIVERS):
+            results.update(run_app(DRIVERS[name], corpora, args.repeat, args.only))
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+            xvfb.wait()
+
+    if args.save_baseline:
+        baseline = benchmark.load_baseline(args.baseline)
+        baseline.update(results)
+        benchmark.save_baseline(args.baseline, baseline)
+        return 0
+    baseline = benchmark.load_baseline(args.baseline)
+    if not baseline:
+        print(f"No baseline found at {args.baseline}; run with --save-baseline to create one.")
+        return 0 if args.allow_missing_baseline else 2
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+# langid.py - Offline language identification, so text already in the target language is not translated
+#
+# detect() first looks at the writing system: most scripts (Hangul, kana, Greek, Hebrew, Thai, the
+# Indic scripts, ...) belong to one translator language, which settles it. Text in a shared script
+# (Latin, Cyrillic, Arabic, Devanagari) is scored against character 1-3-gram profiles of every
+# language written in that script. The profiles are built once, on first use, from the NLTK
+# stopwords corpus the apps already download: a language's function words ("the", "und", "que")
+# are its most frequent words, and their letter n-grams are what tells its running text apart.
+# Without the corpus, text in a shared script is reported as unknown, which simply means it is
+# translated as before.
+#
+# translate_stanzas() uses it per stanza: stanzas already in the target language are kept as they
+# are, runs of the other stanzas go to the translator in one call each, and a poem entirely in the
+# target language costs no call at all.
+import functools
+import math
+import re
+from collections import Counter, namedtuple
+
+from tracing import span
+
+MIN_LETTERS = 12  # Shorter text is too little evidence; such a stanza takes the whole poem's language
+MIN_MARGIN = 0.15  # Mean log-likelihood lead per n-gram over the runner-up needed for a confident guess
+NGRAM_SIZES = (1, 2, 3)
+SMOOTHING = 0.1  # Weight of the uniform distribution mixed into each profile
+
+# NLTK stopwords file -> translator language code (the codes of main.LANGUAGES)
+STOPWORD_LANGUAGES = {
+    "albanian": "sq", "arabic": "ar", "azerbaijani": "az", "basque": "eu", "bengali": "bn", "catalan": "ca",
+    "chinese": "zh-cn", "danish": "da", "dutch": "nl", "english": "en", "finnish": "fi", "french": "fr",
+    "german": "de", "greek": "el", "hebrew": "iw", "hungarian": "hu", "indonesian": "id", "italian": "it",
+    "kazakh": "kk", "nepali": "ne", "norwegian": "no", "portuguese": "pt", "romanian": "ro", "russian": "ru",
+    "slovene": "sl", "spanish": "es", "swedish": "sv", "tajik": "tg", "tamil": "ta", "turkish": "tr",
+}
+LANGUAGE_ALIASES = {"he": "iw", "jv": "jw", "nb": "no", "fil": "tl", "zh": "zh-cn"}
+
+# (first code point, last code point, script); scripts in SCRIPT_LANGUAGE identify the language
+SCRIPT_RANGES = [
+    (0x0041, 0x024F, "Latin"), (0x1E00, 0x1EFF, "Latin"), (0x0370, 0x03FF, "Greek"), (0x1F00, 0x1FFF, "Greek"),
+    (0x0400, 0x052F, "Cyrillic"), (0x0530, 0x058F, "Armenian"), (0x0590, 0x05FF, "Hebrew"),
+    (0x0600, 0x06FF, "Arabic"), (0x0750, 0x077F, "Arabic"), (0x0900, 0x097F, "Devanagari"),
+    (0x0980, 0x09FF, "Bengali"), (0x0A00, 0x0A7F, "Gurmukhi"), (0x0A80, 0x0AFF, "Gujarati"),
+    (0x0B00, 0x0B7F, "Oriya"), (0x0B80, 0x0BFF, "Tamil"), (0x0C00, 0x0C7F, "Telugu"), (0x0C80, 0x0CFF, "Kannada"),
+    (0x0D00, 0x0D7F, "Malayalam"), (0x0D80, 0x0DFF, "Sinhala"), (0x0E00, 0x0E7F, "Thai"), (0x0E80, 0x0EFF, "Lao"),
+    (0x1000, 0x109F, "Myanmar"), (0x10A0, 0x10FF, "Georgian"), (0x1100, 0x11FF, "Hangul"),
+    (0x1200, 0x137F, "Ethiopic"), (0x1780, 0x17FF, "Khmer"), (0x3040, 0x309F, "Kana"), (0x30A0, 0x30FF, "Kana"),
+    (0x3130, 0x318F, "Hangul"), (0x3400, 0x4DBF, "Han"), (0x4E00, 0x9FFF, "Han"), (0xAC00, 0xD7AF, "Hangul"),
+]
+SCRIPT_LANGUAGE = {
+    "Greek": "el", "Armenian": "hy", "Hebrew": "iw", "Bengali": "bn", "Gurmukhi": "pa", "Gujarati": "gu",
+    "Oriya": "or", "Tamil": "ta", "Telugu": "te", "Kannada": "kn", "Malayalam": "ml", "Sinhala": "si", "Thai": "th",
+    "Lao": "lo", "Myanmar": "my", "Georgian": "ka", "Hangul": "ko", "Ethiopic": "am", "Khmer": "km", "Kana": "ja",
+    "Han": "zh-cn",
+}
+SCRIPT_DEFAULT = {"Cyrillic": "ru", "Arabic": "ar", "Devanagari": "hi"}  # When no profile decides
+
+Detection = namedtuple("Detection", ["language", "confident"])
+Detection.__doc__ = """language is a translator code, or None when unknown; confident says whether to rely on it."""
+UNKNOWN = Detection(None, False)
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def normalize(code):
+    """Lower-cased translator code with aliases resolved ('he' -> 'iw', 'zh' -> 'zh-cn')."""
+    code = (code or "").lower()
+    return LANGUAGE_ALIASES.get(code, code)
+
+
+def same_language(detected, target):
+    """Whether text detected as `detected` needs no translation into `target`.
+
+    Regional variants count as the same language ('pt' and 'pt-pt'), except Chinese, where the
+    target picks the script and script is what detection cannot tell apart.
+    """
+    detected, target = normalize(detected), normalize(target)
+    if not detected or not target:
+        return False
+    if detected == target:
+        return True
+    base = detected.split("-")[0]
+    return base != "zh" and base == target.split("-")[0]
+
+
+# --- Scripts ---
+def _script_of(char):
+    code = ord(char)
+    for first, last, script in SCRIPT_RANGES:
+        if first <= code <= last:
+            return script
+    return None
+
+
+def dominant_script(text):
+    """The script most of the letters of text are written in (None when it has no letters)."""
+    counts = Counter(_script_of(char) for char in text if char.isalpha())
+    counts.pop(None, None)
+    if not counts:
+        return None
+    if counts.get("Kana") and counts.get("Han"):  # Japanese mixes kanji and kana
+        counts["Kana"] += counts.pop("Han")
+    return counts.most_common(1)[0][0]
+
+
+# --- N-gram Profiles ---
+def _ngrams(words):
+    for word in words:
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                yield padded[i:i + n]
+
+
+def build_profiles(words_by_language):
+    """{script: {language: (log-probability per n-gram, log-probability of an unseen one)}} from word lists."""
+    profiles = {}
+    for language, words in words_by_language.items():
+        words = [word.lower() for word in words if _WORD_RE.fullmatch(word)]
+        script = dominant_script(" ".join(words))
+        if script is None or script in SCRIPT_LANGUAGE:
+            continue  # Scripts with one language are decided without a profile
+        profiles.setdefault(script, {})[language] = Counter(_ngrams(words))
+    for script, counts_by_language in profiles.items():
+        # Interpolated with one uniform distribution over every n-gram seen in the script, so an
+        # unseen n-gram costs the same in each language however long its stopword list is
+        vocabulary = set().union(*counts_by_language.values())
+        unseen = math.log(SMOOTHING / len(vocabulary))
+        for language, counts in counts_by_language.items():
+            total = sum(counts.values())
+            counts_by_language[language] = (
+                {gram: math.log((1 - SMOOTHING) * count / total + SMOOTHING / len(vocabulary))
+                 for gram, count in counts.items()}, unseen)
+    return profiles
+
+
+@functools.lru_cache(maxsize=1)
+def load_profiles():
+    """build_profiles() over the NLTK stopwords corpus ({} when it is missing)."""
+    try:
+        from nltk.corpus import stopwords
+        available = set(stopwords.fileids())
+    except (LookupError, OSError) as e:
+        print(f"Warning: Language profiles unavailable (NLTK stopwords corpus missing: {e})")
+        return {}
+    with span("langid_profiles"):
+        return build_profiles({language: stopwords.words(name) for name, language in STOPWORD_LANGUAGES.items()
+                               if name in available})
+
+
+# --- Detection ---
+def detect(text):
+    """Detection of text's language."""
+    script = dominant_script(text)
+    if script is None:
+        return UNKNOWN
+    if script in SCRIPT_LANGUAGE:
+        return Detection(SCRIPT_LANGUAGE[script], True)
+    words = [word.lower() for word in _WORD_RE.findall(text) if _script_of(word[0]) == script]
+    candidates = load_profiles().get(script, {})
+    if sum(len(word) for word in words) < MIN_LETTERS or not candidates:
+        default = SCRIPT_DEFAULT.get(script)
+        return Detection(default, False) if default else UNKNOWN
+    grams = list(_ngrams(words))
+    scores = sorted(((sum(log_probs.get(gram, unseen) for gram in grams), language)
+                     for language, (log_probs, unseen) in candidates.items()), reverse=True)
+    if len(scores) == 1:
+        return Detection(scores[0][1], False)  # Nothing to compare against, so not evidence of the language
+    (best, language), (runner_up, _) = scores[0], scores[1]
+    return Detection(language, (best - runner_up) / len(grams) >= MIN_MARGIN)
+
+
+def split_stanzas(text):
+    """[(stanza, separator), ...] where "".join(stanza + separator) == text; separators are blank lines."""
+    parts = re.split(r"(\n[ \t]*\n\s*)", text)
+    parts.append("")
+    return [(parts[i], parts[i + 1]) for i in range(0, len(parts) - 1, 2)]
+
+
+def stanza_languages(text):
+    """[(stanza, separator, Detection), ...]; stanzas too short to judge take the whole text's language."""
+    stanzas = split_stanzas(text)
+    detections = [detect(stanza) for stanza, _ in stanzas]
+    too_short = [not detection.confident and 0 < sum(map(len, _WORD_RE.findall(stanza))) < MIN_LETTERS
+                 for (stanza, _), detection in zip(stanzas, detections)]
+    if any(too_short):
+        overall = detect(text)
+        if overall.confident:
+            detections = [overall if short else detection for short, detection in zip(too_short, detections)]
+    return [(stanza, separator, detection) for (stanza, separator), detection in zip(stanzas, detections)]
+
+
+def translate_stanzas(text, target, translate):
+    """text in `target`, calling translate(chunk) only for the stanzas that are not in it yet.
+
+    Consecutive stanzas that need translating are sent together, as one chunk. Returns
+    (translated text, number of translate() calls made).
+    """
+    with span("langid", target=target):
+        stanzas = stanza_languages(text)
+    pieces, run, calls = [], [], 0
+    for stanza, separator, detection in stanzas + [("", "", Detection(target, True))]:
+        keep = not stanza.strip() or (detection.confident and same_language(detection.language, target))
+        if not keep:
+            run.append(stanza + separator)
+            continue
+        if run:
+            chunk = "".join(run)
+            body = chunk.rstrip()
+            pieces.append(translate(body) + chunk[len(body):])
+            calls += 1
+            run = []
+        pieces.append(stanza + separator)
+    return "".join(pieces), calls
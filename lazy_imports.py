@@ -0,0 +1,178 @@
+# lazy_imports.py - Deferred loading of heavy optional libraries and an import-time startup report
+#
+# Libraries that only one feature needs (PDF export, translation, text-to-speech, spell checking)
+# are wrapped in a Deferred loader: nothing is imported until the feature first calls it, and
+# prefetch() warms the loaders on a background thread once the window is showing.
+#
+# Start an app with --import-report (or LITLOOM_IMPORT_REPORT=1) to print an `-X importtime`-style
+# table of the slowest module imports plus the time to the first painted window. Setting
+# LITLOOM_IMPORT_REPORT=<path.json> also writes the numbers there so they can be tracked over time.
+import json
+import os
+import sys
+import threading
+import time
+
+import tracing
+from tracing import span
+
+REPORT_FLAG = "--import-report"
+REPORT_TOP = 25  # Rows of the slowest imports shown in the printed report
+
+
+class Deferred:
+    """A value produced by `loader` on the first call (from any thread) and returned from then on."""
+
+    def __init__(self, loader, name=None):
+        self.loader = loader
+        self.name = name or loader.__name__
+        self.__doc__ = loader.__doc__
+        self._lock = threading.Lock()
+        self._value = None
+        self._done = False
+
+    def __call__(self):
+        if not self._done:
+            with self._lock:
+                if not self._done:
+                    with span("deferred_import", loader=self.name):
+                        self._value = self.loader()
+                    self._done = True
+        return self._value
+
+    @property
+    def loaded(self):
+        return self._done
+
+
+def deferred(loader):
+    """Decorator turning a zero-argument loader function into a Deferred."""
+    return Deferred(loader)
+
+
+def prefetch(*loaders):
+    """Calls each loader in order on a daemon thread, so the first real use finds it ready."""
+
+    def run():
+        for loader in loaders:
+            try:
+                loader()
+            except Exception as e:
+                print(f"Warning: background prefetch of {getattr(loader, 'name', loader)} failed: {e}")
+
+    thread = threading.Thread(target=run, name="prefetch", daemon=True)
+    thread.start()
+    return thread
+
+
+# --- Import-Time Report ---
+class ImportTimer:
+    """A sys.meta_path hook timing every module execution (self and cumulative, like -X importtime)."""
+
+    def __init__(self):
+        self.start_ns = time.perf_counter_ns()
+        self.records = []  # (module, self_ns, cumulative_ns, depth) in completion order
+        self.marks = []  # (label, ns since start)
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "searching", False):
+            return None
+        self._local.searching = True
+        try:
+            for finder in sys.meta_path:
+                find_spec = getattr(finder, "find_spec", None)
+                if finder is self or find_spec is None:
+                    continue
+                spec = find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.searching = False
+        loader = spec.loader
+        # Built-in and frozen loaders are shared classes (and fast); only per-module loader instances are wrapped
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, "exec_module"):
+            try:
+                loader.exec_module = self._timed(fullname, loader.exec_module)
+            except AttributeError:
+                pass
+        return spec
+
+    def _timed(self, fullname, exec_module):
+        def timed_exec_module(module):
+            stack = self._local.__dict__.setdefault("stack", [])
+            stack.append(0)
+            start_ns = time.perf_counter_ns()
+            try:
+                exec_module(module)
+            finally:
+                cumulative = time.perf_counter_ns() - start_ns
+                children = stack.pop()
+                if stack:
+                    stack[-1] += cumulative
+                self.records.append((fullname, cumulative - children, cumulative, len(stack)))
+                if tracing.is_enabled():
+                    tracing.record(f"import {fullname}", start_ns, cumulative)
+
+        return timed_exec_module
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter_ns() - self.start_ns))
+
+    def summary(self, top=REPORT_TOP):
+        slowest = sorted(self.records, key=lambda record: -record[2])[:top]
+        return {"marks_ms": {label: round(ns / 1e6, 2) for label, ns in self.marks},
+                "modules_imported": len(self.records),
+                "top_level_import_ms": round(sum(r[2] for r in self.records if r[3] == 0) / 1e6, 2),
+                "slowest": [{"module": name, "self_us": self_ns // 1000, "cumulative_us": cumulative // 1000}
+                            for name, self_ns, cumulative, _ in slowest]}
+
+    def format(self, top=REPORT_TOP):
+        info = self.summary(top)
+        lines = ["--- Startup Import Report ---",
+                 f"{info['modules_imported']} modules imported, {info['top_level_import_ms']:.1f} ms in imports"]
+        lines += [f"{label}: {ms:.1f} ms after start" for label, ms in info["marks_ms"].items()]
+        lines.append(f"{'self [us]':>10} | {'cumulative':>10} | module")
+        lines += [f"{row['self_us']:>10} | {row['cumulative_us']:>10} | {row['module']}" for row in info["slowest"]]
+        return "\n".join(lines)
+
+
+_timer = None
+
+
+def start_startup_report(argv=None):
+    """Installs the import timer when --import-report or LITLOOM_IMPORT_REPORT is given; call it first thing."""
+    global _timer
+    argv = sys.argv if argv is None else argv
+    if _timer is None and (REPORT_FLAG in argv or os.environ.get("LITLOOM_IMPORT_REPORT", "") not in ("", "0")):
+        _timer = ImportTimer()
+        sys.meta_path.insert(0, _timer)
+    return _timer
+
+
+def mark(label):
+    """Records a startup milestone (e.g. "imports done") when the report is active."""
+    if _timer is not None:
+        _timer.mark(label)
+
+
+def finish_startup_report(label="first window"):
+    """Marks the end of start-up, removes the import hook and prints (and optionally saves) the report."""
+    global _timer
+    timer, _timer = _timer, None
+    if timer is None:
+        return None
+    timer.mark(label)
+    if timer in sys.meta_path:
+        sys.meta_path.remove(timer)
+    print(timer.format(), file=sys.stderr)
+    target = os.environ.get("LITLOOM_IMPORT_REPORT", "")
+    if target.endswith(".json"):
+        try:
+            with open(target, "w", encoding="utf-8") as f:
+                json.dump(timer.summary(top=100), f, indent=2)
+        except OSError as e:
+            print(f"Warning: could not write import report to {target}: {e}")
+    return timer
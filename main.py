@@ -1,19 +1,37 @@
 # main.py - Full Desktop Application for Poem Analysis
+import lazy_imports
+
+lazy_imports.start_startup_report()  # Times the imports below when run with --import-report
 import tkinter as tk
-from tkinter import scrolledtext, ttk, font, messagebox, colorchooser, simpledialog
+from tkinter import scrolledtext, ttk, font, messagebox, colorchooser, simpledialog, filedialog
 from PIL import Image, ImageTk
 import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.tag import pos_tag
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from nltk.tokenize import word_tokenize
 import re
 import string
-from nltk.corpus import cmudict, stopwords
-from googletrans import Translator
 import os
 import time
-from collections import defaultdict
-from spellchecker import SpellChecker  # For spell checking
+from collections import Counter, defaultdict
+import analysis_graph
+import langid
+import metrics
+import tracing
+from tracing import span, traced
+from tagging import tag_text, flatten, split_sentences, tag_sents
+from figures import detect_figures, detect_in_tagged
+from tone_lexicon import classify_tone, find_cues
+from poem_forms import match_forms, fallback_for
+from resources import get_pronouncing_dict, get_stop_words, get_sentiment_analyzer, get_spell_checker
+from lazy_imports import deferred
+from result_view import ResultView
+from spelling import index_suggester, ranked_candidates
+from workspace import Workspace
+try:
+    from scansion import scan_poem, scan_lines, format_scansion
+except ImportError:
+    print("Warning: NumPy not found. Meter analysis will be unavailable. Install with: pip install numpy")
+    scan_poem = None
+lazy_imports.mark("imports done")
 
 # --- Download NLTK Resources ---
 nltk_resource_map = {
@@ -44,21 +62,20 @@ for path_to_find, download_id in nltk_resource_map.items():
                 raise RuntimeError(
                     f"Critical NLTK resource '{download_id}' could not be obtained. Application cannot continue.") from e_download
 
-try:
-    pronouncing_dict = cmudict.dict()
-except LookupError:
-    print(
-        "Warning: CMU Pronouncing Dictionary (cmudict.dict()) failed to load. Rhyme/syllable analysis may be limited.")
-    pronouncing_dict = {}
+pronouncing_dict = get_pronouncing_dict()
+stop_words = get_stop_words()
 
-try:
-    stop_words = set(stopwords.words('english'))
-except LookupError:
-    print("Warning: NLTK English Stopwords not found/loaded. Some text processing features might be affected.")
-    stop_words = set()
 
-translator = Translator()
-spell = SpellChecker()
+@deferred
+def load_translator():
+    """googletrans is imported on the first translation (or by the background prefetch)."""
+    try:
+        from googletrans import Translator
+    except ImportError:
+        print("Error: 'googletrans' library not found. Please run: pip install googletrans")
+        return None
+    return Translator()
+
 
 # --- UI Theming and Fonts ---
 # To use a "Wednesday series font" for the title, replace "Georgia" with the exact name of that font
@@ -75,6 +92,7 @@ BODY_FONT = (BODY_FONT_FAMILY, BODY_FONT_SIZE, BODY_FONT_STYLE)
 ITALIC_FONT = ("Segoe UI Italic", 10)
 BUTTON_FONT = ("Segoe UI Semibold", 10)
 SMALL_TEXT_FONT = ("Segoe UI", 9)  # Added definition for SMALL_TEXT_FONT
+HEADING_SIZE_STEP = 3  # Result headings are this many points larger than the body font
 
 # Available font families for user selection (common system fonts)
 AVAILABLE_FONT_FAMILIES = ["Arial", "Times New Roman", "Verdana", "Courier New", "Georgia", "Palatino Linotype",
@@ -129,16 +147,23 @@ def count_syllables_in_word(word):
     return count if count > 0 else 1
 
 
+@traced()
 def count_syllables_in_line(line_text):
-    words = word_tokenize(line_text)
+    with span("tokenize"):
+        words = word_tokenize(line_text)
     return sum(count_syllables_in_word(word) for word in words)
 
 
-def analyze_parts_of_speech_grouped(text):
-    words = word_tokenize(text)
-    tagged_words = pos_tag(words)
+@traced()
+def count_syllables_per_line(lines):
+    """Syllables in each of lines, timed as one syllable analysis."""
+    return [count_syllables_in_line(line) for line in lines]
+
+
+def group_parts_of_speech(tagged_sentences):
+    """{category: sorted distinct words} over already-tagged sentences (alphanumeric tokens only)."""
     grouped_pos = defaultdict(list)
-    for word, tag in tagged_words:
+    for word, tag in flatten(tagged_sentences):
         category = POS_CATEGORY_MAP.get(tag, tag)
         if word.isalnum(): grouped_pos[category].append(word)
     for category in grouped_pos:
@@ -146,37 +171,29 @@ def analyze_parts_of_speech_grouped(text):
     return grouped_pos
 
 
+def pos_counts_for_tags(tagged_sentences):
+    return dict(Counter(POS_CATEGORY_MAP.get(tag, tag) for word, tag in flatten(tagged_sentences) if word.isalnum()))
+
+
+@traced()
+def analyze_parts_of_speech_grouped(text):
+    _, tagged_sentences = tag_text(text)
+    return group_parts_of_speech(tagged_sentences)
+
+
+def count_parts_of_speech(text):
+    """{category: number of tokens} over the POS_CATEGORY_MAP categories (alphanumeric tokens only)."""
+    _, tagged_sentences = tag_text(text)  # Memoized: shares the tagging with analyze_parts_of_speech_grouped
+    return pos_counts_for_tags(tagged_sentences)
+
+
+@traced()
 def get_detailed_tone(text, sentiment_compound_score):
-    text_lower, words = text.lower(), word_tokenize(text.lower())
-    current_stop_words = stop_words if stop_words else set()
-    words = [w for w in words if w.isalpha() and w not in current_stop_words]
-    if sentiment_compound_score >= 0.05:
-        if any(k in words for k in ["love", "heart", "passion", "darling", "beloved", "kiss", "adore",
-                                    "cherish"]): return "Romantic / Affectionate"
-        if any(k in words for k in ["joy", "happy", "smile", "laugh", "glee", "delight", "celebrate",
-                                    "elation"]): return "Joyful / Celebratory"
-        if any(k in words for k in
-               ["hope", "dream", "future", "believe", "dawn", "aspire", "faith"]): return "Hopeful / Optimistic"
-        if any(k in words for k in ["nature", "beauty", "serene", "peace", "calm", "meadow", "stars", "moon", "sun",
-                                    "wonder"]): return "Reflective / Nature-focused (Positive)"
-        return "Generally Positive"
-    elif sentiment_compound_score <= -0.05:
-        if any(k in words for k in ["sad", "sorrow", "tear", "cry", "grief", "lost", "lonely", "mourn",
-                                    "despair"]): return "Sad / Melancholic"
-        if any(k in words for k in ["anger", "hate", "rage", "fury", "resent", "fight", "war", "scorn",
-                                    "bitter"]): return "Angry / Conflict-focused"
-        if any(k in words for k in
-               ["fear", "scared", "terror", "horror", "anxious", "dark", "shadow", "dread"]): return "Fearful / Anxious"
-        if any(k in words for k in ["loss", "end", "farewell", "past", "memory", "forgotten", "vanish",
-                                    "fade"]): return "Nostalgic / Reflecting on Loss"
-        return "Generally Negative"
-    else:
-        if any(k in words for k in ["observe", "describe", "think", "ponder", "question", "world", "life", "examine",
-                                    "consider"]): return "Observational / Contemplative"
-        return "Neutral / Descriptive"
+    return classify_tone(text, sentiment_compound_score).tone
 
 
 def generate_interpretive_summary(overall_sentiment, detailed_tone, poem_text_lower):
+    cues = find_cues(poem_text_lower)  # One automaton scan instead of a cascade of substring checks
     summary = f"The poem's overall emotional leaning appears to be {overall_sentiment.lower()}."
     summary += f" The predominant tone detected is '{detailed_tone}'.\n\n"
     summary += "This suggests the poem might be exploring themes of...\n"
@@ -193,12 +210,9 @@ def generate_interpretive_summary(overall_sentiment, detailed_tone, poem_text_lo
         summary += "...a general sense of positivity. While the specific focus might be varied, it aims to leave a pleasant or uplifted impression."
     elif detailed_tone == "Sad / Melancholic":
         summary += "...sadness, sorrow, or introspection on more somber emotions. It might grapple with loss, loneliness, or a sense of despair."
-        if "flower" in poem_text_lower and ("die" in poem_text_lower or "wilt" in poem_text_lower) and (
-                "water" in poem_text_lower or "thirst" in poem_text_lower or "neglect" in poem_text_lower):
+        if "flower" in cues and cues & {"die", "wilt"} and cues & {"water", "thirst", "neglect"}:
             summary += "\n\nFor instance, if there's imagery like a 'flower dying from lack of water,' this could metaphorically represent a relationship or hope fading due to neglect, the pain of an unmet need, or the consequences of emotional 'thirst' – much like a personal connection withering without care or affirmation."
-        elif (
-                "reject" in poem_text_lower or "alone" in poem_text_lower or "unloved" in poem_text_lower or "abandon" in poem_text_lower) and not (
-                "not alone" in poem_text_lower):
+        elif cues & {"reject", "alone", "unloved", "abandon"} and "not alone" not in cues:
             summary += "\n\nIt might also touch upon feelings of rejection, isolation, or the pain of being unwanted, exploring the ache of solitude or the sting of abandonment."
     elif detailed_tone == "Angry / Conflict-focused":
         summary += "...strong emotions like anger, resentment, or a sense of conflict. It might be challenging an injustice, expressing frustration, or depicting an internal or external struggle."
@@ -206,7 +220,7 @@ def generate_interpretive_summary(overall_sentiment, detailed_tone, poem_text_lo
         summary += "...fear, anxiety, or dread. The poem could be exploring a threatening situation, an inner turmoil, or the unsettling nature of the unknown."
     elif detailed_tone == "Nostalgic / Reflecting on Loss":
         summary += "...the past, perhaps with longing or wistfulness, often tinged with the sadness of something lost, changed, or gone forever. Themes of memory and impermanence are likely."
-        if "fade" in poem_text_lower or "vanish" in poem_text_lower or "gone" in poem_text_lower or "no more" in poem_text_lower:
+        if cues & {"fade", "vanish", "gone", "no more"}:
             summary += "\n\nImagery of things fading or disappearing might emphasize the transient nature of experiences, relationships, or even life itself."
     elif detailed_tone == "Generally Negative":
         summary += "...a general sense of negativity. The specific reasons might vary, but it likely evokes feelings of discomfort, dissatisfaction, or concern."
@@ -217,9 +231,14 @@ def generate_interpretive_summary(overall_sentiment, detailed_tone, poem_text_lo
     return summary
 
 
-def analyze_sentiment(text):
-    analyzer = SentimentIntensityAnalyzer()
-    vs = analyzer.polarity_scores(text)
+def sentiment_scores(text):
+    """VADER's {'neg', 'neu', 'pos', 'compound'} scores for text."""
+    with span("vader"):
+        return get_sentiment_analyzer().polarity_scores(text)
+
+
+def classify_sentiment(text, vs):
+    """(overall, tone, summary) for text and its VADER scores."""
     overall_sentiment = "Neutral"
     if vs['compound'] >= 0.05:
         overall_sentiment = "Positive"
@@ -230,38 +249,41 @@ def analyze_sentiment(text):
     return overall_sentiment, detailed_tone, interpretive_summary
 
 
+@traced()
+def analyze_sentiment(text):
+    """(overall, tone, summary), scoring text with VADER first."""
+    return classify_sentiment(text, sentiment_scores(text))
+
+
+@traced()
+def score_sentiment(text):
+    """(VADER scores, overall, tone, summary): the scoring and the classification timed as one analysis."""
+    scores = sentiment_scores(text)
+    return (scores,) + classify_sentiment(text, scores)
+
+
+def format_figure(figure):
+    """One display line for a figures.FigureSpan."""
+    words, sentence = figure.words, figure.sentence
+    if figure.kind == "personification":
+        return f"Personification: \"{words[0].capitalize()} {words[1]}\" (in \"{sentence}\")"
+    if figure.kind == "simile":
+        if figure.variant == "like":
+            return f"Simile (using 'like'): Found in \"{sentence}\""
+        return f"Simile (using '{figure.variant}'): \"{' '.join(words)}\" in \"{sentence}\""
+    if figure.kind == "metaphor":
+        return f"Metaphor: \"{' '.join(words)}\" in \"{sentence}\""
+    return f"Alliteration: e.g., \"{' '.join(words)}\" in \"{sentence}\""
+
+
+def format_figures(figures):
+    """Display lines for FigureSpans, without repeats."""
+    return list(dict.fromkeys(format_figure(figure) for figure in figures))
+
+
+@traced()
 def identify_figures_of_speech(text):
-    figures, sentences = [], sent_tokenize(text)
-    inanimate_keywords = ["wind", "moon", "stars", "trees", "sun", "time", "river", "ocean", "mountain", "earth"]
-    human_verbs = ["whispered", "sang", "danced", "cried", "laughed", "spoke", "wept", "sighed", "called"]
-    for sentence_text in sentences:
-        original_sentence_strip, sentence_lower = sentence_text.strip(), sentence_text.lower()
-        tokenized_sentence, tagged_sentence = word_tokenize(sentence_lower), pos_tag(word_tokenize(sentence_lower))
-        for i, (word, tag) in enumerate(tagged_sentence):
-            if word in inanimate_keywords and tag.startswith("NN"):
-                limit = min(len(tagged_sentence), i + 4)
-                for k in range(i + 1, limit):
-                    next_word, next_tag = tagged_sentence[k]
-                    if next_tag.startswith("VB") and next_word in human_verbs:
-                        figures.append(
-                            f"Personification: \"{word.capitalize()} {next_word}\" (in \"{original_sentence_strip}\")");
-                        break
-        if " like " in sentence_lower: figures.append(f"Simile (using 'like'): Found in \"{original_sentence_strip}\"")
-        for match in re.finditer(r'\b(as\s+\w+\s+as)\b', sentence_lower):
-            if len(match.group(1).split()) == 3: figures.append(
-                f"Simile (using 'as...as'): \"{match.group(1)}\" in \"{original_sentence_strip}\"")
-        words_in_sentence = [w for w in tokenized_sentence if w.isalpha() and len(w) > 1]
-        if len(words_in_sentence) > 2:
-            for i in range(len(words_in_sentence) - 1):
-                if words_in_sentence[i][0] == words_in_sentence[i + 1][0] and words_in_sentence[i][0] not in 'aeiou':
-                    if i + 2 < len(words_in_sentence) and words_in_sentence[i + 2][0] == words_in_sentence[i][0]:
-                        figures.append(
-                            f"Alliteration: e.g., \"{words_in_sentence[i]} {words_in_sentence[i + 1]} {words_in_sentence[i + 2]}\" in \"{original_sentence_strip}\"");
-                        break
-                    elif i + 2 >= len(words_in_sentence):
-                        figures.append(
-                            f"Alliteration: e.g., \"{words_in_sentence[i]} {words_in_sentence[i + 1]}\" in \"{original_sentence_strip}\""); break
-    return list(set(figures))
+    return format_figures(detect_figures(text))
 
 
 def get_last_word_from_line(line):
@@ -281,73 +303,80 @@ def get_rhyme_sound_cmu(word):
     return word[-3:]
 
 
-def analyze_rhyme_scheme_and_words(text):
-    lines = [line for line in text.split('\n') if line.strip()]
-    if len(lines) < 1: return "N/A (Not enough lines)", {}, []
+def poem_lines(text):
+    """The non-blank lines of a poem: the lines every per-line analysis counts."""
+    return [line for line in text.split('\n') if line.strip()]
+
+
+def rhyme_tails(lines):
+    """(last word, rhyme sound) per line; the word is None for a line without one."""
     last_words = [get_last_word_from_line(line) for line in lines]
-    sounds = [get_rhyme_sound_cmu(word) if word else None for word in last_words]
+    with span("cmudict_lookup"):
+        sounds = [get_rhyme_sound_cmu(word) if word else None for word in last_words]
+    return list(zip(last_words, sounds))
+
+
+def rhyme_labels_for_tails(tails):
+    """One rhyme label per rhyme_tails() entry ('A', 'B', ...; 'X<n>' for unknown sounds, '-' for no word) plus label -> words."""
     rhyme_groups, labels, label_map, current_label_char_code = {}, [], {}, ord('A')
-    for i, sound in enumerate(sounds):
-        current_last_word = last_words[i]
+    for current_last_word, sound in tails:
         if current_last_word is None: labels.append("-"); continue
         if sound is None:
-            unique_non_rhyme_label = f"X{len(label_map)}"
-            labels.append(unique_non_rhyme_label);
-            label_map[sound] = unique_non_rhyme_label
-            rhyme_groups[unique_non_rhyme_label] = [current_last_word];
+            unique_non_rhyme_label = f"X{len(rhyme_groups)}"
+            labels.append(unique_non_rhyme_label)
+            rhyme_groups[unique_non_rhyme_label] = [current_last_word]
             continue
-        found_match = False
-        for s_key, lbl in label_map.items():
-            if s_key is not None and sound == s_key:
-                labels.append(lbl);
-                rhyme_groups[lbl].append(current_last_word);
-                found_match = True;
-                break
-        if not found_match:
-            new_label = chr(current_label_char_code)
-            label_map[sound] = new_label;
-            labels.append(new_label)
-            rhyme_groups[new_label] = [current_last_word];
+        label = label_map.get(sound)
+        if label is None:
+            label = chr(current_label_char_code)
+            label_map[sound] = label
+            rhyme_groups[label] = []
             current_label_char_code += 1
             if current_label_char_code > ord('Z'): current_label_char_code = ord('a')
-    scheme_str = "".join(labels)
-    rhyming_words_display = {k: list(set(v)) for k, v in rhyme_groups.items() if
-                             len(list(set(v))) > 1 and not k.startswith("X")}
-    return scheme_str, rhyming_words_display, lines
+        labels.append(label)
+        rhyme_groups[label].append(current_last_word)
+    return labels, rhyme_groups
+
+
+def rhyme_labels_for_lines(lines):
+    return rhyme_labels_for_tails(rhyme_tails(lines))
+
+
+def rhyming_words_for_groups(rhyme_groups):
+    """The rhyme groups with more than one distinct word (label -> words)."""
+    return {k: list(set(v)) for k, v in rhyme_groups.items() if len(set(v)) > 1 and not k.startswith("X")}
+
+
+@traced()
+def analyze_rhyme_labels(text):
+    """Returns (labels, rhyming_words_display, lines); labels has one entry per non-blank line."""
+    lines = poem_lines(text)
+    if len(lines) < 1: return [], {}, []
+    labels, rhyme_groups = rhyme_labels_for_lines(lines)
+    return labels, rhyming_words_for_groups(rhyme_groups), lines
 
 
-def identify_poem_type(text):
-    scheme, _, lines_raw = analyze_rhyme_scheme_and_words(text)
-    lines = [line for line in text.split('\n') if line.strip()]
+@traced()
+def analyze_rhyme_scheme_and_words(text):
+    labels, rhyming_words_display, lines = analyze_rhyme_labels(text)
+    if not lines: return "N/A (Not enough lines)", {}, []
+    return "".join(labels), rhyming_words_display, lines
+
+
+@traced()
+def identify_poem_type(text, labels=None, lines=None, syllables_per_line=None):
+    """Names the poem's form(s); callers that already have the rhyme labels, lines or syllables can pass them in."""
+    if labels is None or lines is None:
+        labels, _, lines = analyze_rhyme_labels(text)
     num_lines = len(lines)
     if num_lines == 0: return "Unknown (No text provided)"
-    syllables_per_line = [count_syllables_in_line(line) for line in lines_raw]
-    poem_types = []
-    if num_lines == 3 and syllables_per_line == [5, 7, 5]: poem_types.append("Haiku")
-    if num_lines == 5 and len(scheme) == 5 and scheme[0] == scheme[1] == scheme[4] and scheme[2] == scheme[3] and \
-            scheme[0] != scheme[2]:
-        if (7 <= syllables_per_line[0] <= 10 and 7 <= syllables_per_line[1] <= 10 and 7 <= syllables_per_line[
-            4] <= 10 and \
-                5 <= syllables_per_line[2] <= 7 and 5 <= syllables_per_line[3] <= 7): poem_types.append("Limerick")
-    if num_lines == 14:
-        if len(scheme) == 14 and scheme[0] == scheme[2] and scheme[1] == scheme[3] and scheme[0] != scheme[1] and \
-                scheme[4] == scheme[6] and scheme[5] == scheme[7] and scheme[4] != scheme[5] and scheme[0] != scheme[
-            4] and \
-                scheme[8] == scheme[10] and scheme[9] == scheme[11] and scheme[8] != scheme[9] and scheme[4] != scheme[
-            8] and \
-                scheme[12] == scheme[13] and scheme[8] != scheme[12]:
-            poem_types.append("Sonnet (likely Shakespearean)")
-        elif len(scheme) == 14 and scheme[0] == scheme[3] == scheme[4] == scheme[7] and scheme[1] == scheme[2] == \
-                scheme[5] == scheme[6] and scheme[0] != scheme[1] and \
-                ((scheme[8] == scheme[10] == scheme[12] and scheme[9] == scheme[11] == scheme[13] and scheme[8] !=
-                  scheme[9]) or \
-                 (scheme[8] == scheme[11] and scheme[9] == scheme[12] and scheme[10] == scheme[13] and scheme[8] !=
-                  scheme[9] and scheme[9] != scheme[10])):
-            poem_types.append("Sonnet (likely Petrarchan)")
-        else:
-            poem_types.append("Sonnet (Unspecified or other form)")
+    if syllables_per_line is None:
+        syllables_per_line = count_syllables_per_line(lines)
+    poem_types = match_forms(labels, lines, syllables_per_line)
+    if not poem_types and fallback_for(num_lines):
+        poem_types.append(fallback_for(num_lines))
     if not poem_types:
-        if all(s == '-' or s.startswith('X') for s in scheme) and num_lines > 1:
+        if all(s == '-' or s.startswith('X') for s in labels) and num_lines > 1:
             poem_types.append("Free Verse")
         elif num_lines > 1:
             poem_types.append("Rhyming Verse (specific form undetermined)")
@@ -356,9 +385,84 @@ def identify_poem_type(text):
     return ", ".join(poem_types) if poem_types else "Undetermined Form"
 
 
+def tag_parts_of_speech(tokens):
+    """(tagged sentences, grouped parts of speech): tagging is part of the POS analyzer's time."""
+    tagged_sentences = tag_sents(tokens)
+    return tagged_sentences, group_parts_of_speech(tagged_sentences)
+
+
+def tag_figures(sentences, tokens):
+    """(tagged sentences, figures) for lowercased tokens: tagging is part of the figures analyzer's time."""
+    tagged_sentences = tag_sents(tokens)
+    return tagged_sentences, detect_in_tagged(sentences, tagged_sentences)
+
+
+# --- Analyzer Graph ---
+# Every artifact of a poem and what it is computed from; analyze_poem() and the app's analysis
+# page both run this graph, so shared intermediates (lines, rhyme labels, tags) are computed once
+# and independent branches run concurrently. Plugins add their own analyzers (see analysis_graph.py).
+ANALYZERS = analysis_graph.AnalysisGraph()
+ANALYZERS.register("lines", ["text"], ["lines"], poem_lines)
+ANALYZERS.register("rhyme_tails", ["lines"], ["rhyme_tails"], rhyme_tails)
+ANALYZERS.register("rhyme_labels", ["rhyme_tails"], ["rhyme_labels", "rhyme_groups"], rhyme_labels_for_tails)
+ANALYZERS.register("rhyme_scheme", ["rhyme_labels"], ["rhyme_scheme"], "".join)
+ANALYZERS.register("rhyming_words", ["rhyme_groups"], ["rhyming_words"], rhyming_words_for_groups)
+ANALYZERS.register("syllables", ["lines"], ["syllables_per_line"], count_syllables_per_line)
+ANALYZERS.register("form", ["text", "rhyme_labels", "lines", "syllables_per_line"], ["form"], identify_poem_type)
+ANALYZERS.register("sentiment", ["text"], ["sentiment_scores", "overall_sentiment", "tone", "interpretation"],
+                   score_sentiment)
+ANALYZERS.register("tokens", ["text"], ["sentences", "tokens"], split_sentences)
+ANALYZERS.register("parts_of_speech", ["tokens"], ["tags", "parts_of_speech"], tag_parts_of_speech)
+ANALYZERS.register("pos_counts", ["tags"], ["pos_counts"], pos_counts_for_tags)
+# Figure rules match lowercased words, so figures are tagged from their own lowercased tokens
+ANALYZERS.register("figure_tokens", ["text"], ["figure_sentences", "figure_tokens"],
+                   lambda text: split_sentences(text, lower=True))
+ANALYZERS.register("figures", ["figure_sentences", "figure_tokens"], ["figure_tags", "figures"], tag_figures)
+if scan_poem:
+    ANALYZERS.register("meter", ["lines"], ["meter"], scan_lines)
+analysis_graph.load_plugins(ANALYZERS)
+
+
+@traced()
+def analyze_poem(text, threads=None):
+    """Every analysis of one poem as a JSON-serializable dict (used by the HTTP service and batch tools)."""
+    artifacts = ANALYZERS.run({"text": text}, threads=threads)
+    result = {
+        "lines": len(artifacts["lines"]),
+        "form": artifacts["form"],
+        "rhyme_scheme": artifacts["rhyme_scheme"],
+        "rhyme_labels": artifacts["rhyme_labels"],
+        "rhyming_words": artifacts["rhyming_words"],
+        "syllables_per_line": artifacts["syllables_per_line"],
+        "sentiment": {"overall": artifacts["overall_sentiment"], "tone": artifacts["tone"],
+                      "summary": artifacts["interpretation"], "scores": artifacts["sentiment_scores"]},
+        "parts_of_speech": dict(artifacts["parts_of_speech"]),
+        "pos_counts": artifacts["pos_counts"],
+        "figures_of_speech": [figure._asdict() for figure in artifacts["figures"]],
+    }
+    if "meter" in artifacts:
+        scansion = artifacts["meter"]
+        result["meter"] = {"meter": scansion.meter, "confidence": scansion.confidence}
+    for analyzer in ANALYZERS.reports():
+        result.update((name, artifacts[name]) for name in analyzer.outputs)
+    return result
+
+
+@traced()
 def translate_poem(text, lang='en'):
+    """Stanzas already in `lang` are kept; only the others are sent to the translator."""
+    translator = None
+
+    def translate(chunk):
+        nonlocal translator
+        translator = translator or load_translator()
+        if translator is None:
+            raise RuntimeError("the 'googletrans' library is not installed.")
+        return translator.translate(chunk, dest=lang).text
+
     try:
-        return translator.translate(text, dest=lang).text
+        translated, _ = langid.translate_stanzas(text, lang, translate)
+        return translated
     except Exception as e:
         return f"Translation error: {str(e)}"
 
@@ -426,8 +530,9 @@ def load_and_place_background(parent_widget, image_path):
         new_width = getattr(event, 'width', parent_widget.winfo_width())
         new_height = getattr(event, 'height', parent_widget.winfo_height())
         if new_width <= 1 or new_height <= 1: return
-        resized_pil_img = parent_widget.bg_img_pil_original.resize((new_width, new_height), Image.LANCZOS)
-        parent_widget.bg_photo_resized = ImageTk.PhotoImage(resized_pil_img)
+        with span("resize_background"):
+            resized_pil_img = parent_widget.bg_img_pil_original.resize((new_width, new_height), Image.LANCZOS)
+            parent_widget.bg_photo_resized = ImageTk.PhotoImage(resized_pil_img)
         canvas.itemconfig("bg_image_tag", image=parent_widget.bg_photo_resized)
         canvas.coords("bg_image_tag", 0, 0)
 
@@ -457,12 +562,21 @@ class PoemAnalyzerApp:
         self.poem_text = ""
         self.current_page = None
         self.pages = {}
+        self.collapsed_sections = set()  # (title, heading) of result sections the user folded away
+        self.workspace = Workspace()  # The open poems; self.poem_text is the active one's analysed text
+        self._document_ids = []  # doc_id per entry of the document dropdown
 
         # Variables for font customization - MOVED EARLIER
         self.current_body_font_family = tk.StringVar(value=BODY_FONT_FAMILY)
         self.current_body_font_size = tk.IntVar(value=BODY_FONT_SIZE)
         self.current_body_font_style = tk.StringVar(value=BODY_FONT_STYLE)
         self.current_body_font_color = tk.StringVar(value=BODY_FONT_COLOR)
+        # Named fonts shared by the input and result text areas (and the result headings): a change of
+        # size, family or style is one reconfigure that Tk applies to every widget using them
+        self.body_font = font.Font(self.root, family=BODY_FONT_FAMILY, size=BODY_FONT_SIZE)
+        self.heading_font = font.Font(self.root, family=BODY_FONT_FAMILY, size=BODY_FONT_SIZE + HEADING_SIZE_STEP,
+                                      weight="bold")
+        self._update_text_widgets_font()
 
         self.style = ttk.Style(self.root)
         try:
@@ -475,6 +589,19 @@ class PoemAnalyzerApp:
         self.create_pages()
         self.show_page("input")
 
+        # Debug timing overlay: F12 toggles it, Ctrl+Shift+E exports the recorded spans
+        self.trace_overlay = None
+        self.trace_overlay_text = None
+        self.root.bind("<F12>", self.toggle_trace_overlay)
+        self.root.bind("<Control-Shift-E>", self.export_trace)
+        self.root.after_idle(self._after_first_paint)
+
+    def _after_first_paint(self):
+        # Idle callbacks run after Tk has drawn the window, so this marks time-to-first-window
+        lazy_imports.finish_startup_report()
+        lazy_imports.prefetch(get_sentiment_analyzer, get_spell_checker, index_suggester, load_translator,
+                              langid.load_profiles)
+
     def _configure_styles(self):
         self.style.configure("TFrame", background=COLOR_FRAME_BG)
         self.style.configure("Content.TFrame", background=COLOR_FRAME_BG)
@@ -535,24 +662,19 @@ class PoemAnalyzerApp:
             print(f"Error: Page '{page_name}' not found.")
 
     def _update_text_widgets_font(self):
-        new_font = (self.current_body_font_family.get(),
-                    self.current_body_font_size.get(),
-                    self.current_body_font_style.get())
-        new_color = self.current_body_font_color.get()
-
+        family, size = self.current_body_font_family.get(), self.current_body_font_size.get()
+        style = self.current_body_font_style.get()
+        self.body_font.configure(family=family, size=size, weight="bold" if "bold" in style else "normal",
+                                 slant="italic" if "italic" in style else "roman")
+        self.heading_font.configure(family=family, size=size + HEADING_SIZE_STEP)
+
+    def _update_text_widgets_color(self):
+        color = self.current_body_font_color.get()
         if hasattr(self, 'input_text'):
-            self.input_text.config(font=new_font, fg=new_color)
-
+            self.input_text.config(fg=color)
         if hasattr(self, 'analysis_tab_frames'):
             for result_area in self.analysis_tab_frames.values():
-                # Store current content and re-insert because font change can affect ScrolledText content display
-                current_content = result_area.get(1.0, tk.END)
-                is_disabled = result_area.cget("state") == tk.DISABLED
-                if is_disabled: result_area.config(state=tk.NORMAL)
-                result_area.config(font=new_font, fg=new_color)
-                result_area.delete(1.0, tk.END)
-                result_area.insert(tk.END, current_content)
-                if is_disabled: result_area.config(state=tk.DISABLED)
+                result_area.config(fg=color)
 
     def change_font_size(self, delta):
         new_size = self.current_body_font_size.get() + delta
@@ -572,7 +694,7 @@ class PoemAnalyzerApp:
         color_code = colorchooser.askcolor(title="Choose Text Color", initialcolor=self.current_body_font_color.get())
         if color_code and color_code[1]:  # Check if a color was chosen (color_code[1] is the hex string)
             self.current_body_font_color.set(color_code[1])
-            self._update_text_widgets_font()
+            self._update_text_widgets_color()
 
     def create_font_controls(self, parent_frame):
         controls_frame = ttk.Frame(parent_frame, style="Content.TFrame")
@@ -647,6 +769,7 @@ class PoemAnalyzerApp:
         content_frame.rowconfigure(2, weight=0)  # Font controls
         content_frame.rowconfigure(3, weight=1)  # Text area
         content_frame.rowconfigure(4, weight=0)  # Buttons
+        content_frame.rowconfigure(5, weight=0)  # Open documents
 
         ttk.Label(content_frame, text="Poem Analyzer Pro", style="Title.TLabel").grid(row=0, column=0, pady=(0, 5),
                                                                                       sticky="n")
@@ -662,11 +785,11 @@ class PoemAnalyzerApp:
 
         self.input_text = scrolledtext.ScrolledText(content_frame, wrap=tk.WORD, height=15,
                                                     relief=tk.SOLID, borderwidth=1, padx=10, pady=10,
-                                                    bg=COLOR_SECONDARY_BG,
+                                                    bg=COLOR_SECONDARY_BG, font=self.body_font,
+                                                    fg=self.current_body_font_color.get(),
                                                     bd=1, highlightthickness=1, highlightbackground=COLOR_BORDER,
                                                     highlightcolor=COLOR_ACCENT)
         self.input_text.grid(row=3, column=0, sticky="nsew", pady=(0, 20))
-        self._update_text_widgets_font()  # Apply initial font settings
 
         input_button_frame = ttk.Frame(content_frame, style="Content.TFrame")
         input_button_frame.grid(row=4, column=0, sticky="ew")
@@ -690,6 +813,21 @@ class PoemAnalyzerApp:
         btn_analyze_input.grid(row=0, column=2, padx=10, ipady=5)
         self._set_hand_cursor(btn_analyze_input)
 
+        document_bar = ttk.Frame(content_frame, style="Content.TFrame")
+        document_bar.grid(row=5, column=0, sticky="ew", pady=(15, 0))
+        ttk.Label(document_bar, text="Poem:", style="TLabel", font=SMALL_TEXT_FONT).pack(side=tk.LEFT, padx=(0, 5))
+        self.document_var = tk.StringVar()
+        self.document_dropdown = ttk.Combobox(document_bar, textvariable=self.document_var, width=30,
+                                              state="readonly", font=SMALL_TEXT_FONT)
+        self.document_dropdown.pack(side=tk.LEFT, padx=5)
+        self.document_dropdown.bind("<<ComboboxSelected>>", self.switch_document)
+        self._set_hand_cursor(self.document_dropdown)
+        for text, command in (("New", self.new_document), ("Close", self.close_document)):
+            btn_document = ttk.Button(document_bar, text=text, command=command, style="Secondary.TButton")
+            btn_document.pack(side=tk.LEFT, padx=5)
+            self._set_hand_cursor(btn_document)
+        self._refresh_document_list()
+
         btn_clear_input = ttk.Button(input_button_frame, text="Clear",
                                      command=lambda: self.input_text.delete(1.0, tk.END), style="Secondary.TButton")
         btn_clear_input.grid(row=0, column=3, sticky="e", padx=(10, 0))
@@ -700,7 +838,12 @@ class PoemAnalyzerApp:
     def check_spelling(self):
         text_to_check = self.input_text.get(1.0, tk.END)
         words = word_tokenize(re.sub(r'[^\w\s]', '', text_to_check))  # Remove punctuation for spell check
+        spell = get_spell_checker()
+        if spell is None:
+            messagebox.showerror("Spell Check", "Spell checking needs the 'pyspellchecker' library.", parent=self.root)
+            return
         misspelled = spell.unknown(words)
+        suggest = index_suggester() or (lambda word: ranked_candidates(spell, word))
 
         if not misspelled:
             messagebox.showinfo("Spell Check", "No spelling errors found!", parent=self.root)
@@ -722,10 +865,10 @@ class PoemAnalyzerApp:
 
         output = ""
         for word in misspelled:
-            suggestions = list(spell.candidates(word))
+            suggestions = suggest(word)
             output += f"Word: {word}\n"
             if suggestions:
-                output += f"  Suggestions: {', '.join(suggestions[:5])}\n"  # Show top 5
+                output += f"  Suggestions: {', '.join(suggestions)}\n"  # Top 5, closest and most common first
             else:
                 output += "  No suggestions found.\n"
             output += "-" * 30 + "\n"
@@ -782,6 +925,7 @@ class PoemAnalyzerApp:
         self.analysis_notebook.grid(row=2, column=0, sticky="nsew", pady=(0, 10))
 
         self.analysis_tab_frames = {}
+        self.result_views = {}
         self._create_analysis_tabs_widgets()
 
         btn_back_to_input = ttk.Button(content_frame, text="« Back to Input", command=lambda: self.show_page("input"),
@@ -797,12 +941,15 @@ class PoemAnalyzerApp:
             self.analysis_notebook.add(tab_frame, text=text)
             result_area = scrolledtext.ScrolledText(tab_frame, wrap=tk.WORD,
                                                     relief=tk.SOLID, borderwidth=1, padx=10, pady=10,
-                                                    bg=COLOR_SECONDARY_BG, bd=1, highlightthickness=0)
+                                                    bg=COLOR_SECONDARY_BG, bd=1, highlightthickness=0,
+                                                    font=self.body_font, fg=self.current_body_font_color.get())
             result_area.pack(fill="both", expand=True)
             result_area.config(state=tk.DISABLED)
             self.analysis_tab_frames[text] = result_area
+            self.result_views[text] = ResultView(result_area, content_tag=None, collapsed=self.collapsed_sections,
+                                                 section_titles=POS_CATEGORY_MAP.values())
+            self.result_views[text].configure_tags(h1={"font": self.heading_font})
         self._add_translation_controls_to_tab()
-        self._update_text_widgets_font()  # Apply initial font to new text areas
 
     def _add_translation_controls_to_tab(self):
         for i in range(self.analysis_notebook.index("end")):
@@ -839,33 +986,47 @@ class PoemAnalyzerApp:
     def run_analysis(self):
         poem_text = self.input_text.get(1.0, tk.END).strip()
         if not poem_text: messagebox.showwarning("Input Error", "Please enter a poem to analyze."); return
+        document = self.workspace.active
+        self._save_editor_state()
+        self.workspace.set_analyzed_text(document, poem_text)  # Unchanged text keeps its cached results
+        self._refresh_document_list()  # The title follows the first line
         self.poem_text = poem_text
         self.show_page("analysis")
+        cached = self.workspace.get(document, "tabs")
+        if cached is not None:
+            for tab_name, content in cached.items():
+                self.display_result_in_tab(tab_name, content)
+            if hasattr(self, 'analysis_notebook'): self.analysis_notebook.select(0)
+            return
         for tab_name in self.analysis_tab_frames.keys():
             self.display_result_in_tab(tab_name, "Processing...")
         self.root.update_idletasks()
         self.root.after(50, self._perform_all_analyses_on_page)
 
     def _perform_all_analyses_on_page(self):
+        with span("_perform_all_analyses_on_page"):
+            self._run_all_analyses()
+        self._refresh_trace_overlay()
+
+    def _run_all_analyses(self):
         if not self.poem_text: return
-        overall_sentiment, detailed_tone, _ = analyze_sentiment(self.poem_text)
-        poem_type = identify_poem_type(self.poem_text)
-        lines = [line for line in self.poem_text.split('\n') if line.strip()]
-        overview_content = f"--- Poem Overview ---\n\nDetected Form: {poem_type}\nNumber of Lines: {len(lines)}\nOverall Sentiment: {overall_sentiment}\nPredominant Tone: {detailed_tone}\n\nThis poem appears to be a "
+        # Every result comes from one run of the analyzer graph: each intermediate is computed once
+        artifacts = ANALYZERS.run({"text": self.poem_text})
+        lines, words_dict = artifacts["lines"], artifacts["rhyming_words"]
+        poem_type, detailed_tone = artifacts["form"], artifacts["tone"]
+        overview_content = f"--- Poem Overview ---\n\nDetected Form: {poem_type}\nNumber of Lines: {len(lines)}\nOverall Sentiment: {artifacts['overall_sentiment']}\nPredominant Tone: {detailed_tone}\n\nThis poem appears to be a "
         if poem_type != "Undetermined Form": overview_content += f"{poem_type.lower()} "
         overview_content += f"conveying a {detailed_tone.lower()} feeling. Further details can be found in the respective analysis tabs."
-        self.display_result_in_tab("Overview", overview_content)
 
-        grouped_pos = analyze_parts_of_speech_grouped(self.poem_text)
-        fos = identify_figures_of_speech(self.poem_text)
+        grouped_pos = artifacts["parts_of_speech"]
+        fos = format_figures(artifacts["figures"])
         language_content = "--- Parts of Speech (Grouped) ---\n"
         for category, words in grouped_pos.items(): language_content += f"\n{category}:\n  {', '.join(words)}\n"
         if not grouped_pos: language_content += "No distinct parts of speech identified.\n"
         language_content += "\n--- Figures of Speech ---\n"
         language_content += "\n".join(f"- {item}" for item in fos) if fos else "No common figures of speech detected."
-        self.display_result_in_tab("Language & Style", language_content)
 
-        scheme, words_dict, _ = analyze_rhyme_scheme_and_words(self.poem_text)
+        scheme = artifacts["rhyme_scheme"] if lines else "N/A (Not enough lines)"
         rhyme_structure_content = f"--- Rhyme Scheme ---\nCalculated Scheme: {scheme}\n\n"
         if words_dict:
             rhyme_structure_content += "--- Rhyming Word Groups ---\n" + "\n".join(
@@ -873,23 +1034,72 @@ class PoemAnalyzerApp:
         else:
             rhyme_structure_content += "No distinct rhyme groups found."
         rhyme_structure_content += f"\n\n--- Syllables per Line (approximate) ---\n" + "\n".join(
-            f"  Line {i + 1}: {count_syllables_in_line(line)}" for i, line in enumerate(lines))
-        self.display_result_in_tab("Rhyme & Structure", rhyme_structure_content)
-
-        _, _, interpretive_summary = analyze_sentiment(self.poem_text)
-        self.display_result_in_tab("Sentiment & Interpretation",
-                                   f"--- Emotional Interpretation ---\n\n{interpretive_summary}")
+            f"  Line {i + 1}: {count}" for i, count in enumerate(artifacts["syllables_per_line"]))
+        if "meter" in artifacts:
+            rhyme_structure_content += "\n\n--- Meter (approximate) ---\n" + format_scansion(artifacts["meter"])
+
+        contents = {
+            "Overview": overview_content,
+            "Language & Style": language_content,
+            "Rhyme & Structure": rhyme_structure_content,
+            "Sentiment & Interpretation": f"--- Emotional Interpretation ---\n\n{artifacts['interpretation']}",
+        }
+        for analyzer in ANALYZERS.reports():  # Plugin results go below the built-in ones of their tab
+            tab_name = analyzer.tab if analyzer.tab in contents else "Overview"
+            contents[tab_name] += f"\n\n--- {analyzer.title} ---\n" + "\n".join(
+                str(artifacts[name]) for name in analyzer.outputs)
+        for tab_name, content in contents.items():
+            self.display_result_in_tab(tab_name, content)
         self.display_result_in_tab("Translation", "Select language to translate.")
         if hasattr(self, 'analysis_notebook'): self.analysis_notebook.select(0)
+        document = self.workspace.active
+        if document.analyzed_text == self.poem_text:  # Kept for showing this poem again without re-analysing
+            self.workspace.put(document, "tabs", {name: view.content for name, view in self.result_views.items()})
+
+    # --- Workspace (several open poems) ---
+    def _refresh_document_list(self):
+        documents = sorted(self.workspace, key=lambda document: document.doc_id)
+        self._document_ids = [document.doc_id for document in documents]
+        self.document_dropdown.configure(values=[document.display_title for document in documents])
+        self.document_dropdown.current(self._document_ids.index(self.workspace.active.doc_id))
+
+    def _save_editor_state(self):
+        document = self.workspace.active
+        document.text = self.input_text.get("1.0", "end-1c")
+        document.cursor = self.input_text.index(tk.INSERT)
+        document.scroll = self.input_text.yview()[0]
+
+    def _load_document(self):
+        document = self.workspace.active
+        self.input_text.delete("1.0", tk.END)
+        self.input_text.insert("1.0", document.text)
+        self.input_text.mark_set(tk.INSERT, document.cursor)
+        self.input_text.yview_moveto(document.scroll)
+        self._refresh_document_list()
+        self.show_page("input")
+
+    def switch_document(self, event=None):
+        index = self.document_dropdown.current()
+        if index < 0 or self._document_ids[index] == self.workspace.active.doc_id:
+            return
+        self._save_editor_state()
+        self.workspace.activate(self._document_ids[index])
+        self._load_document()
 
+    def new_document(self):
+        self._save_editor_state()
+        self.workspace.new_document()
+        self._load_document()
+
+    def close_document(self):
+        self.workspace.close(self.workspace.active.doc_id)
+        self._load_document()
+
+    @traced()
     def display_result_in_tab(self, tab_name, content):
         if tab_name in self.analysis_tab_frames:
-            result_area = self.analysis_tab_frames[tab_name]
-            is_disabled = result_area.cget("state") == tk.DISABLED
-            if is_disabled: result_area.config(state=tk.NORMAL)
-            result_area.delete(1.0, tk.END)
-            result_area.insert(tk.END, content)
-            if is_disabled: result_area.config(state=tk.DISABLED)
+            # Only the changed lines are rewritten; translated text is shown without collapsible sections
+            self.result_views[tab_name].set_content(content, collapsible=tab_name != "Translation")
         else:
             print(f"Warning: Tab '{tab_name}' not found.")
 
@@ -913,8 +1123,47 @@ class PoemAnalyzerApp:
 
         self.root.after(50, do_translation)
 
+    # --- Debug Timing Overlay ---
+    def toggle_trace_overlay(self, event=None):
+        if self.trace_overlay and self.trace_overlay.winfo_exists():
+            self.trace_overlay.destroy()
+            self.trace_overlay = None
+            return
+        tracing.enable(True)  # Spans are only recorded while tracing is on
+        self.trace_overlay = tk.Toplevel(self.root)
+        self.trace_overlay.title("Stage Timings (last analysis)")
+        self.trace_overlay.geometry("460x320")
+        self.trace_overlay.configure(bg=COLOR_FRAME_BG)
+        self.trace_overlay.attributes("-topmost", True)
+        self.trace_overlay_text = scrolledtext.ScrolledText(self.trace_overlay, wrap=tk.NONE, font=("Courier New", 10),
+                                                            bg=COLOR_SECONDARY_BG, fg=COLOR_TEXT_PRIMARY)
+        self.trace_overlay_text.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        button_frame = ttk.Frame(self.trace_overlay, style="Content.TFrame")
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(button_frame, text="Export Trace...", command=self.export_trace,
+                   style="Secondary.TButton").pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Clear", command=lambda: (tracing.clear(), self._refresh_trace_overlay()),
+                   style="Secondary.TButton").pack(side=tk.LEFT, padx=10)
+        self._refresh_trace_overlay()
+
+    def _refresh_trace_overlay(self):
+        if not self.trace_overlay or not self.trace_overlay.winfo_exists(): return
+        self.trace_overlay_text.config(state=tk.NORMAL)
+        self.trace_overlay_text.delete(1.0, tk.END)
+        self.trace_overlay_text.insert(tk.END, tracing.format_last_run("_perform_all_analyses_on_page"))
+        self.trace_overlay_text.config(state=tk.DISABLED)
+
+    def export_trace(self, event=None):
+        path = filedialog.asksaveasfilename(parent=self.root, title="Export Chrome/Perfetto Trace",
+                                            defaultextension=".json", initialfile="litloom_trace.json",
+                                            filetypes=[("Trace JSON", "*.json")])
+        if not path: return
+        count = tracing.export_chrome_trace(path)
+        messagebox.showinfo("Trace Exported", f"Wrote {count} spans to {path}.", parent=self.root)
+
 
 if __name__ == "__main__":
+    metrics.start_from_environment()
     root = tk.Tk()
     try:
         from ctypes import windll
@@ -2,10 +2,13 @@ import tkinter as tk
 from tkinter import ttk  # We need this for the dropdown menu
 from tkinter import font as tkFont
 from PIL import Image, ImageTk, ImageDraw
-import re
 import threading
 import os
 import time
+import langid
+import metrics
+from tracing import span, traced
+from spelling import CorrectionPlan, find_misspellings, index_suggester
 
 # --- Library Imports with User Guidance ---
 try:
@@ -39,10 +42,11 @@ except ImportError:
 class SpellCheckPopup(tk.Toplevel):     #spelling check pop up window
     """A custom-themed pop-up window for spell checking."""
 
-    def __init__(self, parent, misspelled_data):#parent:-main window, misspelled_data:-dictoinary of words with spelling mistakes
+    def __init__(self, parent, plan):#parent:-main window, plan:-CorrectionPlan holding the misspelled words
         super().__init__(parent)
         self.parent = parent
-        self.misspelled_data = misspelled_data
+        self.plan = plan
+        self.misspelled_data = plan.misspellings
         self.current_word_index = 0
         self.withdraw()#temp hide window
         self.overrideredirect(True)
@@ -81,18 +85,20 @@ class SpellCheckPopup(tk.Toplevel):     #spelling check pop up window
         self.canvas.create_text(380, 20, text="X", font=("Georgia", 14, "bold"), fill=self.text_color, tags="close_btn")
         self.canvas.tag_bind("close_btn", "<Enter>", lambda e: self.config(cursor="hand2"))
         self.canvas.tag_bind("close_btn", "<Leave>", lambda e: self.config(cursor=""))
-        self.canvas.tag_bind("close_btn", "<Button-1>", lambda e: self.destroy())
+        self.canvas.tag_bind("close_btn", "<Button-1>", lambda e: self.finish())
 
     def display_next_error(self):
         self.canvas.delete("suggestion")
         if self.current_word_index >= len(self.misspelled_data):
+            self.apply_corrections()#all chosen corrections in one pass
             self.canvas.create_text(200, 150, text="Spell check complete!", font=("Georgia", 16), fill=self.text_color,
                                     tags="suggestion")
             self.after(1500, self.destroy)
             return
         data = self.misspelled_data[self.current_word_index]
-        word, suggestions = data['word'], data['suggestions']
-        self.canvas.create_text(200, 50, text="Misspelled Word:", font=("Georgia", 12), fill=self.text_color,
+        word, suggestions = data.display, data.suggestions
+        label = f"Misspelled Word ({len(data.spans)} occurrences):" if len(data.spans) > 1 else "Misspelled Word:"
+        self.canvas.create_text(200, 50, text=label, font=("Georgia", 12), fill=self.text_color,
                                 tags="suggestion")
         self.canvas.create_text(200, 80, text=f"'{word}'", font=("Georgia", 18, "bold"), fill="#C0392B",
                                 tags="suggestion")
@@ -125,21 +131,29 @@ class SpellCheckPopup(tk.Toplevel):     #spelling check pop up window
         self.canvas.itemconfig(f"{tag}_bg", fill=self.button_color)
         self.canvas.move(tag, -1, -1)
 
-    def replace_word(self, suggestion):
-        data = self.misspelled_data[self.current_word_index]
-        self.parent.replace_text(data['index'], data['word'], suggestion)
+    def replace_word(self, suggestion):#the suggestion replaces every occurrence of the word
+        self.plan.choose(self.misspelled_data[self.current_word_index].word, suggestion)
         self.next_error()
 
     def next_error(self):
         self.current_word_index += 1
         self.display_next_error()
 
+    def apply_corrections(self):
+        if self.parent.text_widget and self.parent.text_widget.winfo_exists():
+            self.plan.apply_to_widget(self.parent.text_widget)
+
+    def finish(self):
+        self.apply_corrections()
+        self.destroy()
+
 
 class TextToSpeechPopup(tk.Toplevel):
     def __init__(self, parent, text_to_speak):
         super().__init__(parent)
         self.parent = parent
         self.text_to_speak = text_to_speak
+        self.translations = {}  # lang_code -> text_to_speak in that language, kept while the popup is open
         self.is_playing = False
         self.audio_thread = None
 
@@ -315,14 +329,16 @@ class TextToSpeechPopup(tk.Toplevel):
                 self.engine.setProperty('voice', self.female_voice_id)
 
             self.engine.setProperty('rate', int(self.current_rate))
-            self.engine.say(self.text_to_speak)
-            self.engine.runAndWait()
+            with span("tts_pyttsx3"):
+                self.engine.say(self.text_to_speak)
+                self.engine.runAndWait()
             self.is_playing = False
         else:
             lang_code = self.languages[self.selected_language.get()]
-            tts = gTTS(text=self.text_to_speak, lang=lang_code)
-            filename = "temp_audio.mp3"
-            tts.save(filename)
+            with span("tts_gtts", lang=lang_code):
+                tts = gTTS(text=self.text_to_speak, lang=lang_code)
+                filename = "temp_audio.mp3"
+                tts.save(filename)
 
             def play_and_cleanup():
                 try:
@@ -349,13 +365,21 @@ class TextToSpeechPopup(tk.Toplevel):
 
     def play_translated_tts(self, lang_code):
         try:
-            text = self.poem_text.strip()
+            text = self.text_to_speak.strip()
             if not text:
                 return
 
-            translated = GoogleTranslator(source='auto', target=lang_code).translate(text)
-            tts = gTTS(text=translated, lang=lang_code)
-            tts.save("temp_audio.mp3")
+            def translate(chunk):  # Only called for stanzas not already in lang_code
+                with span("translate", target=lang_code):
+                    return GoogleTranslator(source='auto', target=lang_code).translate(chunk)
+
+            translated = self.translations.get(lang_code)
+            if translated is None:
+                translated, _ = langid.translate_stanzas(text, lang_code, translate)
+                self.translations[lang_code] = translated
+            with span("tts_gtts", lang=lang_code):
+                tts = gTTS(text=translated, lang=lang_code)
+                tts.save("temp_audio.mp3")
 
             playsound("temp_audio.mp3")
 
@@ -502,36 +526,19 @@ class LitLoomApp(tk.Tk):
 
     def run_spell_correct(self, event=None):
         if not self.text_widget or not self.text_widget.get("1.0", tk.END).strip(): return
-        content = self.text_widget.get("1.0", tk.END)
-        words = set(re.findall(r'\b\w+\b', content.lower()))
-        misspelled = self.spell.unknown(words)
-        misspelled_data = []
-        if misspelled:
-            for word in sorted(list(misspelled)):
-                start_pos = "1.0"
-                while True:
-                    start_pos = self.text_widget.search(word, start_pos, stopindex=tk.END, nocase=1, exact=True)
-                    if not start_pos: break
-                    end_pos = f"{start_pos}+{len(word)}c"
-                    original_casing = self.text_widget.get(start_pos, end_pos)
-                    misspelled_data.append(
-                        {'word': original_casing, 'index': start_pos, 'suggestions': list(self.spell.candidates(word))})
-                    start_pos = end_pos
-            if misspelled_data: SpellCheckPopup(self, misspelled_data)
+        content = self.text_widget.get("1.0", "end-1c")
+        misspellings = find_misspellings(content, self.spell, suggest=index_suggester())
+        if misspellings: SpellCheckPopup(self, CorrectionPlan(content, misspellings))
 
     def run_analyze(self, event=None):
         print("Analyze button clicked!")
         if self.text_widget: self.text_widget.delete("1.0", tk.END)
 
-    def replace_text(self, index, old, new):
-        if self.text_widget:
-            self.text_widget.delete(index, f"{index}+{len(old)}c")
-            self.text_widget.insert(index, new)
-
     def handle_resize(self, event):
         if self.resize_job_id: self.after_cancel(self.resize_job_id)
         self.resize_job_id = self.after(50, self.redraw_canvas)
 
+    @traced()
     def redraw_canvas(self, force_redraw=False):
         w, h = self.winfo_width(), self.winfo_height()
         if w < 2 or h < 2: return
@@ -556,6 +563,7 @@ class LitLoomApp(tk.Tk):
                   y1]
         return canvas.create_polygon(points, **kwargs, smooth=True)
 
+    @traced()
     def draw_background(self, w, h, size_changed):
         if (size_changed or not self.bg_photo) and self.original_bg_image:
             img = self.original_bg_image.resize((w, h), Image.Resampling.LANCZOS)
@@ -668,5 +676,6 @@ class LitLoomApp(tk.Tk):
 
 # --- Running the Application ---
 if __name__ == "__main__":
+    metrics.start_from_environment()
     app = LitLoomApp()
     app.mainloop()
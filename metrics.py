@@ -0,0 +1,341 @@
+# metrics.py - Counters, gauges and latency histograms in the Prometheus text format
+#
+# install() subscribes to the tracing spans the analyzers already emit (tracing.add_listener), so
+# no analyzer needs extra instrumentation: each finished span named in ANALYZER_SPANS becomes one
+# observation of litloom_analyzer_seconds{analyzer=...}. Only those spans are timed; the per-word
+# spans (cmudict_lookup, tokenize) stay no-ops unless tracing itself is enabled.
+#
+# Cache hit/miss counters are read from the caches' own statistics when the metrics are rendered
+# (the tagging memo, the figure detector's lru_cache, the spelling index). Process-pool workers
+# send their analyzer and cache deltas back with each batch (worker_snapshot / merge_snapshot),
+# so a server's /metrics covers the work done in its workers.
+#
+# Exposition:
+#   LITLOOM_METRICS_PORT=9109  serve http://127.0.0.1:9109/metrics from the GUIs and batch tools
+#   LITLOOM_METRICS_FILE=run.prom  write the metrics there when the process exits
+#   analysis_server.py serves GET /metrics itself
+import atexit
+import os
+import sys
+import threading
+from bisect import bisect_left
+
+import tracing
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Span name -> analyzer label (main.py and Finish name the same analyzer differently)
+ANALYZER_SPANS = {
+    "count_syllables_per_line": "syllables",  # One call per poem, not the per-line count_syllables_in_line
+    "analyze_rhyme_labels": "rhyme", "analyze_rhyme_scheme": "rhyme",  # Not the wrappers around them
+    "analyze_parts_of_speech_grouped": "pos", "_generate_parts_of_speech_content": "pos",
+    "detect_figures": "figures",
+    "rhyme_tails": "rhyme", "parts_of_speech": "pos", "figures": "figures",  # main.ANALYZERS nodes (with tagging)
+    "analyze_sentiment": "sentiment", "score_sentiment": "sentiment",  # Both include the VADER scoring
+    "_generate_tone_content": "sentiment",
+    "identify_poem_type": "form",
+    "analyze_poem": "analyze_poem",
+    "translate_poem": "translation", "translate": "translation",
+    "tts_speak": "tts", "tts_gtts": "tts", "tts_pyttsx3": "tts",
+    "_generate_pdf_content": "pdf_export",
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# --- Metric Types ---
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help_text, self.labels = name, help_text, tuple(labels)
+        self._series = {}  # label values tuple -> value (histograms: [bucket counts, sum, count])
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._series.get(label_values, 0)
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labels, values)} {_format_value(value)}"
+                                for values, value in series]
+
+
+class Gauge(_Metric):
+    """A value that is set, or read from a function when rendered (set_function)."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._functions = {}
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._series[label_values] = value
+
+    def set_function(self, function, *label_values):
+        self._functions[label_values] = function
+
+    def render(self):
+        with self._lock:
+            series = dict(self._series)
+        for values, function in list(self._functions.items()):
+            try:
+                series[values] = function()
+            except Exception:  # A gauge whose source went away is left out rather than failing the scrape
+                series.pop(values, None)
+        return self.header() + [f"{self.name}{_format_labels(self.labels, values)} {_format_value(value)}"
+                                for values, value in sorted(series.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1  # Per-bucket counts; made cumulative when rendered
+            series[1] += value
+            series[2] += 1
+
+    def drain(self):
+        """{label values: (bucket counts, sum, count)} observed since the last drain, which are removed."""
+        with self._lock:
+            series, self._series = self._series, {}
+        return {values: (counts, total, count) for values, (counts, total, count) in series.items()}
+
+    def merge(self, drained):
+        """Adds observations drained from another process's histogram with the same buckets."""
+        with self._lock:
+            for values, (counts, total, count) in drained.items():
+                series = self._series.setdefault(tuple(values), [[0] * (len(self.buckets) + 1), 0.0, 0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+    def render(self):
+        with self._lock:
+            series = sorted((values, (list(counts), total, count))
+                            for values, (counts, total, count) in self._series.items())
+        lines = self.header()
+        for values, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, [le])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self.before_render = []  # Callables run before rendering (e.g. reading cache statistics)
+
+    def _get_or_create(self, cls, name, help_text, labels, **options):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, labels, **options)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._get_or_create(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        for callback in list(self.before_render):
+            callback()
+        with self._lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Writes render() to path (replacing it in one step, so a scraper never reads half a file)."""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temporary, path)
+
+
+REGISTRY = Registry()
+ANALYZER_SECONDS = REGISTRY.histogram("litloom_analyzer_seconds", "Time spent in one analyzer call.", ("analyzer",))
+CACHE_HITS = REGISTRY.counter("litloom_cache_hits_total", "Lookups answered from a cache.", ("cache",))
+CACHE_MISSES = REGISTRY.counter("litloom_cache_misses_total", "Lookups that had to be computed.", ("cache",))
+CACHE_HIT_RATIO = REGISTRY.gauge("litloom_cache_hit_ratio", "Share of lookups answered from a cache.", ("cache",))
+
+
+# --- Analyzer Latency ---
+def _on_span(name, duration_ns):
+    analyzer = ANALYZER_SPANS.get(name)
+    if analyzer is not None:
+        ANALYZER_SECONDS.observe(duration_ns / 1e9, analyzer)
+
+
+# --- Cache Statistics ---
+def _tagging_totals():
+    service = sys.modules.get("tagging") and sys.modules["tagging"]._service
+    return (service.hits, service.misses) if service is not None else None
+
+
+def _figures_totals():
+    figures = sys.modules.get("figures")
+    if figures is None:
+        return None
+    info = figures._detect_cached.cache_info()
+    return info.hits, info.misses
+
+
+def _spell_index_totals():
+    symspell = sys.modules.get("symspell")
+    index = symspell and symspell._shared_index
+    return (index.hits, index.misses) if index else None
+
+
+CACHE_SOURCES = {"tagging": _tagging_totals, "figures": _figures_totals, "spell_index": _spell_index_totals}
+_synced_totals = {}  # cache -> (hits, misses) already added to the counters
+_sync_lock = threading.Lock()
+
+
+def sync_caches():
+    """Adds the hits and misses each cache recorded since the last sync to the counters."""
+    with _sync_lock:
+        for cache, totals_function in CACHE_SOURCES.items():
+            totals = totals_function()
+            if totals is None:
+                continue
+            hits, misses = totals
+            synced_hits, synced_misses = _synced_totals.get(cache, (0, 0))
+            if hits < synced_hits or misses < synced_misses:  # The cache's statistics were reset
+                synced_hits = synced_misses = 0
+            CACHE_HITS.inc(cache, amount=hits - synced_hits)
+            CACHE_MISSES.inc(cache, amount=misses - synced_misses)
+            _synced_totals[cache] = (hits, misses)
+
+
+def _hit_ratio(cache):
+    hits, misses = CACHE_HITS.value(cache), CACHE_MISSES.value(cache)
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def _update_hit_ratios():
+    for cache in CACHE_SOURCES:
+        CACHE_HIT_RATIO.set_function(lambda cache=cache: _hit_ratio(cache), cache)
+
+
+REGISTRY.before_render += [sync_caches, _update_hit_ratios]
+
+
+# --- Worker Processes ---
+def worker_snapshot():
+    """This worker's analyzer observations and cache hits/misses since the last snapshot (picklable)."""
+    before = {cache: (CACHE_HITS.value(cache), CACHE_MISSES.value(cache)) for cache in CACHE_SOURCES}
+    sync_caches()
+    caches = {cache: (CACHE_HITS.value(cache) - hits, CACHE_MISSES.value(cache) - misses)
+              for cache, (hits, misses) in before.items()}
+    return {"analyzers": ANALYZER_SECONDS.drain(), "caches": caches}
+
+
+def merge_snapshot(snapshot):
+    """Adds a worker_snapshot() to this process's metrics."""
+    ANALYZER_SECONDS.merge(snapshot["analyzers"])
+    for cache, (hits, misses) in snapshot["caches"].items():
+        if hits or misses:
+            CACHE_HITS.inc(cache, amount=hits)
+            CACHE_MISSES.inc(cache, amount=misses)
+
+
+# --- Exposition ---
+def install():
+    """Starts recording analyzer latencies from the tracing spans (idempotent)."""
+    tracing.add_listener(_on_span, ANALYZER_SPANS)
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serves GET /metrics on a daemon thread; returns the server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # Scrapes every few seconds would flood the console
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def dump_at_exit(path):
+    atexit.register(lambda: REGISTRY.dump(path))
+
+
+def start_from_environment():
+    """Installs the metrics and starts the exposition LITLOOM_METRICS_PORT / LITLOOM_METRICS_FILE ask for."""
+    port, path = os.environ.get("LITLOOM_METRICS_PORT", ""), os.environ.get("LITLOOM_METRICS_FILE", "")
+    if not port and not path:
+        return False
+    install()
+    if port:
+        try:
+            start_http_server(int(port))
+        except (OSError, ValueError) as e:
+            print(f"Warning: metrics endpoint not started on port {port}: {e}")
+    if path:
+        dump_at_exit(path)
+    return True
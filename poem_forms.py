@@ -0,0 +1,157 @@
+# poem_forms.py - Declarative registry of poetic forms matched against a precomputed rhyme scheme
+#
+# A form is declared as a template: a rhyme pattern per line ('*' = any ending), optional syllable
+# ranges and refrain groups (lines that must repeat). Templates are compiled once per line count:
+# the poem's rhyme labels are canonicalized once per distinct wildcard mask (usually just one) and
+# looked up in a dict, so registering more forms adds dictionary entries rather than comparisons.
+# Syllable ranges and refrains are only checked for the few forms whose rhyme pattern matched.
+import functools
+import re
+from collections import namedtuple
+
+PoemForm = namedtuple("PoemForm", ["name", "patterns", "syllables", "refrains"])
+PoemForm.__doc__ = """A registered form: {line_count: [pattern, ...]}, optional syllable ranges and refrain line groups.
+
+`syllables` is None or a tuple of (min, max) per line; `refrains` is a tuple of line-index tuples
+whose (normalized) text must be identical.
+"""
+
+# Shown when no registered form matched, per line count (checked before the generic fallbacks)
+LINE_COUNT_FALLBACKS = {14: "Sonnet (Unspecified or other form)"}
+
+_registry = []
+
+
+def _fixed(pattern):
+    pattern = pattern.replace(" ", "")
+    return {len(pattern): [pattern]}
+
+
+def _repeated(stanza, min_stanzas=1, max_lines=200):
+    """Stanzas of `stanza` repeated, every stanza with its own rhyme sounds."""
+    stanza = stanza.replace(" ", "")
+    patterns = {}
+    for count in range(min_stanzas, max_lines // len(stanza) + 1):
+        lines = []
+        for index in range(count):
+            lines.extend(f"{ch}{index}" if ch != "*" else "*" for ch in stanza)
+        patterns[len(lines)] = [lines]
+    return patterns
+
+
+def _terza_rima(min_tercets=2, max_lines=200):
+    """ABA BCB CDC ... optionally closed by a single line or couplet on the last middle rhyme."""
+    patterns = {}
+    for count in range(min_tercets, max_lines // 3 + 1):
+        lines = []
+        for index in range(count):
+            lines.extend([f"r{index}", f"r{index + 1}", f"r{index}"])
+        open_end = lines[:-2] + ["*", lines[-1]]  # The last middle rhyme has nothing to answer it
+        patterns.setdefault(len(lines), []).append(open_end)
+        patterns.setdefault(len(lines) + 1, []).append(lines + [f"r{count}"])
+        patterns.setdefault(len(lines) + 2, []).append(lines + [f"r{count}", f"r{count}"])
+    return patterns
+
+
+def _ghazal(min_couplets=5, max_couplets=15):
+    """AA BA CA DA ...: every second line carries the opening rhyme (radif/qafia)."""
+    return {2 * n: [["A", "A"] + ["*", "A"] * (n - 1)] for n in range(min_couplets, max_couplets + 1)}
+
+
+def register_form(name, patterns, syllables=None, refrains=()):
+    """Adds a form; `patterns` is a pattern string or a {line_count: [pattern, ...]} mapping."""
+    if isinstance(patterns, str):
+        patterns = _fixed(patterns)
+    _registry.append(PoemForm(name, patterns, syllables, tuple(tuple(group) for group in refrains)))
+    _compiled_for.cache_clear()
+
+
+def registered_forms():
+    return list(_registry)
+
+
+# --- Compilation ---
+def _canonical(labels, positions):
+    """Renumbers the labels at `positions` by first appearance: ['B','C','B'] -> (0, 1, 0)."""
+    seen, key = {}, []
+    for position in positions:
+        key.append(seen.setdefault(labels[position], len(seen)))
+    return tuple(key)
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_for(line_count):
+    """[(positions, {canonical_key: [form, ...]}), ...] for every distinct wildcard mask at this line count."""
+    by_mask = {}
+    for form in _registry:
+        for pattern in form.patterns.get(line_count, ()):
+            positions = tuple(i for i, label in enumerate(pattern) if label != "*")
+            key = _canonical(pattern, positions)
+            bucket = by_mask.setdefault(positions, {}).setdefault(key, [])
+            if form not in bucket:
+                bucket.append(form)
+    return list(by_mask.items())
+
+
+def _normalize_line(line):
+    return " ".join(re.sub(r"[^\w\s']", " ", line.lower()).split())
+
+
+def _syllables_fit(form, syllables_per_line):
+    if form.syllables is None:
+        return True
+    if syllables_per_line is None or len(syllables_per_line) != len(form.syllables):
+        return False
+    return all(low <= count <= high for count, (low, high) in zip(syllables_per_line, form.syllables))
+
+
+def _refrains_fit(form, lines):
+    for group in form.refrains:
+        texts = {_normalize_line(lines[i]) for i in group}
+        if len(texts) != 1 or "" in texts:
+            return False
+    return True
+
+
+def match_forms(labels, lines, syllables_per_line=None):
+    """Names of all registered forms matching the rhyme labels (one per line), lines and syllable counts.
+
+    Labels of unrhymed lines ('-', 'X<n>') never count as rhyming with anything.
+    """
+    line_count = len(labels)
+    unique = [label if label != "-" and not label.startswith("X") else ("unrhymed", i)
+              for i, label in enumerate(labels)]
+    matches = []
+    for positions, table in _compiled_for(line_count):
+        for form in table.get(_canonical(unique, positions), ()):
+            if form.name not in matches and _syllables_fit(form, syllables_per_line) and _refrains_fit(form, lines):
+                matches.append(form.name)
+    order = {form.name: i for i, form in enumerate(_registry)}
+    return sorted(matches, key=order.get)
+
+
+def fallback_for(line_count):
+    return LINE_COUNT_FALLBACKS.get(line_count)
+
+
+# --- Built-in Forms ---
+register_form("Haiku", "***", syllables=((5, 5), (7, 7), (5, 5)))
+register_form("Tanka", "*****", syllables=((5, 5), (7, 7), (5, 5), (7, 7), (7, 7)))
+register_form("Cinquain", "*****", syllables=((2, 2), (4, 4), (6, 6), (8, 8), (2, 2)))
+register_form("Limerick", "AABBA", syllables=((7, 10), (7, 10), (5, 7), (5, 7), (7, 10)))
+register_form("Sonnet (likely Shakespearean)", "ABAB CDCD EFEF GG")
+register_form("Sonnet (likely Petrarchan)", {14: ["ABBAABBA CDECDE".replace(" ", ""),
+                                                  "ABBAABBA CDCDCD".replace(" ", "")]})
+register_form("Sonnet (likely Spenserian)", "ABAB BCBC CDCD EE")
+register_form("Villanelle", "ABA ABA ABA ABA ABA ABAA", refrains=((0, 5, 11, 17), (2, 8, 14, 18)))
+register_form("Sestina", "ABCDEF FAEBDC CFDABE ECBFAD DEACFB BDFECA ***")
+register_form("Rondeau", "AABBA AAB* AABBA*", refrains=((8, 14),))
+register_form("Triolet", "ABAAABAB", refrains=((0, 3, 6), (1, 7)))
+register_form("Spenserian Stanza", "ABABBCBCC")
+register_form("Ottava Rima", _repeated("ABABABCC"))
+register_form("Rhyme Royal", _repeated("ABABBCC"))
+register_form("Terza Rima", _terza_rima())
+register_form("Ghazal", _ghazal())
+register_form("Rubaiyat", _repeated("AABA"))
+register_form("Ballad Stanza", _repeated("ABCB"))
+register_form("Rhyming Couplets", _repeated("AA", min_stanzas=2))
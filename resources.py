@@ -0,0 +1,71 @@
+# resources.py - Shared, load-once NLTK data used by the apps and the batch tools
+#
+# Loading cmudict parses ~130k entries and building a VADER analyzer re-reads its lexicon; doing
+# each once per process and handing the same objects to main.py, the scansion module, the HTTP
+# service and the batch tools keeps start-up and memory in check. VADER and pyspellchecker are only
+# imported by their getters, so importing this module stays cheap.
+import threading
+
+from nltk.corpus import cmudict, stopwords
+
+_lock = threading.Lock()
+_pronouncing_dict = None
+_stop_words = None
+_sentiment_analyzer = None
+_spell_checker = None
+
+
+def get_pronouncing_dict():
+    """The CMU Pronouncing Dictionary as {word: [[phoneme, ...], ...]}; {} when it is unavailable."""
+    global _pronouncing_dict
+    if _pronouncing_dict is None:
+        with _lock:
+            if _pronouncing_dict is None:
+                try:
+                    _pronouncing_dict = cmudict.dict()
+                except LookupError:
+                    print("Warning: CMU Pronouncing Dictionary (cmudict.dict()) failed to load. "
+                          "Rhyme/syllable analysis may be limited.")
+                    _pronouncing_dict = {}
+    return _pronouncing_dict
+
+
+def get_stop_words():
+    """English stopwords as a set; empty when the corpus is unavailable."""
+    global _stop_words
+    if _stop_words is None:
+        with _lock:
+            if _stop_words is None:
+                try:
+                    _stop_words = set(stopwords.words('english'))
+                except LookupError:
+                    print("Warning: NLTK English Stopwords not found/loaded. "
+                          "Some text processing features might be affected.")
+                    _stop_words = set()
+    return _stop_words
+
+
+def get_sentiment_analyzer():
+    """One shared VADER SentimentIntensityAnalyzer (polarity_scores() keeps no state between calls)."""
+    global _sentiment_analyzer
+    if _sentiment_analyzer is None:
+        with _lock:
+            if _sentiment_analyzer is None:
+                from nltk.sentiment.vader import SentimentIntensityAnalyzer
+                _sentiment_analyzer = SentimentIntensityAnalyzer()
+    return _sentiment_analyzer
+
+
+def get_spell_checker():
+    """One shared pyspellchecker SpellChecker (its word-frequency list is large); None when not installed."""
+    global _spell_checker
+    if _spell_checker is None:
+        with _lock:
+            if _spell_checker is None:
+                try:
+                    from spellchecker import SpellChecker
+                except ImportError:
+                    print("Error: 'pyspellchecker' library not found. Please run: pip install pyspellchecker")
+                    return None
+                _spell_checker = SpellChecker()
+    return _spell_checker
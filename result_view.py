@@ -0,0 +1,156 @@
+# result_view.py - Paginated, collapsible, diff-updated rendering of analysis results in a tk.Text
+#
+# Results are split into rows (one per line) and sections. A "--- Heading ---" line starts a
+# section, and so does "Heading:" when the caller lists Heading among its section_titles; any
+# other line ending in ':' (a quoted verse, a figure-of-speech sentence) is ordinary content.
+# Rows are paged in incrementally: the first page is inserted up front and one more page is
+# appended each time the user scrolls near the end. Inserted rows stay in the widget, so this
+# bounds the work of showing a result, not the size of a fully scrolled one.
+# Clicking a section heading collapses or expands it.
+# Every update diffs the new rows against the rows already in the widget and only deletes/inserts
+# the changed middle, so refreshing a tab costs time proportional to what changed. Tag styles are
+# configured once (configure_tags), not on every update.
+import re
+import tkinter as tk
+
+PAGE_LINES = 300  # Rows inserted up front and per paging step
+LOAD_MORE_AT = 0.85  # Load the next page once the view's bottom edge passes this fraction
+HEADER_TAG = "result_section_header"
+HEADER_PATTERN = re.compile(r"^--- (.+) ---$")
+EXPANDED_MARK, COLLAPSED_MARK = "▾", "▸"
+
+
+def _is_header(line, section_titles):
+    return bool(HEADER_PATTERN.match(line)) or (line.endswith(":") and line[:-1] in section_titles)
+
+
+class ResultView:
+    """Drives an existing tk.Text (and its scrollbar) as an incrementally paged, sectioned result view.
+
+    `collapsed` may be a set shared across views (or redraws) to remember which sections are closed.
+    `section_titles` are the headings that start a section when written as "Heading:".
+    """
+
+    def __init__(self, widget, scrollbar=None, heading_tag="h1", content_tag="content", collapsed=None,
+                 page_lines=PAGE_LINES, section_titles=()):
+        self.widget = widget
+        self.section_titles = frozenset(section_titles)
+        self.scrollbar = scrollbar if scrollbar is not None else getattr(widget, "vbar", None)
+        self.heading_tag, self.content_tag = heading_tag, content_tag
+        self.collapsed = collapsed if collapsed is not None else set()
+        self.page_lines = page_lines
+        self.title, self.content, self.collapsible = "", "", True
+        self._entries = []  # (kind, text, section_key) for the whole result
+        self._all_rows = []  # Visible rows (collapsed sections folded) as (text, tags, section_key)
+        self._rows = []  # Rows currently inserted in the widget (a prefix of _all_rows)
+        self._load_pending = False
+        widget.configure(yscrollcommand=self._on_yscroll)
+        widget.tag_bind(HEADER_TAG, "<Button-1>", self._on_header_click)
+        widget.tag_bind(HEADER_TAG, "<Enter>", lambda e: widget.configure(cursor="hand2"))
+        widget.tag_bind(HEADER_TAG, "<Leave>", lambda e: widget.configure(cursor=""))
+
+    def configure_tags(self, **tag_options):
+        """tag_configure() for each {tag: options}; call when fonts change instead of on every update."""
+        for tag, options in tag_options.items():
+            self.widget.tag_configure(tag, **options)
+
+    # --- Content ---
+    def set_content(self, content, title="", collapsible=True):
+        """Shows a result; only rows that differ from what is displayed are touched."""
+        if (content, title, collapsible) == (self.content, self.title, self.collapsible) and self._rows:
+            return
+        self.title, self.content, self.collapsible = title, content, collapsible
+        self._entries = self._parse(content, title, collapsible)
+        self._render()
+
+    def text(self):
+        """The full result as plain text (title, blank line, content), regardless of paging or collapsing."""
+        return (f"{self.title}\n\n{self.content}" if self.title else self.content).strip()
+
+    def _parse(self, content, title, collapsible):
+        entries = []
+        if title:
+            entries += [("title", title, None), ("blank", "", None)]
+        section_key = None
+        for line in content.split("\n"):
+            if collapsible and _is_header(line, self.section_titles):
+                section_key = (title, line)
+                entries.append(("header", line, section_key))
+            else:
+                entries.append(("line", line, section_key))
+        return entries
+
+    def _visible_rows(self):
+        rows, content_tags = [], (self.content_tag,) if self.content_tag else ()
+        for kind, text, key in self._entries:
+            if kind == "title":
+                rows.append((text, (self.heading_tag,), None))
+            elif kind == "header":
+                mark = COLLAPSED_MARK if key in self.collapsed else EXPANDED_MARK
+                rows.append((f"{mark} {text}", content_tags + (HEADER_TAG,), key))
+            elif key is None or key not in self.collapsed:
+                rows.append((text, content_tags if kind == "line" else (), key))
+        return rows
+
+    def _render(self):
+        self._all_rows = self._visible_rows()
+        count = min(len(self._all_rows), max(self.page_lines, len(self._rows)))
+        self._apply(self._all_rows[:count])
+
+    # --- Diff Application ---
+    def _apply(self, new_rows):
+        old_rows = self._rows
+        limit = min(len(old_rows), len(new_rows))
+        prefix = 0
+        while prefix < limit and old_rows[prefix] == new_rows[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_rows[-1 - suffix] == new_rows[-1 - suffix]:
+            suffix += 1
+        old_end, new_end = len(old_rows) - suffix, len(new_rows) - suffix
+        if prefix == old_end and prefix == new_end:
+            return
+        widget = self.widget
+        was_disabled = str(widget.cget("state")) == tk.DISABLED
+        if was_disabled:
+            widget.configure(state=tk.NORMAL)
+        if old_end > prefix:
+            widget.delete(f"{prefix + 1}.0", f"{old_end + 1}.0")
+        if new_end > prefix:
+            insert_args = []
+            for text, tags, _ in new_rows[prefix:new_end]:
+                insert_args += [text + "\n", tags]
+            widget.insert(f"{prefix + 1}.0", *insert_args)
+        if was_disabled:
+            widget.configure(state=tk.DISABLED)
+        self._rows = list(new_rows)
+
+    # --- Lazy Loading and Sections ---
+    def _on_yscroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if float(last) >= LOAD_MORE_AT and len(self._rows) < len(self._all_rows) and not self._load_pending:
+            self._load_pending = True
+            self.widget.after_idle(self._load_more)
+
+    def _load_more(self):
+        self._load_pending = False
+        if not self.widget.winfo_exists():
+            return
+        count = min(len(self._all_rows), len(self._rows) + self.page_lines)
+        self._apply(self._all_rows[:count])
+
+    def _on_header_click(self, event):
+        row = int(self.widget.index(f"@{event.x},{event.y}").split(".")[0]) - 1
+        if 0 <= row < len(self._rows):
+            self.toggle_section(self._rows[row][2])
+        return "break"
+
+    def toggle_section(self, section_key):
+        if section_key is None:
+            return
+        if section_key in self.collapsed:
+            self.collapsed.discard(section_key)
+        else:
+            self.collapsed.add(section_key)
+        self._render()
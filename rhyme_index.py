@@ -0,0 +1,225 @@
+# rhyme_index.py - Precomputed rhyme lookup built once from the CMU Pronouncing Dictionary
+#
+# Every cmudict word is keyed by its rhyme tail (the phonemes from its last primary-stressed vowel,
+# stress digits removed) and by a looser near-rhyme tail (just the vowels of that tail, so
+# "time"/"line" match). The index is written with marshal next to this file as a few large strings
+# and uint32 arrays, so it loads in milliseconds. A query is a binary search for the word plus a
+# slice of its tail's member list, which is cached after the first lookup.
+#
+# Usage: python rhyme_index.py day [time ...]     # builds the index on first use
+import marshal
+import os
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+
+from resources import get_pronouncing_dict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, "rhyme_index.marshal")
+INDEX_VERSION = 2
+_VOWEL_PREFIXES = ("A", "E", "I", "O", "U")
+
+
+def rhyme_tail(phonemes):
+    """Phonemes from the last primary-stressed vowel (else the last stressed/any vowel) to the end."""
+    vowel_positions = [i for i, p in enumerate(phonemes) if p[-1].isdigit()]
+    if not vowel_positions:
+        return tuple(phonemes[-2:])
+    start = next((i for i in reversed(vowel_positions) if phonemes[i].endswith("1")), None)
+    if start is None:
+        start = next((i for i in reversed(vowel_positions) if phonemes[i].endswith("2")), vowel_positions[-1])
+    return tuple(p.rstrip("012") for p in phonemes[start:])
+
+
+def near_rhyme_tail(tail):
+    """The vowels of a rhyme tail: words sharing it assonate even when their consonants differ."""
+    return tuple(p for p in tail if p.startswith(_VOWEL_PREFIXES))
+
+
+def _pack(values):
+    return array("I", values).tobytes()
+
+
+def _unpack(data):
+    values = array("I")
+    values.frombytes(data)
+    return values
+
+
+def build_index_data(pronouncing_dict):
+    """Builds the marshal-friendly index structure from {word: [[phoneme, ...], ...]}.
+
+    Everything is stored as a handful of large strings and uint32 byte arrays (rather than one
+    Python object per word), which is what keeps loading fast.
+    """
+    words = sorted(word for word in pronouncing_dict if word.isalpha())
+    tail_ids, tails, members, word_tails, syllables = {}, [], [], [], []
+    for word_id, word in enumerate(words):
+        phonemes = pronouncing_dict[word][0]
+        tail = " ".join(rhyme_tail(phonemes))
+        tail_id = tail_ids.get(tail)
+        if tail_id is None:
+            tail_id = tail_ids[tail] = len(tails)
+            tails.append(tail)
+            members.append([])
+        count = min(255, sum(1 for p in phonemes if p[-1].isdigit()))
+        word_tails.append(tail_id)
+        syllables.append(count)
+        members[tail_id].append((count, word_id))
+    near_ids, near_of, near_members = {}, [], []
+    for tail_id, tail in enumerate(tails):
+        near = " ".join(near_rhyme_tail(tuple(tail.split())))
+        near_id = near_ids.get(near)
+        if near_id is None:
+            near_id = near_ids[near] = len(near_members)
+            near_members.append([])
+        near_of.append(near_id)
+        near_members[near_id].append(tail_id)
+    member_ids, member_offsets = [], [0]
+    for entry in members:
+        entry.sort()  # Fewer syllables first, then alphabetical
+        member_ids.extend(word_id for _, word_id in entry)
+        member_offsets.append(len(member_ids))
+    near_ids_flat, near_offsets = [], [0]
+    for entry in near_members:
+        near_ids_flat.extend(entry)
+        near_offsets.append(len(near_ids_flat))
+    return {"version": INDEX_VERSION, "words": " ".join(words), "tails": "|".join(tails),
+            "word_tails": _pack(word_tails), "syllables": bytes(syllables),
+            "members": _pack(member_ids), "member_offsets": _pack(member_offsets),
+            "near_of": _pack(near_of), "near_members": _pack(near_ids_flat), "near_offsets": _pack(near_offsets)}
+
+
+class RhymeIndex:
+    def __init__(self, data):
+        self.words = data["words"].split(" ") if data["words"] else []
+        self.tails = data["tails"].split("|")
+        self._word_tails = _unpack(data["word_tails"])
+        self._syllables = data["syllables"]
+        self._members = _unpack(data["members"])
+        self._member_offsets = _unpack(data["member_offsets"])
+        self._near_of = _unpack(data["near_of"])
+        self._near_members = _unpack(data["near_members"])
+        self._near_offsets = _unpack(data["near_offsets"])
+        self._split_cache = {}
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with open(path, "rb") as f:
+            data = marshal.load(f)
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Rhyme index at {path} has an unsupported version")
+        if not data.get("words"):  # Written before cmudict was available; rebuild from the real dictionary
+            raise ValueError(f"Rhyme index at {path} is empty")
+        return cls(data)
+
+    @classmethod
+    def build(cls, path=DEFAULT_INDEX_PATH, pronouncing_dict=None):
+        """Builds the index and saves it to path, unless the dictionary was empty (cmudict missing)."""
+        data = build_index_data(pronouncing_dict if pronouncing_dict is not None else get_pronouncing_dict())
+        if path and data["words"]:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                marshal.dump(data, f)
+            os.replace(tmp_path, path)
+        return cls(data)
+
+    @classmethod
+    def load_or_build(cls, path=DEFAULT_INDEX_PATH):
+        try:
+            return cls.load(path)
+        except (OSError, ValueError, EOFError, TypeError, KeyError):
+            return cls.build(path)
+
+    def _word_id(self, word):
+        i = bisect_left(self.words, word)
+        return i if i < len(self.words) and self.words[i] == word else None
+
+    def _entries(self, tail_id):
+        """[(word, syllables), ...] of one tail, fewest syllables first (cached after the first query)."""
+        entries = self._split_cache.get(tail_id)
+        if entries is None:
+            start, end = self._member_offsets[tail_id], self._member_offsets[tail_id + 1]
+            entries = self._split_cache[tail_id] = [(self.words[i], self._syllables[i])
+                                                    for i in self._members[start:end]]
+        return entries
+
+    def _tail_id(self, word):
+        word_id = self._word_id(word)
+        return self._word_tails[word_id] if word_id is not None else None
+
+    def tail_of(self, word):
+        tail_id = self._tail_id(word.lower())
+        return self.tails[tail_id] if tail_id is not None else None
+
+    def syllables_of(self, word):
+        word_id = self._word_id(word.lower())
+        return self._syllables[word_id] if word_id is not None else None
+
+    def rhymes(self, word, syllables=None, limit=None):
+        """Perfect rhymes of word (excluding itself), optionally only those with `syllables` syllables."""
+        word = word.lower()
+        tail_id = self._tail_id(word)
+        if tail_id is None:
+            return []
+        found = [w for w, count in self._entries(tail_id) if w != word and (syllables is None or count == syllables)]
+        return found[:limit] if limit else found
+
+    def near_rhymes(self, word, syllables=None, limit=None):
+        """Words sharing the vowel sounds of word's rhyme tail but not the whole tail."""
+        tail_id = self._tail_id(word.lower())
+        if tail_id is None:
+            return []
+        near_id = self._near_of[tail_id]
+        found = []
+        for other_id in self._near_members[self._near_offsets[near_id]:self._near_offsets[near_id + 1]]:
+            if other_id == tail_id:
+                continue
+            for w, count in self._entries(other_id):
+                if syllables is None or count == syllables:
+                    found.append(w)
+                    if limit and len(found) >= limit:
+                        return found
+        return found
+
+    def suggestions(self, word, limit=12):
+        """Rhymes for the editor: same-syllable perfect rhymes first, then other perfect and near rhymes."""
+        syllables = self.syllables_of(word)
+        perfect = self.rhymes(word, syllables, limit) if syllables else []
+        if len(perfect) < limit:
+            perfect += [w for w in self.rhymes(word) if w not in perfect][:limit - len(perfect)]
+        return perfect, self.near_rhymes(word, limit=limit)
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_rhyme_index(path=DEFAULT_INDEX_PATH):
+    """The process-wide RhymeIndex, loaded (or built on first use) once."""
+    global _shared_index
+    if _shared_index is None:
+        with _shared_lock:
+            if _shared_index is None:
+                _shared_index = RhymeIndex.load_or_build(path)
+    return _shared_index
+
+
+def main(argv=None):
+    words = argv if argv is not None else sys.argv[1:]
+    if not words:
+        print("Usage: python rhyme_index.py word [word ...]")
+        return 2
+    index = get_rhyme_index()
+    for word in words:
+        perfect, near = index.suggestions(word, limit=15)
+        print(f"{word}: {', '.join(perfect) if perfect else '(no rhymes found)'}")
+        if near:
+            print(f"  near: {', '.join(near)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
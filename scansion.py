@@ -0,0 +1,209 @@
+# scansion.py - Meter detection on NumPy stress arrays
+#
+# Each line becomes a row of stress values taken from the CMU stress digits (1 = primary stress,
+# 0.5 = secondary stress or unknown, 0 = unstressed). Monosyllables are treated as ambiguous,
+# since their stress depends on context. Lines (of one poem or of a whole corpus) are padded into
+# length-sorted matrices and compared against every foot pattern at once by broadcasting, so
+# scoring has no per-syllable Python loops.
+#
+# Usage: python scansion.py poem1.txt [poem2.txt ...]
+import functools
+import re
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from resources import get_pronouncing_dict
+
+# --- Feet and Line Lengths ---
+FEET = {
+    "iambic": (0.0, 1.0),
+    "trochaic": (1.0, 0.0),
+    "anapestic": (0.0, 0.0, 1.0),
+    "dactylic": (1.0, 0.0, 0.0),
+}
+LINE_LENGTH_NAMES = {1: "monometer", 2: "dimeter", 3: "trimeter", 4: "tetrameter", 5: "pentameter",
+                     6: "hexameter", 7: "heptameter", 8: "octameter"}
+AMBIGUOUS = 0.5
+MIN_WEIGHT = 0.25  # Ambiguous syllables still count a little so all-monosyllable lines get a score
+CHUNK_CELLS = 1 << 18  # Padded stress cells per scoring matrix in batch mode
+WORD_CACHE_SIZE = 1 << 16  # Words whose stresses (from the shared cmudict) stay cached
+
+_WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+_VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+_METER_NAMES = tuple(FEET)
+_FOOT_LENGTHS = np.array([len(FEET[name]) for name in _METER_NAMES])
+
+LineScansion = namedtuple("LineScansion", ["line", "stresses", "meter", "feet", "confidence"])
+PoemScansion = namedtuple("PoemScansion", ["meter", "confidence", "lines"])
+
+
+def word_stresses(word, pronouncing_dict=None):
+    """Stress values for one word: CMU stress digits when known, else a vowel-group estimate.
+
+    Only lookups in the shared cmudict are cached; an explicitly passed dictionary is always consulted.
+    """
+    if pronouncing_dict is None:
+        return _cached_word_stresses(word.lower())
+    return _stresses_from(word.lower(), pronouncing_dict)
+
+
+@functools.lru_cache(maxsize=WORD_CACHE_SIZE)
+def _cached_word_stresses(word_lower):
+    return _stresses_from(word_lower, get_pronouncing_dict())
+
+
+def _stresses_from(word_lower, pronouncing_dict):
+    prons = pronouncing_dict.get(word_lower) if pronouncing_dict else None
+    if prons:
+        digits = [phoneme[-1] for phoneme in prons[0] if phoneme[-1].isdigit()]
+        stresses = tuple(1.0 if d == "1" else (AMBIGUOUS if d == "2" else 0.0) for d in digits)
+    else:
+        syllables = max(1, len(_VOWEL_GROUP_RE.findall(word_lower.rstrip("e") or word_lower)))
+        stresses = (AMBIGUOUS,) * syllables
+    if len(stresses) == 1:
+        stresses = (AMBIGUOUS,)
+    return stresses
+
+
+def line_stresses(line, pronouncing_dict=None):
+    stresses = []
+    for word in _WORD_RE.findall(line):
+        stresses.extend(word_stresses(word, pronouncing_dict))
+    return stresses
+
+
+def stress_matrix(rows):
+    """Pads stress rows into one (lines, max_syllables) matrix, NaN beyond each line's end."""
+    width = max((len(row) for row in rows), default=0) or 1
+    matrix = np.full((len(rows), width), np.nan)
+    for i, row in enumerate(rows):
+        matrix[i, :len(row)] = row
+    return matrix
+
+
+def _templates(width):
+    """(meters, width) array of each foot pattern tiled across the line."""
+    return np.array([np.resize(FEET[name], width) for name in _METER_NAMES])
+
+
+def score_matrix(matrix):
+    """(meters, lines) agreement scores in [0, 1] between every line and every foot pattern."""
+    valid = ~np.isnan(matrix)
+    stresses = np.where(valid, matrix, AMBIGUOUS)
+    weights = np.where(valid, np.maximum(np.abs(stresses - AMBIGUOUS) * 2.0, MIN_WEIGHT), 0.0)
+    expected = _templates(matrix.shape[1])[:, None, :]
+    agreement = 1.0 - np.abs(stresses[None, :, :] - expected)
+    totals = weights.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = (agreement * weights[None, :, :]).sum(axis=2) / totals[None, :]
+    return np.nan_to_num(scores)
+
+
+def _meter_label(meter_index, feet):
+    length_name = LINE_LENGTH_NAMES.get(int(feet), f"{int(feet)}-foot")
+    return f"{_METER_NAMES[meter_index].capitalize()} {length_name}"
+
+
+def _stress_marks(row):
+    return "".join("/" if s == 1.0 else ("u" if s == 0.0 else "x") for s in row)
+
+
+def score_lines(rows):
+    """(meters, lines) scores for stress rows.
+
+    Lines are sorted by length and scored in chunks of similar length capped at CHUNK_CELLS padded
+    cells, so one very long line does not inflate the matrix for every other line.
+    """
+    lengths = np.array([len(row) for row in rows], dtype=np.int64)
+    scores = np.zeros((len(_METER_NAMES), len(rows)))
+    order = np.argsort(lengths, kind="stable")
+    start = 0
+    while start < len(order):
+        end = start + 1
+        while end < len(order) and (end - start + 1) * max(1, lengths[order[end]]) <= CHUNK_CELLS:
+            end += 1
+        chunk = order[start:end]
+        scores[:, chunk] = score_matrix(stress_matrix([rows[i] for i in chunk]))
+        start = end
+    return scores, lengths
+
+
+def _scan_block(poem_lines):
+    """Scans several poems at once; returns one PoemScansion per poem."""
+    all_lines = [line for lines in poem_lines for line in lines]
+    if not all_lines:
+        return [PoemScansion("Undetermined", 0.0, []) for _ in poem_lines]
+    rows = [line_stresses(line) for line in all_lines]
+    scores, lengths = score_lines(rows)  # scores: (meters, lines)
+    best = scores.argmax(axis=0)
+    best_scores = scores.max(axis=0)
+    feet = np.maximum(1, np.rint(lengths / _FOOT_LENGTHS[best])).astype(np.int64)
+
+    results, offset = [], 0
+    for lines in poem_lines:
+        end = offset + len(lines)
+        if end == offset:
+            results.append(PoemScansion("Undetermined", 0.0, []))
+            continue
+        line_results = [LineScansion(line, _stress_marks(rows[i]),
+                                     _meter_label(best[i], feet[i]) if lengths[i] else "Undetermined",
+                                     int(feet[i]), round(float(best_scores[i]), 3))
+                        for i, line in zip(range(offset, end), lines)]
+        # Poem meter: syllable-weighted mean score per meter; confidence also rewards agreement between lines
+        weights = lengths[offset:end].astype(float)
+        if weights.sum() == 0:
+            results.append(PoemScansion("Undetermined", 0.0, line_results))
+            offset = end
+            continue
+        poem_scores = (scores[:, offset:end] * weights).sum(axis=1) / weights.sum()
+        poem_meter = int(poem_scores.argmax())
+        agreeing = best[offset:end] == poem_meter
+        line_feet = np.maximum(1, np.rint(lengths[offset:end] / _FOOT_LENGTHS[poem_meter])).astype(np.int64)
+        counts = np.bincount(line_feet[agreeing] if agreeing.any() else line_feet)
+        typical_feet = len(counts) - 1 - int(counts[::-1].argmax())  # Ties go to the longer line length
+        confidence = float(poem_scores[poem_meter]) * float(np.average(agreeing, weights=weights))
+        results.append(PoemScansion(_meter_label(poem_meter, typical_feet), round(confidence, 3), line_results))
+        offset = end
+    return results
+
+
+def scan_poem(text):
+    """PoemScansion for one poem: overall meter, confidence and per-line results."""
+    return scan_lines([line for line in text.split("\n") if line.strip()])
+
+
+def scan_lines(lines):
+    """scan_poem() for a poem already split into its non-blank lines."""
+    return _scan_block([lines])[0]
+
+
+def scan_poems(texts):
+    """Batch form of scan_poem(): every line of every poem is scored in one matrix."""
+    return _scan_block([[line for line in text.split("\n") if line.strip()] for text in texts])
+
+
+def format_scansion(result):
+    lines = [f"Likely Meter: {result.meter} (confidence {result.confidence:.0%})"]
+    lines += [f"  Line {i + 1}: {line.stresses}  {line.meter} ({line.confidence:.0%})"
+              for i, line in enumerate(result.lines)]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:])
+    if not paths:
+        print("Usage: python scansion.py poem1.txt [poem2.txt ...]")
+        return 2
+    texts = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    for path, result in zip(paths, scan_poems(texts)):
+        print(f"{path}: {result.meter} (confidence {result.confidence:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
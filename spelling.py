@@ -0,0 +1,131 @@
+# spelling.py - Spell-check correction plans applied to a text buffer in one pass
+#
+# Misspellings are grouped per word (case-insensitively) with the character offsets of every
+# occurrence, and suggestions are looked up once per word rather than once per occurrence. The user
+# picks a replacement once per word; CorrectionPlan then rewrites every occurrence with a single
+# widget replace of the span they cover, as a single undo step.
+import re
+from collections import defaultdict, namedtuple
+
+WORD_RE = re.compile(r"\b\w+\b")
+MAX_SUGGESTIONS = 5
+
+Misspelling = namedtuple("Misspelling", ["word", "display", "spans", "suggestions"])
+Misspelling.__doc__ = """word is lowercased, display is its first occurrence as written, spans are (start, end) offsets."""
+
+
+def match_case(original, replacement):
+    """Gives replacement the capitalization pattern of the word it replaces (UPPER, Title or as is)."""
+    if original.isupper() and len(original) > 1:
+        return replacement.upper()
+    if original[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+def word_spans(text, words=None):
+    """{lowercase word: [(start, end), ...]} for every word of text (or only those in `words`)."""
+    spans = defaultdict(list)
+    for match in WORD_RE.finditer(text):
+        word = match.group().lower()
+        if words is None or word in words:
+            spans[word].append(match.span())
+    return spans
+
+
+def ranked_candidates(checker, word, limit=MAX_SUGGESTIONS):
+    """pyspellchecker candidates for word, most frequent first."""
+    candidates = checker.candidates(word) or set()
+    frequency = checker.word_frequency
+    return sorted((c for c in candidates if c != word), key=lambda c: (-frequency[c], c))[:limit]
+
+
+def index_suggester():
+    """suggest() backed by the symmetric-delete index (symspell.py), or None when it cannot be loaded."""
+    try:
+        from symspell import get_spell_index
+    except ImportError as e:  # numpy missing
+        print(f"Warning: fast spelling suggestions unavailable ({e}); using pyspellchecker candidates.")
+        return None
+    index = get_spell_index()
+    return index.suggestions if index is not None else None
+
+
+def find_misspellings(text, checker, suggest=None):
+    """[Misspelling, ...] in order of first appearance; suggest(word) defaults to ranked_candidates.
+
+    Pass suggest=index_suggester() for the fast index-backed suggestions.
+    """
+    if suggest is None:
+        suggest = lambda word: ranked_candidates(checker, word)
+    spans = word_spans(text)
+    unknown = checker.unknown(spans.keys())
+    found = []
+    for word, occurrences in spans.items():  # dicts keep first-appearance order
+        if word in unknown:
+            start, end = occurrences[0]
+            found.append(Misspelling(word, text[start:end], occurrences, suggest(word)))
+    return found
+
+
+class CorrectionPlan:
+    """The replacements chosen for one spell-check run over `text`."""
+
+    def __init__(self, text, misspellings):
+        self.text = text
+        self.misspellings = misspellings
+        self.choices = {}  # lowercase word -> replacement
+
+    def choose(self, word, replacement):
+        self.choices[word.lower()] = replacement
+
+    def edits(self, text=None):
+        """[(start, end, new_text), ...] for every occurrence of every chosen word, last occurrence first."""
+        if text is None or text == self.text:
+            spans = {m.word: m.spans for m in self.misspellings if m.word in self.choices}
+            text = self.text
+        else:  # The buffer changed since the check ran; locate the chosen words again
+            spans = word_spans(text, self.choices)
+        edits = [(start, end, match_case(text[start:end], self.choices[word]))
+                 for word, occurrences in spans.items() for start, end in occurrences]
+        edits.sort(reverse=True)
+        return edits
+
+    def apply_to_text(self, text=None):
+        """The corrected string (for batch use); the input is not modified."""
+        text = self.text if text is None else text
+        pieces, position = [], len(text)
+        for start, end, new in self.edits(text):
+            pieces.append(text[end:position])
+            pieces.append(new)
+            position = start
+        pieces.append(text[:position])
+        return "".join(reversed(pieces))
+
+    def apply_to_widget(self, widget):
+        """Rewrites every chosen occurrence in a tk.Text with one replace and one undo step; returns the count.
+
+        The span from the first to the last corrected word is swapped for its corrected text, so the
+        text outside it (and its tags and marks) is untouched.
+        """
+        current = widget.get("1.0", "end-1c")
+        edits = self.edits(current)
+        if not edits:
+            return 0
+        corrected = self.apply_to_text(current)
+        first, last = edits[-1][0], edits[0][1]  # Edits are sorted last occurrence first
+        new_last = last + len(corrected) - len(current)
+        autoseparators = widget.cget("autoseparators")
+        widget.configure(autoseparators=False)
+        try:
+            widget.edit_separator()
+            widget.replace(f"1.0+{first}c", f"1.0+{last}c", corrected[first:new_last])
+            widget.edit_separator()
+        finally:
+            widget.configure(autoseparators=autoseparators)
+        self.text = widget.get("1.0", "end-1c")
+        remaining = [m for m in self.misspellings if m.word not in self.choices]
+        spans = word_spans(self.text, {m.word for m in remaining})
+        self.misspellings = [m._replace(spans=spans[m.word]) for m in remaining if spans.get(m.word)]
+        self.choices = {}
+        return len(edits)
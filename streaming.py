@@ -0,0 +1,142 @@
+# streaming.py - Constant-memory analysis of book-length poem collections
+#
+# A collection file is read lazily, line by line, and split into poems (on delimiter lines such
+# as "***" or on runs of blank lines) and optionally into stanzas (on single blank lines). Each
+# unit is analyzed as soon as it is complete and the result is yielded, so peak memory is bounded
+# by the largest single poem (plus the analyzers' fixed-size caches), not by the file.
+#
+# Usage:
+#   python streaming.py collected_works.txt > results.jsonl
+#   python streaming.py collected_works.txt.gz --stanzas --delimiter "^\s*\d+\.\s*$" -o results.jsonl
+#   python streaming.py collected_works.txt -o results.jsonl --metrics run.prom   # metrics.py dump at the end
+import argparse
+import gzip
+import io
+import json
+import re
+import sys
+from collections import namedtuple
+
+DEFAULT_DELIMITER = r"^\s*(\*\s*\*\s*\*|#{3,}|~{3,}|-{3,}|={3,})\s*$"
+DEFAULT_BLANK_LINES = 3  # This many consecutive blank lines also end a poem (0 disables)
+
+Unit = namedtuple("Unit", ["poem_index", "stanza_index", "start_line", "text"])
+Unit.__doc__ = """A poem (stanza_index None) or one stanza of it; start_line is 1-based in the source file."""
+
+
+def open_text(source, encoding="utf-8"):
+    """Opens a path (plain or .gz) for lazy line iteration; file objects are returned as they are."""
+    if not isinstance(source, str):
+        return source
+    if source.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(source, "rb"), encoding=encoding, errors="replace")
+    return open(source, encoding=encoding, errors="replace")
+
+
+def iter_poems(lines, delimiter=DEFAULT_DELIMITER, blank_lines=DEFAULT_BLANK_LINES):
+    """Yields (start_line, [line, ...]) per poem from an iterable of lines, holding one poem at a time."""
+    delimiter_re = re.compile(delimiter) if delimiter else None
+    current, start_line, blank_run = [], None, 0
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if delimiter_re is not None and delimiter_re.match(line):
+            if current:
+                yield start_line, current
+            current, start_line, blank_run = [], None, 0
+            continue
+        if not line.strip():
+            blank_run += 1
+            if blank_lines and blank_run >= blank_lines and current:
+                yield start_line, current
+                current, start_line = [], None
+            elif current:
+                current.append("")
+            continue
+        blank_run = 0
+        if start_line is None:
+            start_line = number
+        current.append(line)
+    if current:
+        yield start_line, current
+
+
+def split_stanzas(start_line, poem_lines):
+    """Yields (start_line, [line, ...]) per stanza; stanzas are separated by blank lines."""
+    stanza, stanza_start = [], None
+    for offset, line in enumerate(poem_lines):
+        if line.strip():
+            if stanza_start is None:
+                stanza_start = start_line + offset
+            stanza.append(line)
+        elif stanza:
+            yield stanza_start, stanza
+            stanza, stanza_start = [], None
+    if stanza:
+        yield stanza_start, stanza
+
+
+def iter_units(source, delimiter=DEFAULT_DELIMITER, blank_lines=DEFAULT_BLANK_LINES, stanzas=False,
+               encoding="utf-8"):
+    """Yields Unit tuples for every poem (or every stanza when stanzas=True) in a file or line iterable."""
+    handle = open_text(source, encoding) if isinstance(source, str) or hasattr(source, "read") else None
+    lines = handle if handle is not None else source
+    try:
+        for poem_index, (start_line, poem_lines) in enumerate(iter_poems(lines, delimiter, blank_lines)):
+            while poem_lines and not poem_lines[-1].strip():
+                poem_lines.pop()
+            if not stanzas:
+                yield Unit(poem_index, None, start_line, "\n".join(poem_lines))
+                continue
+            for stanza_index, (stanza_start, stanza_lines) in enumerate(split_stanzas(start_line, poem_lines)):
+                yield Unit(poem_index, stanza_index, stanza_start, "\n".join(stanza_lines))
+    finally:
+        if handle is not None and isinstance(source, str):
+            handle.close()
+
+
+def analyze_stream(source, analyzer=None, **unit_options):
+    """Yields (unit, result) for each unit of source; analyzer defaults to main.analyze_poem."""
+    if analyzer is None:
+        from main import analyze_poem as analyzer
+    for unit in iter_units(source, **unit_options):
+        try:
+            yield unit, analyzer(unit.text)
+        except Exception as e:
+            yield unit, {"error": f"{type(e).__name__}: {e}"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze every poem of a large collection without loading it whole.")
+    parser.add_argument("source", help="Text file (optionally .gz) holding many poems")
+    parser.add_argument("-o", "--output", help="JSON Lines output file (default: stdout)")
+    parser.add_argument("--delimiter", default=DEFAULT_DELIMITER, help="Regex for lines that separate poems")
+    parser.add_argument("--blank-lines", type=int, default=DEFAULT_BLANK_LINES,
+                        help="Consecutive blank lines that also end a poem (0 disables)")
+    parser.add_argument("--stanzas", action="store_true", help="Analyze each stanza separately")
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--metrics", help="Write analyzer latency and cache metrics (Prometheus text) to this file")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        import metrics
+        metrics.install()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = 0
+    try:
+        for unit, result in analyze_stream(args.source, delimiter=args.delimiter, blank_lines=args.blank_lines,
+                                           stanzas=args.stanzas, encoding=args.encoding):
+            record = {"poem": unit.poem_index, "stanza": unit.stanza_index, "line": unit.start_line,
+                      "result": result}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if args.metrics:
+            metrics.REGISTRY.dump(args.metrics)
+    print(f"Analyzed {count} units from {args.source}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
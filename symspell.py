@@ -0,0 +1,375 @@
+# symspell.py - Spelling suggestions from a precomputed symmetric-delete index
+#
+# pyspellchecker builds every edit-distance-2 variant of a word at query time. Here the variants
+# are precomputed instead, SymSpell style: every dictionary word contributes the strings obtained
+# by deleting up to MAX_DISTANCE characters from its first PREFIX_LENGTH letters. A query makes the
+# same deletions of its own prefix, so candidates are the words sharing a delete with it; those
+# are verified with a real (Damerau) edit distance, computed for all candidates at once with numpy,
+# and ranked by distance, then frequency.
+#
+# Deletes are stored as crc32 hashes (a collision only adds a candidate that verification drops)
+# in sorted numpy arrays, written as .npy files next to this module and opened memory-mapped, so
+# loading costs almost nothing and several processes share the pages.
+#
+# Usage:
+#   python symspell.py suggest clowd daffodills
+#   python symspell.py clean corpus.txt -o corpus.clean.txt     # batch-correct unknown words
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+from bisect import bisect_left
+from collections import OrderedDict
+
+import numpy as np
+
+from spelling import match_case
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_DIR = os.path.join(BASE_DIR, "symspell_index")
+INDEX_VERSION = 3
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+_ARRAYS = ("hashes", "offsets", "postings", "counts", "lengths", "letters", "chars", "word_bytes", "word_offsets")
+_LETTER_COLUMNS = 27  # a-z, then one column for every other character
+CHAR_COLUMNS = 24  # Words up to this many bytes are compared in one vectorized batch
+LOOKUP_CACHE_SIZE = 4096  # Recent lookups kept in the LRU memo (texts repeat their misspellings)
+_TOKEN_RE = re.compile(r"[A-Za-z']+")
+
+
+def deletes(term, max_distance=MAX_DISTANCE):
+    """term plus every string made by deleting up to max_distance of its characters."""
+    found, frontier = {term}, {term}
+    for _ in range(max_distance):
+        frontier = {t[:i] + t[i + 1:] for t in frontier if len(t) > 1 for i in range(len(t))} - found
+        found |= frontier
+    return found
+
+
+def _hash(term):
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def edit_distance(a, b, limit):
+    """Optimal-string-alignment (Damerau) distance of a and b, or limit + 1 once it must exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # Shared prefixes and suffixes never add to the distance; most candidates share long ones
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a, end_b = end_a - 1, end_b - 1
+    if start and (start < end_a or start < end_b):
+        start -= 1  # Keep one shared character so a transposition across the boundary is still seen
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return min(max(len(a), len(b)), limit + 1)
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def letter_counts(word):
+    """Per-letter counts of a lowercase word (uint8, a-z plus one catch-all column)."""
+    counts = np.zeros(_LETTER_COLUMNS, dtype=np.uint8)
+    for char in word:
+        column = ord(char) - 97
+        counts[column if 0 <= column < 26 else 26] += 1
+    return counts
+
+
+def _char_matrix(encoded_words):
+    chars = np.zeros((len(encoded_words), CHAR_COLUMNS), dtype=np.uint8)
+    for row, encoded in enumerate(encoded_words):
+        chars[row, :min(len(encoded), CHAR_COLUMNS)] = np.frombuffer(encoded[:CHAR_COLUMNS], dtype=np.uint8)
+    return chars
+
+
+def batch_edit_distance(word_bytes, chars, lengths):
+    """edit_distance() of one ASCII word against many at once; chars is a zero-padded (n, width) byte matrix.
+
+    Row i of the dynamic program is computed for every candidate together; the insertion term,
+    which depends on the cell to the left, becomes a running minimum along the row.
+    """
+    query = np.frombuffer(word_bytes, dtype=np.uint8).astype(np.int16)
+    chars = chars.astype(np.int16)
+    count, width = chars.shape
+    columns = np.arange(width + 1, dtype=np.int16)
+    previous2, previous = None, np.tile(columns, (count, 1))
+    for i in range(1, len(query) + 1):
+        current = np.empty_like(previous)
+        current[:, 0] = i
+        current[:, 1:] = np.minimum(previous[:, :-1] + (chars != query[i - 1]), previous[:, 1:] + 1)
+        if previous2 is not None:
+            swapped = (chars[:, :-1] == query[i - 1]) & (chars[:, 1:] == query[i - 2])
+            current[:, 2:] = np.where(swapped, np.minimum(current[:, 2:], previous2[:, :-2] + 1), current[:, 2:])
+        current = np.minimum.accumulate(current - columns, axis=1) + columns
+        previous2, previous = previous, current
+    return previous[np.arange(count), lengths]
+
+
+def build_index(word_counts, directory=DEFAULT_INDEX_DIR, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+    """Writes the index for {word: frequency} into directory (as .npy files plus meta.json)."""
+    words = sorted(word for word in word_counts if word)
+    encoded = [word.encode("utf-8") for word in words]
+    hash_chunks, id_chunks = [], []
+    for word_id, word in enumerate(words):
+        word_hashes = np.fromiter({_hash(d) for d in deletes(word[:prefix_length], max_distance)}, dtype=np.uint32)
+        hash_chunks.append(word_hashes)
+        id_chunks.append(np.full(len(word_hashes), word_id, dtype=np.uint32))
+    all_hashes, all_ids = np.concatenate(hash_chunks), np.concatenate(id_chunks)
+    order = np.argsort(all_hashes, kind="stable")
+    all_hashes, all_ids = all_hashes[order], all_ids[order]
+    hashes, starts = np.unique(all_hashes, return_index=True)
+    arrays = {
+        "hashes": hashes,
+        "offsets": np.append(starts, len(all_hashes)).astype(np.uint32),
+        "postings": all_ids,
+        "counts": np.array([word_counts[word] for word in words], dtype=np.uint64),
+        "lengths": np.array([min(len(word), 255) for word in words], dtype=np.uint8),
+        "letters": np.array([letter_counts(word) for word in words], dtype=np.uint8).reshape(-1, _LETTER_COLUMNS),
+        "chars": _char_matrix(encoded),
+        "word_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "word_offsets": np.cumsum([0] + [len(e) for e in encoded], dtype=np.uint64),
+    }
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, name + ".npy"), array)
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:  # Written last: marks completion
+        json.dump({"version": INDEX_VERSION, "max_distance": max_distance, "prefix_length": prefix_length,
+                   "words": len(words)}, f)
+
+
+class _WordView:
+    """Sequence view of the (alphabetically sorted) index words, for bisect."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, word_id):
+        return self.index.word(word_id)
+
+
+class SymSpellIndex:
+    def __init__(self, directory=DEFAULT_INDEX_DIR):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Spelling index in {directory} has an unsupported version")
+        self.max_distance, self.prefix_length = meta["max_distance"], meta["prefix_length"]
+        for name in _ARRAYS:  # Plain ndarray views of the maps: still paged in lazily, but without memmap's indexing overhead
+            setattr(self, "_" + name, np.asarray(np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")))
+        self._word_cache = {}
+        self._lookup_cache = OrderedDict()  # (word, max_distance, limit) -> lookup() result
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0  # lookup() cache statistics (read by metrics.py)
+
+    @classmethod
+    def load_or_build(cls, directory=DEFAULT_INDEX_DIR, word_counts=None):
+        try:
+            return cls(directory)
+        except (OSError, ValueError, KeyError):
+            if word_counts is None:
+                word_counts = default_word_counts()
+            build_index(word_counts, directory)
+            return cls(directory)
+
+    def __len__(self):
+        return len(self._counts)
+
+    def word(self, word_id):
+        word = self._word_cache.get(word_id)
+        if word is None:
+            start, end = int(self._word_offsets[word_id]), int(self._word_offsets[word_id + 1])
+            word = self._word_cache[word_id] = bytes(self._word_bytes[start:end]).decode("utf-8")
+        return word
+
+    def _word_id(self, word):
+        position = bisect_left(_WordView(self), word)
+        return position if position < len(self) and self.word(position) == word else None
+
+    def __contains__(self, word):
+        return self._word_id(word.lower()) is not None
+
+    def frequency(self, word):
+        word_id = self._word_id(word.lower())
+        return int(self._counts[word_id]) if word_id is not None else 0
+
+    def lookup(self, word, max_distance=None, limit=5):
+        """[(suggestion, distance, frequency), ...]: closest first, then most frequent; the word itself is excluded.
+
+        The query's deletes are widened one distance at a time: after step k every word within
+        distance k has been seen, so the search stops as soon as `limit` of them are found.
+        """
+        word = word.lower()
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        key = (word, max_distance, limit)
+        with self._lock:
+            cached = self._lookup_cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                self._lookup_cache.move_to_end(key)
+                return list(cached)
+            self.misses += 1
+        found = self._lookup(word, max_distance, limit)
+        with self._lock:
+            self._lookup_cache[key] = tuple(found)
+            if len(self._lookup_cache) > LOOKUP_CACHE_SIZE:
+                self._lookup_cache.popitem(last=False)
+        return found
+
+    def _lookup(self, word, max_distance, limit):
+        prefix = word[:self.prefix_length]
+        found, seen_ids, seen_deletes = [], set(), set()
+        for distance in range(max_distance + 1):
+            step_deletes = deletes(prefix, distance) - seen_deletes
+            seen_deletes |= step_deletes
+            word_ids = [i for i in self._candidates(step_deletes, word, max_distance) if i not in seen_ids]
+            seen_ids.update(word_ids)
+            for word_id, candidate_distance in zip(word_ids, self._distances(word, word_ids, max_distance)):
+                if 0 < candidate_distance <= max_distance:  # Only the word itself is at distance 0
+                    found.append((self.word(word_id), int(candidate_distance), int(self._counts[word_id])))
+            if sum(1 for item in found if item[1] <= distance) >= limit:
+                break
+        found.sort(key=lambda item: (item[1], -item[2], item[0]))
+        return found[:limit]
+
+    def _distances(self, word, word_ids, limit):
+        if not word_ids:
+            return []
+        encoded = word.encode("utf-8")
+        ids = np.array(word_ids, dtype=np.int64)
+        lengths = (self._word_offsets[ids + 1] - self._word_offsets[ids]).astype(np.int64)  # In bytes
+        if encoded.isascii():  # Byte-wise comparison is only exact when both words are ASCII
+            batched = (lengths == self._lengths[ids]) & (lengths <= CHAR_COLUMNS)
+        else:
+            batched = np.zeros(len(ids), dtype=bool)
+        distances = np.full(len(ids), limit + 1, dtype=np.int64)
+        if batched.any():
+            batch_lengths = lengths[batched]
+            chars = self._chars[ids[batched], :int(batch_lengths.max())]
+            distances[batched] = batch_edit_distance(encoded, chars, batch_lengths)
+        for position in np.flatnonzero(~batched).tolist():
+            distances[position] = edit_distance(word, self.word(word_ids[position]), limit)
+        return distances.tolist()
+
+    def _candidates(self, delete_strings, word, max_distance):
+        """Ids of words sharing one of delete_strings that can be within max_distance of word.
+
+        Every edit changes the letter-count vector by at most one up and one down, so words whose
+        counts differ by more than max_distance in either direction are dropped before the edit
+        distance is computed.
+        """
+        if not delete_strings:
+            return []
+        query_hashes = np.fromiter((_hash(d) for d in delete_strings), dtype=np.uint32, count=len(delete_strings))
+        positions = np.searchsorted(self._hashes, query_hashes)
+        in_range = positions < len(self._hashes)
+        positions, query_hashes = positions[in_range], query_hashes[in_range]
+        positions = positions[self._hashes[positions] == query_hashes]
+        if not len(positions):
+            return []
+        starts, ends = self._offsets[positions], self._offsets[positions + 1]
+        candidate_ids = np.unique(np.concatenate([self._postings[s:e] for s, e in zip(starts, ends)]))
+        lengths = self._lengths[candidate_ids].astype(np.int16)
+        candidate_ids = candidate_ids[np.abs(lengths - len(word)) <= max_distance]
+        difference = self._letters[candidate_ids].astype(np.int16) - letter_counts(word).astype(np.int16)
+        surplus, shortfall = np.clip(difference, 0, None).sum(axis=1), np.clip(-difference, 0, None).sum(axis=1)
+        return candidate_ids[np.maximum(surplus, shortfall) <= max_distance].tolist()
+
+    def suggestions(self, word, limit=5):
+        """Suggested words only, as the spell-check popups show them."""
+        return [candidate for candidate, _, _ in self.lookup(word, limit=limit)]
+
+    def correct(self, word):
+        """The best suggestion in the word's capitalization, or the word itself when known or hopeless."""
+        if word.lower() in self:
+            return word
+        best = self.lookup(word, limit=1)
+        return match_case(word, best[0][0]) if best else word
+
+
+def default_word_counts():
+    """pyspellchecker's English word frequencies (the dictionary its candidates() searches)."""
+    from spellchecker import SpellChecker
+    return dict(SpellChecker().word_frequency.dictionary)
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_spell_index(directory=DEFAULT_INDEX_DIR):
+    """The process-wide SymSpellIndex, opened (or built on first use) once; None without pyspellchecker data."""
+    global _shared_index
+    if _shared_index is None:
+        with _shared_lock:
+            if _shared_index is None:
+                try:
+                    _shared_index = SymSpellIndex.load_or_build(directory)
+                except ImportError:
+                    print("Error: 'pyspellchecker' library not found. Please run: pip install pyspellchecker")
+                    return None
+                except OSError as e:  # e.g. a read-only install directory
+                    print(f"Warning: spelling index unavailable: {e}")
+                    return None
+    return _shared_index
+
+
+def clean_lines(lines, index):
+    """Yields each line with every unknown word (two letters or more) replaced by its best suggestion."""
+    for line in lines:
+        yield _TOKEN_RE.sub(lambda match: index.correct(match.group()) if len(match.group()) > 1 else match.group(),
+                            line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SymSpell-style spelling suggestions and batch correction.")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    suggest = commands.add_parser("suggest", help="Print suggestions for words")
+    suggest.add_argument("words", nargs="+")
+    clean = commands.add_parser("clean", help="Correct unknown words in a text file, line by line")
+    clean.add_argument("source")
+    clean.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    index = SymSpellIndex.load_or_build(args.index_dir)
+    if args.command == "suggest":
+        for word in args.words:
+            found = index.lookup(word)
+            print(f"{word}: " + (", ".join(f"{w} ({d})" for w, d, _ in found) if found else "(no suggestions)"))
+        return 0
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with open(args.source, encoding="utf-8", errors="replace") as f:
+            for line in clean_lines(f, index):
+                out.write(line)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# tagging.py - Shared part-of-speech tagging service
+#
+# nltk.pos_tag() may construct a new PerceptronTagger (and reload its weights) on every call,
+# depending on the NLTK version. The service below loads the tagger once, tags all sentences of a
+# poem -- or of a whole batch of poems -- in a single tag_sents() call, and memoizes the tags of
+# every tokenized sentence so re-analysing the same poem (or switching tabs) costs a dict lookup.
+import threading
+from collections import OrderedDict
+
+from nltk.tag.perceptron import PerceptronTagger
+from nltk.tokenize import sent_tokenize, word_tokenize
+
+from tracing import span
+
+SENTENCE_CACHE_SIZE = 8192  # Tagged sentences kept in the LRU memo
+
+
+class TaggingService:
+    """Holds one loaded perceptron tagger and an LRU memo of tagged sentences."""
+
+    def __init__(self, cache_size=SENTENCE_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._tagger = None
+        self._cache = OrderedDict()  # tuple(tokens) -> tuple((token, tag), ...)
+        self._lock = threading.Lock()
+
+    @property
+    def tagger(self):
+        if self._tagger is None:
+            with self._lock:
+                if self._tagger is None:
+                    with span("load_tagger"):
+                        self._tagger = PerceptronTagger()
+        return self._tagger
+
+    def tag_sents(self, token_lists):
+        """Tags a list of tokenized sentences; unseen sentences go to the tagger in one batch."""
+        keys = [tuple(tokens) for tokens in token_lists]
+        results = [None] * len(keys)
+        missing_positions = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    results[i] = cached
+                    self.hits += 1
+                elif key:
+                    missing_positions.setdefault(key, []).append(i)
+                else:
+                    results[i] = ()
+        if missing_positions:
+            missing_keys = list(missing_positions)
+            self.misses += len(missing_keys)
+            tagger = self.tagger
+            with span("pos_tag", sentences=len(missing_keys)):
+                tagged = tagger.tag_sents([list(key) for key in missing_keys])
+            with self._lock:
+                for key, tagged_sentence in zip(missing_keys, tagged):
+                    tagged_sentence = tuple(tagged_sentence)
+                    for i in missing_positions[key]:
+                        results[i] = tagged_sentence
+                    self._cache[key] = tagged_sentence
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return [list(tagged_sentence) for tagged_sentence in results]
+
+    def tag(self, tokens):
+        return self.tag_sents([tokens])[0]
+
+    def forget(self, token_lists):
+        """Drops the memoized tags of these tokenized sentences (e.g. of a document no longer shown)."""
+        with self._lock:
+            for tokens in token_lists:
+                self._cache.pop(tuple(tokens), None)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+def split_sentences(text, lower=False):
+    """Returns (sentences, token_lists) for text; word_tokenize is applied per sentence only once."""
+    with span("tokenize"):
+        sentences = sent_tokenize(text)
+        token_lists = [word_tokenize(s.lower() if lower else s, preserve_line=True) for s in sentences]
+    return sentences, token_lists
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_tagging_service():
+    """The process-wide TaggingService shared by both apps and the batch tools."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TaggingService()
+    return _service
+
+
+def tag_sents(token_lists):
+    return get_tagging_service().tag_sents(token_lists)
+
+
+def tag_text(text, lower=False):
+    """Returns (sentences, tagged_sentences) for one poem."""
+    sentences, token_lists = split_sentences(text, lower)
+    return sentences, get_tagging_service().tag_sents(token_lists)
+
+
+def forget_text(text, keep=()):
+    """Removes one poem's sentences (as tag_text() tokenizes them, either case) from the shared memo.
+
+    Sentences that also occur in one of the `keep` texts stay memoized.
+    """
+    service = get_tagging_service()
+    for lower in (False, True):
+        kept = {tuple(tokens) for other in keep for tokens in split_sentences(other, lower)[1]}
+        service.forget([tokens for tokens in split_sentences(text, lower)[1] if tuple(tokens) not in kept])
+
+
+def tag_poems(texts, lower=False):
+    """Tags a batch of poems with one tag_sents call; returns [(sentences, tagged_sentences), ...]."""
+    split = [split_sentences(text, lower) for text in texts]
+    all_token_lists = [tokens for _, token_lists in split for tokens in token_lists]
+    all_tagged = get_tagging_service().tag_sents(all_token_lists)
+    results, offset = [], 0
+    for sentences, token_lists in split:
+        results.append((sentences, all_tagged[offset:offset + len(token_lists)]))
+        offset += len(token_lists)
+    return results
+
+
+def flatten(tagged_sentences):
+    """Joins per-sentence tags into one token stream, like nltk.pos_tag(word_tokenize(text))."""
+    return [pair for tagged_sentence in tagged_sentences for pair in tagged_sentence]
@@ -0,0 +1,30 @@
+# test_langid.py - Language detection must never skip a translation it cannot justify
+import langid
+
+ENGLISH_STOPWORDS = ["the", "and", "of", "to", "in", "is", "that", "it", "was", "for", "on", "are", "with", "as",
+                     "his", "they", "be", "at", "one", "have", "this", "from", "or", "had", "by", "but", "what"]
+FRENCH_STANZA = "Il pleure dans mon coeur\nComme il pleut sur la ville;\nQuelle est cette langueur\nQui pénètre mon coeur?"
+
+
+def _single_language_profiles(monkeypatch):
+    profiles = langid.build_profiles({"en": ENGLISH_STOPWORDS})
+    monkeypatch.setattr(langid, "load_profiles", lambda: profiles)
+
+
+def test_single_profile_is_not_confident(monkeypatch):
+    _single_language_profiles(monkeypatch)
+    assert not langid.detect(FRENCH_STANZA).confident
+
+
+def test_foreign_stanza_is_translated_with_one_profile(monkeypatch):
+    _single_language_profiles(monkeypatch)
+    chunks = []
+
+    def translate(chunk):
+        chunks.append(chunk)
+        return chunk.upper()
+
+    translated, calls = langid.translate_stanzas(FRENCH_STANZA, "en", translate)
+    assert calls == 1
+    assert chunks == [FRENCH_STANZA]
+    assert translated == FRENCH_STANZA.upper()
@@ -0,0 +1,147 @@
+# tone_lexicon.py - Compiled keyword matching for tone classification and interpretive summaries
+#
+# The tone lexicons are compiled once at import into a token index (word -> [(tone, weight), ...]),
+# so one pass over the poem's words scores every tone category at a constant cost per token. The
+# phrase cues used by the interpretive summary ("flower", "not alone", "no more", ...) are plain
+# substring checks, compiled into a single Aho-Corasick automaton that scans the text once.
+# Extending a lexicon only adds dictionary entries; it does not add another pass over the poem.
+import re
+from collections import Counter, namedtuple, deque
+
+# --- Tone Lexicons ---
+# Categories are tried per sentiment polarity; on equal scores the category declared first wins.
+# Keywords map to weights; broad scene words count for less than explicit emotion words.
+TONE_LEXICONS = {
+    "positive": [
+        ("Romantic / Affectionate", {"love": 1.0, "heart": 1.0, "passion": 1.0, "darling": 1.0, "beloved": 1.0,
+                                     "kiss": 1.0, "adore": 1.0, "cherish": 1.0}),
+        ("Joyful / Celebratory", {"joy": 1.0, "happy": 1.0, "smile": 1.0, "laugh": 1.0, "glee": 1.0, "delight": 1.0,
+                                  "celebrate": 1.0, "elation": 1.0}),
+        ("Hopeful / Optimistic", {"hope": 1.0, "dream": 1.0, "future": 1.0, "believe": 1.0, "dawn": 1.0,
+                                  "aspire": 1.0, "faith": 1.0}),
+        ("Reflective / Nature-focused (Positive)", {"nature": 1.0, "beauty": 1.0, "serene": 1.0, "peace": 1.0,
+                                                    "calm": 1.0, "meadow": 1.0, "stars": 0.5, "moon": 0.5, "sun": 0.5,
+                                                    "wonder": 1.0}),
+    ],
+    "negative": [
+        ("Sad / Melancholic", {"sad": 1.0, "sorrow": 1.0, "tear": 1.0, "cry": 1.0, "grief": 1.0, "lost": 1.0,
+                               "lonely": 1.0, "mourn": 1.0, "despair": 1.0}),
+        ("Angry / Conflict-focused", {"anger": 1.0, "hate": 1.0, "rage": 1.0, "fury": 1.0, "resent": 1.0,
+                                      "fight": 1.0, "war": 1.0, "scorn": 1.0, "bitter": 1.0}),
+        ("Fearful / Anxious", {"fear": 1.0, "scared": 1.0, "terror": 1.0, "horror": 1.0, "anxious": 1.0, "dark": 0.5,
+                               "shadow": 0.5, "dread": 1.0}),
+        ("Nostalgic / Reflecting on Loss", {"loss": 1.0, "end": 0.5, "farewell": 1.0, "past": 0.5, "memory": 1.0,
+                                            "forgotten": 1.0, "vanish": 1.0, "fade": 1.0}),
+    ],
+    "neutral": [
+        ("Observational / Contemplative", {"observe": 1.0, "describe": 1.0, "think": 1.0, "ponder": 1.0,
+                                           "question": 1.0, "world": 0.5, "life": 0.5, "examine": 1.0,
+                                           "consider": 1.0}),
+    ],
+}
+FALLBACK_TONES = {"positive": "Generally Positive", "negative": "Generally Negative", "neutral": "Neutral / Descriptive"}
+
+# Substring cues checked by the interpretive summary.
+SUMMARY_CUES = ["flower", "die", "wilt", "water", "thirst", "neglect", "reject", "alone", "unloved", "abandon",
+                "not alone", "fade", "vanish", "gone", "no more"]
+
+ToneResult = namedtuple("ToneResult", ["tone", "polarity", "scores", "evidence"])
+ToneResult.__doc__ = """Chosen tone, polarity bucket, {tone: weighted score} and {tone: Counter(matched words)}."""
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _compile_token_index(lexicons):
+    index = {}
+    for categories in lexicons.values():
+        for tone, keywords in categories:
+            for keyword, weight in keywords.items():
+                index.setdefault(keyword, []).append((tone, weight))
+    return index
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting which of a fixed set of substrings occur in a text."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern in self.patterns:
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(pattern)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text):
+        """Returns the set of patterns occurring anywhere in text."""
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+TOKEN_INDEX = _compile_token_index(TONE_LEXICONS)
+CUE_AUTOMATON = KeywordAutomaton(SUMMARY_CUES)
+
+
+def score_tones(text):
+    """Scores every tone category in one pass over the words; returns ({tone: score}, {tone: Counter})."""
+    scores, evidence = {}, {}
+    for match in _WORD_RE.finditer(text.lower()):
+        entries = TOKEN_INDEX.get(match.group())
+        if entries is None:
+            continue
+        word = match.group()
+        for tone, weight in entries:
+            scores[tone] = scores.get(tone, 0.0) + weight
+            evidence.setdefault(tone, Counter())[word] += 1
+    return scores, evidence
+
+
+def polarity_of(compound_score):
+    if compound_score >= 0.05:
+        return "positive"
+    if compound_score <= -0.05:
+        return "negative"
+    return "neutral"
+
+
+def classify_tone(text, compound_score):
+    """Picks the best-scoring tone for the sentiment polarity (declared order breaks ties)."""
+    polarity = polarity_of(compound_score)
+    scores, evidence = score_tones(text)
+    best_tone, best_score = FALLBACK_TONES[polarity], 0.0
+    for tone, _ in TONE_LEXICONS[polarity]:
+        if scores.get(tone, 0.0) > best_score:
+            best_tone, best_score = tone, scores[tone]
+    return ToneResult(best_tone, polarity, scores, evidence)
+
+
+def find_cues(text_lower):
+    """The SUMMARY_CUES substrings present in the (lowercased) text."""
+    return CUE_AUTOMATON.find(text_lower)
@@ -0,0 +1,168 @@
+# tracing.py - Lightweight timing spans for the analysis and drawing hot paths
+#
+# Spans cost one flag check when tracing is disabled. When enabled (set LITLOOM_TRACE=1, call
+# tracing.enable(), or open the timing overlay in the apps), every finished span is kept in a
+# bounded in-memory buffer that can be exported as a Chrome/Perfetto trace (chrome://tracing,
+# https://ui.perfetto.dev) or summarized for the in-app overlay. A listener (metrics.py) subscribes
+# to the span names it needs; those spans are timed and passed to it even while tracing is off,
+# and every other span stays a no-op, so per-word spans cost nothing extra.
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+MAX_EVENTS = 200000  # Oldest spans are dropped once the buffer is full
+
+_enabled = os.environ.get("LITLOOM_TRACE", "") not in ("", "0")
+_events = deque(maxlen=MAX_EVENTS)  # (name, start_ns, duration_ns, thread_id, args)
+_listeners = []  # (callback, span names or None for all)
+_listened = frozenset()  # Names timed for the listeners while tracing is disabled
+_listen_all = False
+
+
+class _NullSpan:
+    """Returned by span() while tracing is disabled; entering and leaving it does nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start_ns")
+
+    def __init__(self, name, args):
+        self.name, self.args, self.start_ns = name, args, 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        record(self.name, self.start_ns, duration_ns, self.args)
+        return False
+
+
+def record(name, start_ns, duration_ns, args=None):
+    """Stores a finished span (while tracing is enabled) and notifies the listeners subscribed to it."""
+    if _enabled:
+        _events.append((name, start_ns, duration_ns, threading.get_ident(), args))
+    for callback, names in _listeners:
+        if names is None or name in names:
+            callback(name, duration_ns)
+
+
+def span(name, **args):
+    """Context manager timing the enclosed block: `with span("pos_tag"): ...`."""
+    if not (_enabled or _listen_all or name in _listened):
+        return _NULL_SPAN
+    return _Span(name, args or None)
+
+
+def traced(name=None):
+    """Decorator form of span(); the span is named after the function unless a name is given."""
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (_enabled or _listen_all or span_name in _listened):
+                return func(*args, **kwargs)
+            with _Span(span_name, None):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = bool(flag)
+
+
+def is_enabled():
+    return _enabled
+
+
+def clear():
+    _events.clear()
+
+
+def _update_listened():
+    global _listened, _listen_all
+    _listen_all = any(names is None for _, names in _listeners)
+    _listened = frozenset(name for _, names in _listeners if names is not None for name in names)
+
+
+def add_listener(callback, names=None):
+    """Registers callback(name, duration_ns) for the spans called `names` (all spans when None)."""
+    global _listeners
+    remove_listener(callback)
+    _listeners = _listeners + [(callback, None if names is None else frozenset(names))]
+    _update_listened()
+
+
+def remove_listener(callback):
+    global _listeners
+    # The list is replaced rather than mutated, since record() may be iterating over it
+    _listeners = [(c, names) for c, names in _listeners if c is not callback]
+    _update_listened()
+
+
+def last_run(root_name):
+    """Returns [(name, total_ms, count), ...] for the spans recorded during the latest `root_name` span.
+
+    The root span itself comes first; the rest are ordered by first start time.
+    """
+    events = list(_events)
+    root = next((e for e in reversed(events) if e[0] == root_name), None)
+    if root is None:
+        return []
+    root_start, root_end = root[1], root[1] + root[2]
+    totals, counts, first_start = {}, {}, {}
+    for name, start_ns, duration_ns, _, _ in events:
+        if start_ns < root_start or start_ns + duration_ns > root_end or (name == root_name and start_ns != root_start):
+            continue
+        totals[name] = totals.get(name, 0) + duration_ns
+        counts[name] = counts.get(name, 0) + 1
+        first_start.setdefault(name, start_ns)
+    ordered = sorted(totals, key=lambda n: (n != root_name, first_start[n]))
+    return [(name, totals[name] / 1e6, counts[name]) for name in ordered]
+
+
+def format_last_run(root_name):
+    """Plain-text table of last_run(), used by the timing overlays."""
+    rows = last_run(root_name)
+    if not rows:
+        if not _enabled:
+            return "Tracing is disabled."
+        return f"No '{root_name}' run recorded yet."
+    width = max(len(name) for name, _, _ in rows)
+    return "\n".join(f"{name:<{width}}  {total_ms:9.2f} ms" + (f"  x{count}" if count > 1 else "")
+                     for name, total_ms, count in rows)
+
+
+def export_chrome_trace(path):
+    """Writes the recorded spans in Chrome trace-event JSON format; returns the number of events written."""
+    pid = os.getpid()
+    trace_events = []
+    for name, start_ns, duration_ns, thread_id, args in list(_events):
+        event = {"name": name, "cat": "litloom", "ph": "X", "ts": start_ns / 1000.0,
+                 "dur": duration_ns / 1000.0, "pid": pid, "tid": thread_id}
+        if args:
+            event["args"] = {key: str(value) for key, value in args.items()}
+        trace_events.append(event)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+    return len(trace_events)
@@ -0,0 +1,113 @@
+# worker_pool.py - Process pool whose workers share the read-only linguistic resources
+#
+# Loading cmudict, the VADER lexicon, the perceptron tagger weights, the stopwords, the rhyme index
+# and the pyspellchecker frequency list takes seconds and hundreds of MB per process. With the
+# "fork" start method the parent loads everything once and then forks the workers, which inherit
+# the loaded objects copy-on-write: a new worker costs a fork, not a reload. gc.freeze() before
+# forking moves the preloaded objects out of the collector's generations, so garbage collection
+# in the workers does not touch (and thereby copy) their pages.
+#
+# Where fork is unavailable or unsafe (Windows, macOS) the pool falls back to "spawn" and every
+# worker preloads on its own, which is what a plain ProcessPoolExecutor would do.
+#
+# Usage: python worker_pool.py --workers 1 8 32    # spin-up time and memory per pool size
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+def fork_available():
+    """True where workers can be forked safely (macOS system frameworks do not survive fork)."""
+    return "fork" in multiprocessing.get_all_start_methods() and sys.platform != "darwin"
+
+
+def preload_resources():
+    """Loads every read-only resource the analyzers use into this process."""
+    from resources import get_pronouncing_dict, get_stop_words, get_sentiment_analyzer, get_spell_checker
+    from tagging import get_tagging_service
+    get_pronouncing_dict()
+    get_stop_words()
+    get_sentiment_analyzer()
+    get_spell_checker()
+    get_tagging_service().tagger
+    try:
+        from rhyme_index import get_rhyme_index
+        get_rhyme_index()
+    except Exception as e:  # The analyzers work without it; don't let a missing index block the pool
+        print(f"Warning: rhyme index not preloaded: {e}")
+
+
+def _setup_worker(initializer):
+    preload_resources()
+    if initializer is not None:
+        initializer()
+
+
+def _ping(_=None):
+    return os.getpid()
+
+
+def create_pool(workers, initializer=None, start_method=None):
+    """A started ProcessPoolExecutor with `workers` processes that already hold the resources.
+
+    initializer (a picklable module-level function) runs after the preload: once in this process
+    before forking, or in every worker under spawn.
+    """
+    start_method = start_method or ("fork" if fork_available() else "spawn")
+    if start_method == "fork":
+        _setup_worker(initializer)
+        gc.collect()
+        gc.freeze()
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method),
+                                       initializer=_setup_worker, initargs=(initializer,))
+    # The first submission starts the workers (all at once under fork, before any pool thread exists)
+    list(executor.map(_ping, range(workers)))
+    return executor
+
+
+# --- Measurement ---
+def process_memory_kib(pid):
+    """Proportional set size of a process in KiB (shared pages split between sharers), else RSS; Linux only."""
+    for path, field in ((f"/proc/{pid}/smaps_rollup", "Pss:"), (f"/proc/{pid}/status", "VmRSS:")):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return None
+
+
+def measure(workers, start_method=None):
+    """(seconds to start the pool, total PSS of parent + workers in KiB or None)."""
+    start = time.perf_counter()
+    executor = create_pool(workers, start_method=start_method)
+    elapsed = time.perf_counter() - start
+    pids = [os.getpid()] + [child.pid for child in multiprocessing.active_children()]
+    sizes = [process_memory_kib(pid) for pid in pids]
+    executor.shutdown()
+    return elapsed, (sum(sizes) if None not in sizes else None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure worker pool start-up time and memory.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--start-method", choices=["fork", "spawn", "forkserver"], default=None)
+    args = parser.parse_args(argv)
+    # Only the first pool measures the preload itself; later fork pools reuse this process's resources
+    for workers in args.workers:
+        elapsed, memory = measure(workers, args.start_method)
+        memory_text = f"{memory / 1024:.0f} MiB" if memory is not None else "n/a"
+        print(f"{workers:>3} workers: started in {elapsed * 1000:.0f} ms, total memory {memory_text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# workspace.py - Several open poems, each with its own editor state and cached analysis
+#
+# A Workspace holds Documents: the draft text and editor position (kept for as long as the
+# document is open) plus a cache of analysis results, such as tagged sentences or the rendered
+# text of a result section. Switching back to a document whose text has not changed shows its
+# cached results instead of analysing it again.
+#
+# Every cached value is stored with an estimate of its size. When the caches of all documents
+# together exceed the memory budget, the caches of the least recently viewed documents are dropped
+# (never the active one's), and their sentences are removed from the shared tagging memo too,
+# unless another open document still contains them. The document itself stays open; its results
+# are recomputed the next time it is analysed.
+import sys
+from collections import OrderedDict
+
+from tracing import span
+
+DEFAULT_MEMORY_BUDGET = 16 * 1024 * 1024  # Bytes of cached analysis kept across all documents
+TITLE_LENGTH = 28
+
+
+def estimate_size(value):
+    """Approximate bytes held by value, following containers (objects shared within value count once)."""
+    seen, stack, total = set(), [value], 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+
+class Document:
+    """One open poem: its editor state and its cached analysis results."""
+
+    def __init__(self, doc_id, text="", title=None):
+        self.doc_id = doc_id
+        self.text = text  # Editor contents as last saved from the widget
+        self.title = title
+        self.cursor = "1.0"
+        self.scroll = 0.0  # Top of the editor view, as a fraction of the text
+        self.analyzed_text = None  # The text the cached results belong to
+        self.active_section = None
+        self.cache = {}
+        self.cache_sizes = {}
+
+    @property
+    def display_title(self):
+        if self.title:
+            return self.title
+        first_line = next((line.strip() for line in self.text.splitlines() if line.strip()), "")
+        if not first_line:
+            return f"Untitled {self.doc_id}"
+        return first_line if len(first_line) <= TITLE_LENGTH else first_line[:TITLE_LENGTH - 1] + "…"
+
+    @property
+    def cache_bytes(self):
+        return sum(self.cache_sizes.values())
+
+
+class Workspace:
+    """The open Documents, most recently viewed last, with an LRU memory budget for their caches."""
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self.documents = OrderedDict()  # doc_id -> Document
+        self.active = None
+        self.evictions = 0
+        self._next_id = 1
+        self.new_document()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __iter__(self):
+        return iter(self.documents.values())
+
+    def new_document(self, text="", title=None):
+        """Opens a new document and makes it the active one."""
+        document = Document(self._next_id, text, title)
+        self._next_id += 1
+        self.documents[document.doc_id] = document
+        return self.activate(document.doc_id)
+
+    def activate(self, doc_id):
+        """Makes a document the active (most recently viewed) one and returns it."""
+        self.documents.move_to_end(doc_id)
+        self.active = self.documents[doc_id]
+        return self.active
+
+    def close(self, doc_id):
+        """Closes a document; the most recently viewed remaining one (or a new empty one) becomes active."""
+        document = self.documents.pop(doc_id)
+        self._drop_cache(document)
+        if not self.documents:
+            return self.new_document()
+        return self.activate(next(reversed(self.documents)))
+
+    # --- Cached Analysis ---
+    def set_analyzed_text(self, document, text):
+        """Records the text being analysed; results cached for different text are discarded."""
+        if text != document.analyzed_text:
+            self._drop_cache(document)
+            document.analyzed_text = text
+
+    def get(self, document, key, default=None):
+        return document.cache.get(key, default)
+
+    def put(self, document, key, value):
+        document.cache[key] = value
+        document.cache_sizes[key] = estimate_size(value)
+        self.enforce_budget()
+        return value
+
+    def cached(self, document, key, compute):
+        """document's cached value for key, computing and storing it on a miss."""
+        if key in document.cache:
+            return document.cache[key]
+        return self.put(document, key, compute())
+
+    @property
+    def cache_bytes(self):
+        return sum(document.cache_bytes for document in self)
+
+    def enforce_budget(self):
+        """Drops the caches of the least recently viewed documents until the total fits the budget."""
+        total = self.cache_bytes
+        for document in list(self.documents.values()):
+            if total <= self.memory_budget:
+                break
+            if document is self.active or not document.cache:
+                continue
+            total -= document.cache_bytes
+            with span("workspace_evict", document=document.doc_id):
+                self._drop_cache(document)
+            self.evictions += 1
+
+    def _drop_cache(self, document):
+        document.cache.clear()
+        document.cache_sizes.clear()
+        if document.analyzed_text:
+            from tagging import forget_text
+            # Other open drafts usually share most sentences with this one; their tags stay memoized
+            others = {text for other in self if other is not document for text in (other.text, other.analyzed_text)
+                      if text}
+            forget_text(document.analyzed_text, keep=others)
+        document.analyzed_text = None